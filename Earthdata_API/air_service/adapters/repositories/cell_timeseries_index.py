@@ -0,0 +1,238 @@
+# air_service/adapters/repositories/cell_timeseries_index.py
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pads
+
+from air_service.domain.entities import TimeSeries
+from air_service.domain.ports import TimeSeriesIndexPort
+from air_service.domain.value_objects import Coordinates, TimeWindow
+
+# Misma malla que colocation.GridSpec (0.02°, la resolución de TEMPO L3)
+DEFAULT_RESOLUTION = 0.02
+LAT0, LON0 = -90.0, -180.0
+TIME_COLUMNS = ("time", "tiempo")
+LAT_COLUMNS = ("latitude", "latitud")
+LON_COLUMNS = ("longitude", "longitud")
+RESAMPLE_SECONDS = {"hourly": 3600, "daily": 86400}
+META_NAME = "meta.json"
+CURRENT_NAME = "CURRENT"
+_UNIT_SECONDS = {"s": 1, "ms": 10 ** 3, "us": 10 ** 6, "ns": 10 ** 9}
+
+
+def _pick(names: list[str], candidates: tuple[str, ...]) -> str:
+    for name in candidates:
+        if name in names:
+            return name
+    raise ValueError(f"El producto no tiene columna {candidates[0]}")
+
+
+def _n_cols(resolution: float) -> int:
+    return int(round(360.0 / resolution))
+
+
+def cell_id(lat, lon, resolution: float = DEFAULT_RESOLUTION) -> np.ndarray:
+    row = np.floor((np.asarray(lat, dtype=np.float64) - LAT0) / resolution).astype(np.int64)
+    col = np.floor((np.asarray(lon, dtype=np.float64) - LON0) / resolution).astype(np.int64)
+    return row * _n_cols(resolution) + col
+
+
+def cell_center(cid: int, resolution: float = DEFAULT_RESOLUTION) -> tuple[float, float]:
+    row, col = divmod(int(cid), _n_cols(resolution))
+    return LAT0 + (row + 0.5) * resolution, LON0 + (col + 0.5) * resolution
+
+
+def _epoch_seconds(col: pa.ChunkedArray) -> np.ndarray:
+    if pa.types.is_timestamp(col.type):
+        return pc.cast(col, pa.int64()).to_numpy() // _UNIT_SECONDS[col.type.unit]
+    return np.asarray(col.to_numpy(), dtype=np.int64)
+
+
+def build_cell_index(source: str | Path, out_dir: str | Path, resolution: float = DEFAULT_RESOLUTION, columns: Sequence[str] | None = None, keep: int = 2) -> Path:
+    """
+    Construye el índice por celda de un producto del almacén particionado.
+
+    Los píxeles se ordenan por (cell_id, time) y cada columna se guarda como un
+    array .npy contiguo; ``cells.npy`` (ids únicos ordenados) y ``offsets.npy``
+    (inicio de cada celda, len(cells) + 1) permiten localizar la historia de una
+    celda con una búsqueda binaria y un slice sobre arrays mapeados en memoria.
+
+    Cada construcción es una versión en ``<out_dir>/<versión>/``; ``<out_dir>/CURRENT``
+    contiene el nombre de la vigente y se sustituye con ``os.replace`` al final (como
+    ``write_snapshot``), así que los lectores ven el índice anterior o el nuevo, nunca
+    uno a medias ni ninguno. Se conservan las ``keep`` versiones más recientes.
+    """
+    source, out_dir = Path(source), Path(out_dir)
+    dataset = pads.dataset(str(source), format="parquet", partitioning="hive")
+    names = dataset.schema.names
+    t_name, lat_name, lon_name = _pick(names, TIME_COLUMNS), _pick(names, LAT_COLUMNS), _pick(names, LON_COLUMNS)
+    if columns is None:
+        columns = [
+            f.name for f in dataset.schema
+            if f.name not in (t_name, lat_name, lon_name) and (pa.types.is_floating(f.type) or pa.types.is_integer(f.type))
+        ]
+    table = dataset.to_table(columns=[t_name, lat_name, lon_name, *columns])
+
+    cells = cell_id(table.column(lat_name).to_numpy(), table.column(lon_name).to_numpy(), resolution)
+    times = _epoch_seconds(table.column(t_name))
+    order = np.lexsort((times, cells))
+    cells, times = cells[order], times[order]
+    unique, starts = np.unique(cells, return_index=True)
+
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    tmp = out_dir / f".{version}.building"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    np.save(tmp / "cells.npy", unique)
+    np.save(tmp / "offsets.npy", np.append(starts, len(cells)).astype(np.int64))
+    np.save(tmp / "time.npy", times)
+    for c in columns:
+        values = table.column(c).to_numpy(zero_copy_only=False)
+        if values.dtype == np.float64:
+            values = values.astype(np.float32)
+        np.save(tmp / f"{c}.npy", values[order])
+    meta = {"version": version, "resolution": resolution, "columns": list(columns), "rows": int(len(cells)), "cells": int(len(unique)), "built_at": time.time()}
+    (tmp / META_NAME).write_text(json.dumps(meta), encoding="utf-8")
+    final = out_dir / version
+    tmp.rename(final)
+
+    pointer = out_dir / (CURRENT_NAME + ".tmp")
+    pointer.write_text(version, encoding="utf-8")
+    os.replace(pointer, out_dir / CURRENT_NAME)
+
+    # Índices del formato anterior (arrays directamente en out_dir) y versiones viejas
+    for legacy in [*out_dir.glob("*.npy"), out_dir / META_NAME]:
+        legacy.unlink(missing_ok=True)
+    versions = sorted(p for p in out_dir.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for old in versions[:-keep] if keep else []:
+        if old.name != version:
+            shutil.rmtree(old, ignore_errors=True)
+    print(f"🗂️ Índice {out_dir.name} ({version}): {meta['rows']:,} filas en {meta['cells']:,} celdas")
+    return final
+
+
+def _epoch(t: datetime) -> int:
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    return int(t.timestamp())
+
+
+class _ProductIndex:
+    def __init__(self, path: Path, version: str):
+        self.meta = json.loads((path / META_NAME).read_text(encoding="utf-8"))
+        self.version = version
+        self.stamp: int | None = None
+        self.cells = np.load(path / "cells.npy", mmap_mode="r")
+        self.offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        self.time = np.load(path / "time.npy", mmap_mode="r")
+        self.values = {c: np.load(path / f"{c}.npy", mmap_mode="r") for c in self.meta["columns"]}
+
+
+def _downsample(times: np.ndarray, values: dict[str, np.ndarray], seconds: int):
+    """Media por franja (times ordenados): un reduceat por columna ignorando NaN."""
+    bins = times // seconds
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    out = {}
+    for c, v in values.items():
+        v = v.astype(np.float64)
+        valid = ~np.isnan(v)
+        sums = np.add.reduceat(np.where(valid, v, 0.0), starts)
+        counts = np.add.reduceat(valid.astype(np.int64), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[c] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    return bins[starts] * seconds, out
+
+
+class CellTimeSeriesIndex(TimeSeriesIndexPort):
+    """
+    Series temporales por celda desde ``<root>/<producto>/`` (ver ``build_cell_index``).
+
+    Los arrays se abren mapeados en memoria una vez por versión del índice y las
+    respuestas se guardan en una caché LRU cuya clave incluye la versión, así que
+    reconstruir el índice invalida la caché sin reiniciar la API.
+    """
+
+    def __init__(self, root: str, cache_size: int = 1024):
+        self._root = Path(root)
+        self._cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._indexes: dict[str, _ProductIndex] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _index(self, product: str) -> _ProductIndex:
+        path = self._root / product
+        try:
+            if not product or "/" in product or ".." in product:
+                raise FileNotFoundError(product)
+            stamp = (path / CURRENT_NAME).stat().st_mtime_ns
+        except FileNotFoundError:
+            raise ValueError(f"Producto no disponible: {product}")
+        with self._lock:
+            index = self._indexes.get(product)
+            if index is None or index.stamp != stamp:
+                version = (path / CURRENT_NAME).read_text(encoding="utf-8").strip()
+                if index is None or index.version != version:
+                    index = self._indexes[product] = _ProductIndex(path / version, version)
+                index.stamp = stamp
+        return index
+
+    def series(self, product: str, coords: Coordinates, window: TimeWindow, resample: str = "raw", columns: Sequence[str] | None = None) -> TimeSeries:
+        index = self._index(product)
+        columns = tuple(columns) if columns else tuple(index.meta["columns"])
+        unknown = [c for c in columns if c not in index.values]
+        if unknown:
+            raise ValueError(f"Columnas desconocidas: {', '.join(unknown)}")
+        resolution = index.meta["resolution"]
+        cid = int(cell_id(coords.lat, coords.lon, resolution))
+        start_s, end_s = _epoch(window.start), _epoch(window.end)
+
+        key = (product, index.version, cid, start_s, end_s, resample, columns)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        lat, lon = cell_center(cid, resolution)
+        pos = int(np.searchsorted(index.cells, cid))
+        if pos < len(index.cells) and index.cells[pos] == cid:
+            lo, hi = int(index.offsets[pos]), int(index.offsets[pos + 1])
+            cell_times = index.time[lo:hi]
+            a = lo + int(np.searchsorted(cell_times, start_s, side="left"))
+            b = lo + int(np.searchsorted(cell_times, end_s, side="left"))
+            times = np.asarray(index.time[a:b])
+            values = {c: np.asarray(index.values[c][a:b]) for c in columns}
+        else:
+            times = np.empty(0, dtype=np.int64)
+            values = {c: np.empty(0, dtype=np.float32) for c in columns}
+
+        if resample in RESAMPLE_SECONDS and len(times):
+            times, values = _downsample(times, values, RESAMPLE_SECONDS[resample])
+
+        result = TimeSeries(
+            product=product,
+            latitude=round(lat, 6),
+            longitude=round(lon, 6),
+            resample=resample,
+            times=times.tolist(),
+            values={c: [None if x != x else x for x in v.tolist()] for c, v in values.items()},
+        )
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return result
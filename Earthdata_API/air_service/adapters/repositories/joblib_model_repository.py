@@ -1,11 +1,20 @@
 # air_service/adapters/repositories/joblib_model_repository.py
 import joblib
+import numpy as np
 from typing import Any, Sequence
 
 from air_service.domain.ports import AirQualityModelPort
 from air_service.domain.value_objects import Coordinates
 from air_service.domain.entities import AirQualityPrediction
 
+# clave de salida del modelo -> campo de AirQualityPrediction
+RAW_FIELDS = {
+    "Dioxido_de_nitrogeno": "dioxido_nitrogeno",
+    "Formaldehido": "formaldehido",
+    "Indice_de_aerosol": "indice_aerosol",
+    "Material_particulado": "material_particulado",
+}
+
 class JoblibModelRepository(AirQualityModelPort):
     def __init__(self, model_path: str):
         self._model = joblib.load(model_path)
@@ -22,3 +31,24 @@ class JoblibModelRepository(AirQualityModelPort):
             )
 
         raise ValueError("Formato de salida del modelo no reconocido (se esperaba dict).")
+
+    def predict_many(self, lat: np.ndarray, lon: np.ndarray) -> dict[str, np.ndarray]:
+        """
+        Predicciones de muchos puntos: {campo de AirQualityPrediction: array float32}.
+
+        Usa ``predict_batch(lat, lon)`` del modelo si existe; si no, prueba ``predict``
+        con arrays (los modelos numpy suelen vectorizar) y, si la salida no tiene la
+        forma esperada, cae a una llamada por punto.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        predict = getattr(self._model, "predict_batch", None) or self._model.predict
+        try:
+            raw = predict(lat, lon)
+            if all(np.shape(raw[key]) == lat.shape for key in RAW_FIELDS):
+                return {field: np.asarray(raw[key], dtype=np.float32) for key, field in RAW_FIELDS.items()}
+        except (TypeError, ValueError, KeyError):
+            pass
+        print(f"⚠️ El modelo no vectoriza: {lat.size:,} llamadas individuales")
+        rows = [self._model.predict(float(a), float(b)) for a, b in zip(lat.ravel(), lon.ravel())]
+        return {field: np.array([r[key] for r in rows], dtype=np.float32).reshape(lat.shape) for key, field in RAW_FIELDS.items()}
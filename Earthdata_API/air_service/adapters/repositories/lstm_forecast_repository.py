@@ -0,0 +1,103 @@
+# air_service/adapters/repositories/lstm_forecast_repository.py
+from dataclasses import fields
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+
+import numpy as np
+
+from air_service.app.micro_batcher import MicroBatcher
+from air_service.domain.entities import AirQualityPrediction
+from air_service.domain.ports import AirQualityModelPort, TimeSeriesIndexPort
+from air_service.domain.value_objects import Coordinates, TimeWindow
+
+# Igual que prediction_data.py
+FEATURES = (
+    "vertical_column_troposphere",
+    "vertical_column_troposphere_uncertainty",
+    "vertical_column_stratosphere",
+)
+SEQ_LENGTH = 10
+PREDICTION_FIELDS = tuple(f.name for f in fields(AirQualityPrediction))
+
+
+class LstmForecastModelRepository(AirQualityModelPort):
+    """
+    Sirve el modelo LSTM de ``prediction_data.py`` con micro-batching.
+
+    La ventana de entrada (últimas ``seq_length`` observaciones de ``features`` en la
+    celda) se lee del índice de series temporales; las peticiones concurrentes se
+    agrupan en ``MicroBatcher`` y cada lote se escala, pasa por el modelo en una sola
+    llamada ``predict_on_batch`` y se des-escala de forma vectorizada.
+
+    ``output_fields`` indica qué campos de AirQualityPrediction produce cada salida del
+    modelo (no hay valor por defecto: depende de con qué objetivo se entrenó) y debe
+    tener tantos elementos como salidas; los demás campos (y las celdas sin historia)
+    se toman de ``fallback``.
+    """
+
+    def __init__(self, model, scaler_x, scaler_y, index: TimeSeriesIndexPort, output_fields: Sequence[str], fallback: AirQualityModelPort | None = None, product: str = "no2_l3", features: Sequence[str] = FEATURES, seq_length: int = SEQ_LENGTH, lookback: timedelta = timedelta(days=7), max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        unknown = [f for f in output_fields if f not in PREDICTION_FIELDS]
+        if unknown:
+            raise ValueError(f"Campos de salida desconocidos: {', '.join(unknown)}")
+        if not output_fields:
+            raise ValueError("output_fields vacío: indica qué campos predice el modelo")
+        outputs = (getattr(model, "output_shape", None) or (None,))[-1]
+        if outputs is not None and outputs != len(output_fields):
+            raise ValueError(f"El modelo tiene {outputs} salidas y output_fields {len(output_fields)} campos")
+        if fallback is None and set(output_fields) != set(PREDICTION_FIELDS):
+            raise ValueError("Se necesita un modelo fallback para los campos que el LSTM no predice")
+        self._model = model
+        self._scaler_x = scaler_x
+        self._scaler_y = scaler_y
+        self._index = index
+        self._output_fields = tuple(output_fields)
+        self._fallback = fallback
+        self._product = product
+        self._features = tuple(features)
+        self._seq_length = seq_length
+        self._lookback = lookback
+        self.batcher = MicroBatcher(self._forward, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, name="lstm-batcher")
+
+    @classmethod
+    def from_files(cls, model_path: str, scaler_x_path: str, scaler_y_path: str, index: TimeSeriesIndexPort, **kwargs) -> "LstmForecastModelRepository":
+        import joblib
+        import tensorflow as tf
+
+        model = tf.keras.models.load_model(model_path, compile=False)
+        return cls(model, joblib.load(scaler_x_path), joblib.load(scaler_y_path), index, **kwargs)
+
+    def _forward(self, x: np.ndarray) -> np.ndarray:
+        """(B, seq, F) crudo -> (B, salidas) en unidades originales, todo en una pasada."""
+        b, s, f = x.shape
+        scaled = self._scaler_x.transform(x.reshape(-1, f)).reshape(b, s, f).astype(np.float32)
+        out = np.asarray(self._model.predict_on_batch(scaled)).reshape(b, -1)
+        return self._scaler_y.inverse_transform(out)
+
+    def _window(self, coords: Coordinates) -> np.ndarray | None:
+        # Fin redondeado al minuto: peticiones cercanas comparten la entrada en caché del índice
+        end = datetime.now(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        ts = self._index.series(self._product, coords, TimeWindow(end - self._lookback, end), "raw", self._features)
+        if not ts.times:
+            return None
+        x = np.array([ts.values[f] for f in self._features], dtype=np.float64).T[-self._seq_length:]
+        if np.isnan(x).any():
+            x = np.where(np.isnan(x), np.nanmean(x, axis=0), x)
+        if len(x) < self._seq_length:
+            x = np.concatenate([np.repeat(x[:1], self._seq_length - len(x), axis=0), x])
+        return x
+
+    def predict(self, coords: Coordinates) -> AirQualityPrediction:
+        x = self._window(coords)
+        if x is None or np.isnan(x).any():
+            if self._fallback is None:
+                raise ValueError("Sin historia suficiente para esta ubicación")
+            return self._fallback.predict(coords)
+        y = self.batcher.submit(x)
+        values = dict(zip(self._output_fields, (float(v) for v in y)))
+        if len(values) < len(PREDICTION_FIELDS):
+            base = self._fallback.predict(coords)
+            values = {f: values.get(f, getattr(base, f)) for f in PREDICTION_FIELDS}
+        return AirQualityPrediction(**values)
+
+    def metrics(self) -> dict:
+        return self.batcher.metrics()
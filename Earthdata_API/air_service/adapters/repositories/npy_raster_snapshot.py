@@ -0,0 +1,82 @@
+# air_service/adapters/repositories/npy_raster_snapshot.py
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from air_service.domain.entities import RasterSnapshot
+from air_service.domain.ports import RasterSnapshotPort
+
+CURRENT_NAME = "CURRENT"
+META_NAME = "meta.json"
+
+
+def write_snapshot(root: str | Path, layers: dict[str, np.ndarray], lat0: float, lon0: float, resolution: float, version: str | None = None, keep: int = 3, extra: dict | None = None) -> Path:
+    """
+    Publica un snapshot versionado de la malla de predicciones.
+
+    Cada versión vive en ``<root>/<version>/`` (``meta.json`` + un ``.npy`` float32 por
+    capa); ``<root>/CURRENT`` contiene el nombre de la versión vigente y se sustituye
+    de forma atómica al final, así que los lectores nunca ven un snapshot a medias.
+    Se conservan las ``keep`` versiones más recientes.
+    """
+    root = Path(root)
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    shapes = {a.shape for a in layers.values()}
+    if len(shapes) != 1 or len(next(iter(shapes))) != 2:
+        raise ValueError("Todas las capas deben ser arrays 2-D con la misma forma")
+
+    tmp = root / f".{version}.building"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, array in layers.items():
+        np.save(tmp / f"{name}.npy", np.asarray(array, dtype=np.float32))
+    meta = {"version": version, "lat0": lat0, "lon0": lon0, "resolution": resolution, "shape": list(next(iter(shapes))), "layers": list(layers), **(extra or {})}
+    (tmp / META_NAME).write_text(json.dumps(meta), encoding="utf-8")
+    final = root / version
+    shutil.rmtree(final, ignore_errors=True)
+    tmp.rename(final)
+
+    pointer = root / (CURRENT_NAME + ".tmp")
+    pointer.write_text(version, encoding="utf-8")
+    os.replace(pointer, root / CURRENT_NAME)
+
+    versions = sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for old in versions[:-keep] if keep else []:
+        if old.name != version:
+            shutil.rmtree(old, ignore_errors=True)
+    return final
+
+
+class NpyRasterSnapshotRepository(RasterSnapshotPort):
+    """Lee el snapshot vigente (ver ``write_snapshot``) con arrays mapeados en memoria; recarga al cambiar CURRENT."""
+
+    def __init__(self, root: str):
+        self._root = Path(root)
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._snapshot: RasterSnapshot | None = None
+
+    def current(self) -> RasterSnapshot:
+        try:
+            stamp = (self._root / CURRENT_NAME).stat().st_mtime_ns
+        except FileNotFoundError:
+            raise LookupError("No hay ningún snapshot de predicciones publicado")
+        with self._lock:
+            if self._snapshot is None or stamp != self._stamp:
+                version = (self._root / CURRENT_NAME).read_text(encoding="utf-8").strip()
+                path = self._root / version
+                meta = json.loads((path / META_NAME).read_text(encoding="utf-8"))
+                self._snapshot = RasterSnapshot(
+                    version=version,
+                    lat0=meta["lat0"],
+                    lon0=meta["lon0"],
+                    resolution=meta["resolution"],
+                    layers={name: np.load(path / f"{name}.npy", mmap_mode="r") for name in meta["layers"]},
+                )
+                self._stamp = stamp
+            return self._snapshot
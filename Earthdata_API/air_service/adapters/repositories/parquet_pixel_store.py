@@ -0,0 +1,110 @@
+# air_service/adapters/repositories/parquet_pixel_store.py
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Sequence
+
+import pyarrow as pa
+import pyarrow.dataset as pads
+
+from air_service.domain.ports import PixelStorePort
+from air_service.domain.value_objects import BoundingBox, TimeWindow
+
+# Nombres de coordenadas según el producto (los de HCHO L2 vienen en español)
+TIME_COLUMNS = ("time", "tiempo")
+LAT_COLUMNS = ("latitude", "latitud")
+LON_COLUMNS = ("longitude", "longitud")
+DATE_PARTITIONING = pads.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+_UNIT_SECONDS = {"s": 1, "ms": 10 ** 3, "us": 10 ** 6, "ns": 10 ** 9}
+
+
+def _pick(schema: pa.Schema, candidates: tuple[str, ...]) -> str:
+    for name in candidates:
+        if name in schema.names:
+            return name
+    raise ValueError(f"El producto no tiene columna {candidates[0]}")
+
+
+def _epoch(t: datetime) -> int:
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    return int(t.timestamp())
+
+
+class ParquetPixelStore(PixelStorePort):
+    """
+    Lee el almacén particionado que escribe la ingesta
+    (``<root>/<producto>/date=YYYY-MM-DD/*.parquet``).
+
+    Los filtros de fecha (partición), tiempo y bbox se empujan al lector, de modo que
+    solo se abren los ficheros del rango y los row groups cuyas estadísticas solapan la
+    consulta; los lotes se producen de uno en uno con memoria acotada.
+    """
+
+    def __init__(self, root: str, batch_size: int = 65_536, fragment_readahead: int = 2, batch_readahead: int = 4):
+        self._root = Path(root)
+        self._batch_size = batch_size
+        self._fragment_readahead = fragment_readahead
+        self._batch_readahead = batch_readahead
+
+    def products(self) -> list[str]:
+        if not self._root.exists():
+            return []
+        return sorted(p.name for p in self._root.iterdir() if p.is_dir())
+
+    def _dataset(self, product: str) -> pads.Dataset:
+        path = self._root / product
+        if not product or "/" in product or ".." in product or not path.is_dir():
+            raise ValueError(f"Producto no disponible: {product}")
+        return pads.dataset(str(path), format="parquet", partitioning=DATE_PARTITIONING)
+
+    def _columns(self, dataset: pads.Dataset, columns: Sequence[str] | None) -> list[str]:
+        schema = dataset.schema
+        coords = [_pick(schema, TIME_COLUMNS), _pick(schema, LAT_COLUMNS), _pick(schema, LON_COLUMNS)]
+        if not columns:
+            return [n for n in schema.names if n != "date"]
+        unknown = [c for c in columns if c not in schema.names]
+        if unknown:
+            raise ValueError(f"Columnas desconocidas: {', '.join(unknown)}")
+        return coords + [c for c in columns if c not in coords]
+
+    def schema(self, product: str, columns: Sequence[str] | None = None) -> pa.Schema:
+        dataset = self._dataset(product)
+        names = self._columns(dataset, columns)
+        return pa.schema([dataset.schema.field(n) for n in names], metadata=dataset.schema.metadata)
+
+    def _filter(self, dataset: pads.Dataset, bbox: BoundingBox, window: TimeWindow):
+        schema = dataset.schema
+        t_name = _pick(schema, TIME_COLUMNS)
+        lat = pads.field(_pick(schema, LAT_COLUMNS))
+        lon = pads.field(_pick(schema, LON_COLUMNS))
+        start_s, end_s = _epoch(window.start), _epoch(window.end)
+
+        t_type = schema.field(t_name).type
+        if pa.types.is_timestamp(t_type):
+            factor = _UNIT_SECONDS[t_type.unit]
+            lo = pa.scalar(start_s * factor, type=pa.int64()).cast(t_type)
+            hi = pa.scalar(end_s * factor, type=pa.int64()).cast(t_type)
+        else:
+            lo, hi = start_s, end_s
+        t = pads.field(t_name)
+
+        expr = (t >= lo) & (t < hi)
+        expr &= (lat >= bbox.min_lat) & (lat <= bbox.max_lat) & (lon >= bbox.min_lon) & (lon <= bbox.max_lon)
+        if "date" in schema.names:
+            first = datetime.fromtimestamp(start_s, tz=timezone.utc).strftime("%Y-%m-%d")
+            last = datetime.fromtimestamp(end_s, tz=timezone.utc).strftime("%Y-%m-%d")
+            expr &= (pads.field("date") >= first) & (pads.field("date") <= last)
+        return expr
+
+    def scan(self, product: str, bbox: BoundingBox, window: TimeWindow, columns: Sequence[str] | None = None) -> Iterator[pa.RecordBatch]:
+        dataset = self._dataset(product)
+        scanner = dataset.scanner(
+            columns=self._columns(dataset, columns),
+            filter=self._filter(dataset, bbox, window),
+            batch_size=self._batch_size,
+            fragment_readahead=self._fragment_readahead,
+            batch_readahead=self._batch_readahead,
+        )
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch
@@ -1,22 +1,99 @@
-from fastapi import APIRouter, HTTPException
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from air_service.adapters.web.mappers.prediction_response_mapper import map_prediction_to_response
+from air_service.adapters.web.mappers.region_response_mapper import map_region_to_response
+from air_service.adapters.web.mappers.timeseries_response_mapper import map_timeseries_to_response
+from air_service.adapters.web.streaming import ARROW_STREAM_MEDIA_TYPE, NDJSON_MEDIA_TYPE, arrow_ipc_chunks, ndjson_chunks
+from air_service.domain.value_objects import BoundingBox, RegionPolygon, TimeWindow
 
 class PredictRequest(BaseModel):
     latitude: float = Field(..., description="Latitud en grados decimales (-90 a 90)")
     longitude: float = Field(..., description="Longitud en grados decimales (-180 a 180)")
 
-def get_router(predict_use_case):
+class RegionRequest(BaseModel):
+    bbox: list[float] | None = Field(None, min_length=4, max_length=4, description="[min_lon, min_lat, max_lon, max_lat]")
+    geometry: dict | None = Field(None, description="GeoJSON Polygon, MultiPolygon o Feature")
+
+def _utc(t: datetime) -> datetime:
+    # Sin zona se interpreta como UTC; así start y end siempre son comparables
+    return t.replace(tzinfo=timezone.utc) if t.tzinfo is None else t.astimezone(timezone.utc)
+
+def get_router(predict_use_case, area_query_use_case=None, timeseries_use_case=None, region_use_case=None):
     router = APIRouter(tags=["Predicción"])
 
-    @router.post("/predict")
+    @router.post("/predict", response_class=ORJSONResponse)
     def predict(req: PredictRequest):
         try:
             pred = predict_use_case.execute(req.latitude, req.longitude)
-            return map_prediction_to_response(req.latitude, req.longitude, pred)
+            # Respuesta ya construida: se evita jsonable_encoder y se serializa con orjson
+            return ORJSONResponse(map_prediction_to_response(req.latitude, req.longitude, pred))
         except ValueError as ve:
             raise HTTPException(status_code=400, detail=str(ve))
         except Exception:
             raise HTTPException(status_code=500, detail="Error interno del servidor")
 
+    if area_query_use_case is not None:
+        @router.get("/area", tags=["Datos"])
+        def area(
+            product: str = Query(..., description="Producto del almacén (p. ej. no2_l3)"),
+            min_lon: float = Query(...), min_lat: float = Query(...),
+            max_lon: float = Query(...), max_lat: float = Query(...),
+            start: datetime = Query(..., description="Inicio (ISO 8601, UTC si no lleva zona)"),
+            end: datetime = Query(..., description="Fin exclusivo (ISO 8601)"),
+            columns: str | None = Query(None, description="Columnas separadas por comas"),
+            format: str = Query("arrow", pattern="^(arrow|ndjson)$"),
+        ):
+            """Todos los píxeles de un bbox y ventana de tiempo, transmitidos por lotes."""
+            try:
+                schema, batches = area_query_use_case.execute(
+                    product,
+                    BoundingBox(min_lon, min_lat, max_lon, max_lat),
+                    TimeWindow(_utc(start), _utc(end)),
+                    [c for c in columns.split(",") if c] if columns else None,
+                )
+            except ValueError as ve:
+                raise HTTPException(status_code=400, detail=str(ve))
+            if format == "ndjson":
+                return StreamingResponse(ndjson_chunks(batches), media_type=NDJSON_MEDIA_TYPE)
+            return StreamingResponse(arrow_ipc_chunks(schema, batches), media_type=ARROW_STREAM_MEDIA_TYPE)
+
+    if timeseries_use_case is not None:
+        @router.get("/timeseries", tags=["Datos"], response_class=ORJSONResponse)
+        def timeseries(
+            lat: float = Query(..., description="Latitud en grados decimales (-90 a 90)"),
+            lon: float = Query(..., description="Longitud en grados decimales (-180 a 180)"),
+            start: datetime = Query(..., description="Inicio (ISO 8601, UTC si no lleva zona)"),
+            end: datetime = Query(..., description="Fin exclusivo (ISO 8601)"),
+            product: str = Query("no2_l3", description="Producto indexado"),
+            resample: str = Query("raw", pattern="^(raw|hourly|daily)$"),
+            columns: str | None = Query(None, description="Columnas separadas por comas"),
+        ):
+            """Historia de la celda que contiene (lat, lon) como arrays columnares."""
+            try:
+                ts = timeseries_use_case.execute(
+                    product, lat, lon, TimeWindow(_utc(start), _utc(end)), resample,
+                    [c for c in columns.split(",") if c] if columns else None,
+                )
+            except ValueError as ve:
+                raise HTTPException(status_code=400, detail=str(ve))
+            return ORJSONResponse(map_timeseries_to_response(ts))
+
+    if region_use_case is not None:
+        @router.post("/region", response_class=ORJSONResponse)
+        def region(req: RegionRequest):
+            """AQI agregado de una región (bbox o polígono) sobre el snapshot de predicciones vigente."""
+            try:
+                if (req.bbox is None) == (req.geometry is None):
+                    raise ValueError("Indica exactamente uno de bbox o geometry.")
+                polygon = RegionPolygon.from_bbox(BoundingBox(*req.bbox)) if req.bbox else RegionPolygon.from_geojson(req.geometry)
+                result = region_use_case.execute(polygon)
+            except ValueError as ve:
+                raise HTTPException(status_code=400, detail=str(ve))
+            except LookupError as le:
+                raise HTTPException(status_code=503, detail=str(le))
+            return ORJSONResponse(map_region_to_response(result))
+
     return router
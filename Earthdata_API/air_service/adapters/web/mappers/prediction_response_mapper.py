@@ -1,4 +1,5 @@
 # air_service/adapters/web/mappers/prediction_response_mapper.py
+import time
 from datetime import datetime, timezone
 from air_service.domain.entities import AirQualityPrediction
 from air_service.domain.services.air_quality_classifier import (
@@ -6,6 +7,60 @@ from air_service.domain.services.air_quality_classifier import (
 )
 from air_service.domain.utils.units import mg_m3_to_ug_m3
 
+STATUS_TEXTS = {
+    "excellent": ("Atmospheric aerosol measurement", "Excellent visibility and atmospheric quality", "Ideal conditions for outdoor activities"),
+    "good":      ("Air quality generally acceptable", "Low risk", "Maintain adequate ventilation"),
+    "moderate":  ("May affect sensitive groups", "Mild respiratory irritation", "Avoid intense outdoor exercise if sensitive"),
+    "unhealthy": ("Unhealthy for sensitive groups", "Respiratory symptoms possible", "Limit outdoor activities"),
+    "very_unhealthy": ("Very unhealthy", "More noticeable symptoms", "Avoid outdoor activities"),
+    "hazardous": ("Hazardous", "Serious health risk", "Stay indoors with good filtration"),
+}
+
+OVERALL_DESC = {
+    "excellent":"Air quality is excellent for everyone",
+    "good":"Air quality is satisfactory for most people",
+    "moderate":"Air quality may be a concern for sensitive groups",
+    "unhealthy":"Unhealthy for sensitive groups",
+    "very_unhealthy":"Very unhealthy for everyone",
+    "hazardous":"Hazardous conditions"
+}
+
+_INDICATORS = (
+    # (parameter, unit, description)
+    ("NO2", "µg/m³", "Nitrogen Dioxide levels"),
+    ("Formaldehyde", "µg/m³", "Formaldehyde concentration"),
+    ("PM2.5", "µg/m³", "Fine particulate matter"),
+    ("Aerosol_Index", "AOD", "Atmospheric aerosol measurement"),
+)
+
+# Plantillas precalculadas: una por (indicador, estado) con el mismo orden de claves
+# que la respuesta; por petición solo se sustituye "value".
+INDICATOR_TEMPLATES = {
+    parameter: {
+        status: {
+            "parameter": parameter, "value": None, "unit": unit, "status": status,
+            "description": description, "health_impact": health_impact, "recommendation": recommendation,
+        }
+        for status, (_, health_impact, recommendation) in STATUS_TEXTS.items()
+    }
+    for parameter, unit, description in _INDICATORS
+}
+
+OVERALL_TEMPLATES = {
+    status: {"status": status, "aqi": overall_from_worst([status])[1], "description": desc}
+    for status, desc in OVERALL_DESC.items()
+}
+
+_ts_cache = (0, "")
+
+def _timestamp() -> str:
+    """Marca de tiempo ISO 8601 (UTC, precisión de segundos) recalculada una vez por segundo."""
+    global _ts_cache
+    now = int(time.time())
+    if _ts_cache[0] != now:
+        _ts_cache = (now, datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
+    return _ts_cache[1]
+
 def map_prediction_to_response(lat: float, lon: float, pred: AirQualityPrediction) -> dict:
     hcho_ug = mg_m3_to_ug_m3(pred.formaldehido)
 
@@ -14,50 +69,21 @@ def map_prediction_to_response(lat: float, lon: float, pred: AirQualityPredictio
     s_pm   = status_pm25(pred.material_particulado)      # tratado como PM2.5
     s_ai   = status_aerosol_index(pred.indice_aerosol)
 
-    status_texts = {
-        "excellent": ("Atmospheric aerosol measurement", "Excellent visibility and atmospheric quality", "Ideal conditions for outdoor activities"),
-        "good":      ("Air quality generally acceptable", "Low risk", "Maintain adequate ventilation"),
-        "moderate":  ("May affect sensitive groups", "Mild respiratory irritation", "Avoid intense outdoor exercise if sensitive"),
-        "unhealthy": ("Unhealthy for sensitive groups", "Respiratory symptoms possible", "Limit outdoor activities"),
-        "very_unhealthy": ("Very unhealthy", "More noticeable symptoms", "Avoid outdoor activities"),
-        "hazardous": ("Hazardous", "Serious health risk", "Stay indoors with good filtration"),
-    }
-    def texts(s): return status_texts.get(s, status_texts["moderate"])
-
-    _, hi_no2, rec_no2 = texts(s_no2)
-    _, hi_hcho, rec_hcho = texts(s_hcho)
-    _, hi_pm, rec_pm = texts(s_pm)
-    _, hi_ai, rec_ai = texts(s_ai)
-
-    ts = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-
     indicators = [
-        {"parameter":"NO2","value":round(pred.dioxido_nitrogeno,2),"unit":"µg/m³",
-         "status":s_no2,"description":"Nitrogen Dioxide levels","health_impact":hi_no2,"recommendation":rec_no2},
-        {"parameter":"Formaldehyde","value":round(hcho_ug,2),"unit":"µg/m³",
-         "status":s_hcho,"description":"Formaldehyde concentration","health_impact":hi_hcho,"recommendation":rec_hcho},
-        {"parameter":"PM2.5","value":round(pred.material_particulado,2),"unit":"µg/m³",
-         "status":s_pm,"description":"Fine particulate matter","health_impact":hi_pm,"recommendation":rec_pm},
-        {"parameter":"Aerosol_Index","value":round(pred.indice_aerosol,3),"unit":"AOD",
-         "status":s_ai,"description":"Atmospheric aerosol measurement","health_impact":hi_ai,"recommendation":rec_ai},
+        {**INDICATOR_TEMPLATES["NO2"][s_no2], "value": round(pred.dioxido_nitrogeno, 2)},
+        {**INDICATOR_TEMPLATES["Formaldehyde"][s_hcho], "value": round(hcho_ug, 2)},
+        {**INDICATOR_TEMPLATES["PM2.5"][s_pm], "value": round(pred.material_particulado, 2)},
+        {**INDICATOR_TEMPLATES["Aerosol_Index"][s_ai], "value": round(pred.indice_aerosol, 3)},
     ]
 
-    overall_status, aqi = overall_from_worst([s_no2, s_hcho, s_pm, s_ai])
-    overall_desc = {
-        "excellent":"Air quality is excellent for everyone",
-        "good":"Air quality is satisfactory for most people",
-        "moderate":"Air quality may be a concern for sensitive groups",
-        "unhealthy":"Unhealthy for sensitive groups",
-        "very_unhealthy":"Very unhealthy for everyone",
-        "hazardous":"Hazardous conditions"
-    }[overall_status]
+    overall_status, _ = overall_from_worst([s_no2, s_hcho, s_pm, s_ai])
 
     return {
         "success": True,
         "data": {
             "coordinates": {"latitude": lat, "longitude": lon},
-            "timestamp": ts,
+            "timestamp": _timestamp(),
             "air_quality_indicators": indicators,
-            "overall_assessment": {"status": overall_status, "aqi": aqi, "description": overall_desc}
+            "overall_assessment": OVERALL_TEMPLATES[overall_status],
         }
     }
@@ -0,0 +1,16 @@
+# air_service/adapters/web/mappers/region_response_mapper.py
+from dataclasses import asdict
+
+from air_service.domain.entities import RegionAirQuality
+
+def map_region_to_response(region: RegionAirQuality) -> dict:
+    return {
+        "success": True,
+        "data": {
+            "snapshot_version": region.version,
+            "cells": region.cells,
+            "cells_with_data": region.cells_with_data,
+            "pollutants": [asdict(p) for p in region.pollutants],
+            "overall_assessment": {"status": region.overall_status, "aqi": region.aqi},
+        }
+    }
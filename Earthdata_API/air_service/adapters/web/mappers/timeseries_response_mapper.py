@@ -0,0 +1,16 @@
+# air_service/adapters/web/mappers/timeseries_response_mapper.py
+from air_service.domain.entities import TimeSeries
+
+def map_timeseries_to_response(ts: TimeSeries) -> dict:
+    # Arrays columnares (no una lista de objetos): time en segundos epoch UTC
+    return {
+        "success": True,
+        "data": {
+            "product": ts.product,
+            "cell": {"latitude": ts.latitude, "longitude": ts.longitude},
+            "resample": ts.resample,
+            "count": len(ts.times),
+            "time": ts.times,
+            "values": ts.values,
+        }
+    }
@@ -0,0 +1,63 @@
+# air_service/adapters/web/streaming.py
+import json
+from typing import Iterable, Iterator
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class _ChunkSink:
+    """Destino de escritura que acumula los bytes hasta que el generador los entrega."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+def arrow_ipc_chunks(schema: pa.Schema, batches: Iterable[pa.RecordBatch]) -> Iterator[bytes]:
+    """Formato de stream IPC de Arrow: esquema, un mensaje por lote y fin de stream."""
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield sink.take()
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+
+def _json_values(col: pa.Array) -> list:
+    # NaN no es JSON válido: se emite como null
+    if pa.types.is_floating(col.type):
+        col = pc.if_else(pc.is_nan(col), pa.scalar(None, col.type), col)
+    # datetime no es serializable: segundos epoch, como el tiempo del esquema compacto
+    elif pa.types.is_timestamp(col.type):
+        col = pc.cast(col, pa.timestamp("s", col.type.tz), safe=False).cast(pa.int64())
+    return col.to_pylist()
+
+
+def ndjson_chunks(batches: Iterable[pa.RecordBatch]) -> Iterator[bytes]:
+    """Una línea JSON por píxel; un chunk HTTP por lote."""
+    for batch in batches:
+        names = batch.schema.names
+        columns = [_json_values(col) for col in batch.columns]
+        lines = [
+            json.dumps(dict(zip(names, row)), separators=(",", ":"))
+            for row in zip(*columns)
+        ]
+        yield ("\n".join(lines) + "\n").encode()
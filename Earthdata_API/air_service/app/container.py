@@ -1,9 +1,59 @@
-from air_service.domain.use_cases import PredictAirQualityUseCase
+import os
+
+from air_service.domain.use_cases import GetTimeSeriesUseCase, PredictAirQualityUseCase, RegionAirQualityUseCase, StreamAreaQueryUseCase
 from air_service.adapters.repositories.joblib_model_repository import JoblibModelRepository
+from air_service.adapters.repositories.cell_timeseries_index import CellTimeSeriesIndex
+from air_service.adapters.repositories.npy_raster_snapshot import NpyRasterSnapshotRepository
+from air_service.adapters.repositories.parquet_pixel_store import ParquetPixelStore
+from air_service.app.single_flight import CoalescingPredictUseCase
 from air_service.config.settings import Settings
 
 class Container:
     def __init__(self):
         self.settings = Settings()
+        self.timeseries_index = CellTimeSeriesIndex(self.settings.TIMESERIES_INDEX_PATH)
+        self.timeseries_use_case = GetTimeSeriesUseCase(self.timeseries_index)
         self.model_repo = JoblibModelRepository(self.settings.MODEL_PATH)
-        self.predict_use_case = PredictAirQualityUseCase(self.model_repo)
+        if self.settings.FORECAST_MODEL_PATH:
+            output_fields = [f for f in self.settings.FORECAST_OUTPUT_FIELDS.split(",") if f]
+            if not output_fields:
+                raise ValueError("FORECAST_MODEL_PATH requiere FORECAST_OUTPUT_FIELDS (campos que predice el modelo)")
+            # Import diferido: tensorflow solo hace falta si se sirve el LSTM
+            from air_service.adapters.repositories.lstm_forecast_repository import LstmForecastModelRepository
+
+            self.model_repo = LstmForecastModelRepository.from_files(
+                self.settings.FORECAST_MODEL_PATH,
+                self.settings.FORECAST_SCALER_X_PATH,
+                self.settings.FORECAST_SCALER_Y_PATH,
+                self.timeseries_index,
+                output_fields=output_fields,
+                fallback=self.model_repo,
+                max_batch_size=self.settings.FORECAST_MAX_BATCH_SIZE,
+                max_wait_ms=self.settings.FORECAST_MAX_WAIT_MS,
+            )
+        self.predict_use_case = CoalescingPredictUseCase(
+            PredictAirQualityUseCase(self.model_repo),
+            resolution=self.settings.GRID_RESOLUTION,
+            data_version=self.data_version,
+        )
+        self.pixel_store = ParquetPixelStore(self.settings.PIXEL_STORE_PATH)
+        self.area_query_use_case = StreamAreaQueryUseCase(self.pixel_store)
+        self.raster_snapshots = NpyRasterSnapshotRepository(self.settings.RASTER_SNAPSHOT_PATH)
+        self.region_use_case = RegionAirQualityUseCase(self.raster_snapshots)
+
+    def data_version(self):
+        """DATA_VERSION explícita + mtime del modelo: cambia al desplegar datos o modelo nuevos."""
+        try:
+            model_mtime = os.stat(self.settings.FORECAST_MODEL_PATH or self.settings.MODEL_PATH).st_mtime_ns
+        except OSError:
+            model_mtime = 0
+        return self.settings.DATA_VERSION, model_mtime
+
+    def metrics(self) -> dict:
+        metrics = {
+            "predict_single_flight": self.predict_use_case.metrics(),
+            "timeseries_cache": {"hits": self.timeseries_index.hits, "misses": self.timeseries_index.misses},
+        }
+        if hasattr(self.model_repo, "metrics"):
+            metrics["model_batching"] = self.model_repo.metrics()
+        return metrics
@@ -0,0 +1,125 @@
+# air_service/app/grid_inference.py
+import math
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from air_service.adapters.repositories.joblib_model_repository import JoblibModelRepository
+from air_service.adapters.repositories.npy_raster_snapshot import write_snapshot
+from air_service.domain.entities import AirQualityPrediction
+from air_service.domain.services.air_quality_classifier import AQI_MAP, STATUS_ORDER, severity_array
+from air_service.domain.services.region_aggregation import POLLUTANT_LAYERS
+
+PREDICTION_LAYERS = tuple(f.name for f in fields(AirQualityPrediction))
+# Capas derivadas: severidad del peor contaminante (0–5) y su AQI
+SEVERITY_LAYER = "severidad"
+AQI_LAYER = "aqi"
+# Cobertura de TEMPO (min_lat, min_lon, max_lat, max_lon)
+TEMPO_BOUNDS = (14.0, -167.0, 72.0, -13.0)
+
+_AQI_BY_SEVERITY = np.array([AQI_MAP[s] for s in STATUS_ORDER], dtype=np.float32)
+_worker_model: JoblibModelRepository | None = None
+
+
+def grid_shape(bounds: tuple[float, float, float, float], resolution: float) -> tuple[int, int]:
+    min_lat, min_lon, max_lat, max_lon = bounds
+    return int(round((max_lat - min_lat) / resolution)), int(round((max_lon - min_lon) / resolution))
+
+
+def _init_worker(model_path: str) -> None:
+    global _worker_model
+    _worker_model = JoblibModelRepository(model_path)
+
+
+def _layer_path(scratch: Path, name: str) -> Path:
+    return scratch / f"{name}.f32"
+
+
+def _predict_rows(args) -> int:
+    """Predice las filas [r0, r1) de la malla y las escribe en las capas de trabajo (memmap)."""
+    scratch, shape, lat0, lon0, resolution, r0, r1 = args
+    lat = lat0 + (np.arange(r0, r1) + 0.5) * resolution
+    lon = lon0 + (np.arange(shape[1]) + 0.5) * resolution
+    lat2d, lon2d = np.meshgrid(lat, lon, indexing="ij")
+    values = _worker_model.predict_many(lat2d, lon2d)
+
+    severity = np.zeros(lat2d.shape, dtype=np.int64)
+    for layer, _, _, kind, convert in POLLUTANT_LAYERS:
+        v = values[layer].astype(np.float64)
+        severity = np.maximum(severity, severity_array(kind, convert(v) if convert else v))
+    values[SEVERITY_LAYER] = severity.astype(np.float32)
+    values[AQI_LAYER] = _AQI_BY_SEVERITY[severity]
+
+    for name, v in values.items():
+        out = np.memmap(_layer_path(scratch, name), dtype=np.float32, mode="r+", shape=shape)
+        out[r0:r1] = v
+        out.flush()
+        del out
+    return (r1 - r0) * shape[1]
+
+
+def run_grid_inference(model_path: str, root: str | Path, bounds: tuple[float, float, float, float] = TEMPO_BOUNDS, resolution: float = 0.02, chunk_cells: int = 1_000_000, workers: int | None = None, version: str | None = None, keep: int = 3) -> dict:
+    """
+    Predice todas las celdas de ``bounds`` y publica el resultado como snapshot versionado.
+
+    La malla se reparte en bandas de filas de unas ``chunk_cells`` celdas; cada proceso
+    carga el modelo una vez y predice su banda con ``predict_many`` (vectorizado),
+    escribiendo directamente en capas float32 mapeadas en memoria, sin devolver arrays
+    al proceso principal. Al final ``write_snapshot`` publica las capas (una por campo
+    de AirQualityPrediction, más severidad y AQI) y cambia CURRENT de forma atómica.
+    """
+    root = Path(root)
+    min_lat, min_lon = bounds[0], bounds[1]
+    shape = grid_shape(bounds, resolution)
+    if shape[0] <= 0 or shape[1] <= 0:
+        raise ValueError(f"Límites vacíos: {bounds}")
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    workers = workers or os.cpu_count() or 1
+
+    scratch = root / f".{version}.scratch"
+    shutil.rmtree(scratch, ignore_errors=True)
+    scratch.mkdir(parents=True)
+    layers = (*PREDICTION_LAYERS, SEVERITY_LAYER, AQI_LAYER)
+    for name in layers:
+        np.memmap(_layer_path(scratch, name), dtype=np.float32, mode="w+", shape=shape).flush()
+
+    rows_per_chunk = max(1, chunk_cells // shape[1])
+    jobs = [(scratch, shape, min_lat, min_lon, resolution, r0, min(r0 + rows_per_chunk, shape[0])) for r0 in range(0, shape[0], rows_per_chunk)]
+    t0 = time.perf_counter()
+    try:
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+                cells = sum(pool.map(_predict_rows, jobs))
+        else:
+            _init_worker(model_path)
+            cells = sum(map(_predict_rows, jobs))
+        elapsed = time.perf_counter() - t0
+
+        arrays = {name: np.memmap(_layer_path(scratch, name), dtype=np.float32, mode="r", shape=shape) for name in layers}
+        extra = {
+            "model": os.path.basename(model_path),
+            "model_mtime_ns": os.stat(model_path).st_mtime_ns,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "inference_seconds": round(elapsed, 2),
+        }
+        path = write_snapshot(root, arrays, min_lat, min_lon, resolution, version=version, keep=keep, extra=extra)
+        del arrays
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    return {
+        "version": version,
+        "path": str(path),
+        "shape": list(shape),
+        "cells": cells,
+        "chunks": len(jobs),
+        "workers": workers,
+        "seconds": round(elapsed, 2),
+        "cells_per_second": round(cells / elapsed) if elapsed > 0 else math.inf,
+    }
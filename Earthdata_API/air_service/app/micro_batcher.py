@@ -0,0 +1,108 @@
+# air_service/app/micro_batcher.py
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Agrupa peticiones concurrentes en lotes para una sola pasada vectorizada.
+
+    Cada ``submit(x)`` encola una muestra y bloquea hasta tener su resultado. Un hilo
+    de trabajo toma la primera muestra en espera y sigue recogiendo hasta reunir
+    ``max_batch_size`` o hasta que pasan ``max_wait_ms`` desde que llegó la primera;
+    entonces llama a ``forward`` con las muestras apiladas (eje 0) y reparte las filas
+    del resultado. Con poca carga la latencia añadida es como mucho ``max_wait_ms``;
+    con mucha, los lotes se llenan antes.
+    """
+
+    def __init__(self, forward: Callable[[np.ndarray], np.ndarray], max_batch_size: int = 64, max_wait_ms: float = 5.0, name: str = "micro-batcher", window: int = 1024):
+        self._forward = forward
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._batch_sizes: deque = deque(maxlen=window)
+        self._forward_ms: deque = deque(maxlen=window)
+        self._latency_ms: deque = deque(maxlen=window)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, x: np.ndarray, timeout: float | None = 30.0) -> np.ndarray:
+        if self._closed.is_set():
+            raise RuntimeError("MicroBatcher cerrado")
+        future: Future = Future()
+        self._queue.put((np.asarray(x), future, time.perf_counter()))
+        return future.result(timeout=timeout)
+
+    def _collect(self) -> list:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._closed.is_set() or not self._queue.empty():
+            batch = self._collect()
+            if not batch:
+                continue
+            t0 = time.perf_counter()
+            try:
+                out = np.asarray(self._forward(np.stack([x for x, _, _ in batch])))
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            t1 = time.perf_counter()
+            for i, (_, future, _) in enumerate(batch):
+                future.set_result(out[i])
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._batch_sizes.append(len(batch))
+                self._forward_ms.append((t1 - t0) * 1000)
+                self._latency_ms.extend((t1 - enq) * 1000 for _, _, enq in batch)
+
+    def close(self) -> None:
+        self._closed.set()
+        self._thread.join(timeout=5)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            sizes = np.asarray(self._batch_sizes, dtype=np.float64)
+            fwd = np.asarray(self._forward_ms)
+            lat = np.asarray(self._latency_ms)
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "errors": self._errors,
+                "queue_depth": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batch_size_mean": round(float(sizes.mean()), 2) if sizes.size else 0.0,
+                "batch_size_max": int(sizes.max()) if sizes.size else 0,
+                "forward_ms_p50": round(float(np.percentile(fwd, 50)), 3) if fwd.size else 0.0,
+                "forward_ms_p95": round(float(np.percentile(fwd, 95)), 3) if fwd.size else 0.0,
+                "latency_ms_p50": round(float(np.percentile(lat, 50)), 3) if lat.size else 0.0,
+                "latency_ms_p95": round(float(np.percentile(lat, 95)), 3) if lat.size else 0.0,
+            }
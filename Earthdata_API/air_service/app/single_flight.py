@@ -0,0 +1,115 @@
+# air_service/app/single_flight.py
+import math
+import threading
+from typing import Any, Callable, Hashable
+
+from air_service.domain.entities import AirQualityPrediction
+from air_service.domain.use_cases import PredictAirQualityUseCase
+from air_service.domain.value_objects import Coordinates
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplica llamadas concurrentes con la misma clave: la primera (líder) ejecuta la
+    función y las demás esperan y reciben su mismo resultado (o excepción). No es una
+    caché: en cuanto termina la llamada, la clave se libera.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self.requests = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_waiters = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "coalesced_ratio": round(self.coalesced / self.requests, 4) if self.requests else 0.0,
+                "errors": self.errors,
+                "in_flight": len(self._calls),
+                "max_waiters": self.max_waiters,
+            }
+
+
+class CoalescingPredictUseCase:
+    """
+    Envuelve ``PredictAirQualityUseCase`` con single-flight.
+
+    La clave es la celda de la malla (``resolution`` grados) que contiene las coordenadas
+    y la versión de los datos/modelo (``data_version()``), así que peticiones simultáneas
+    para la misma ciudad comparten una sola ejecución del modelo, que se evalúa en el
+    centro de la celda.
+    """
+
+    def __init__(self, inner: PredictAirQualityUseCase, resolution: float = 0.02, data_version: Callable[[], Hashable] = lambda: None):
+        self._inner = inner
+        self._resolution = resolution
+        self._data_version = data_version
+        self._flight = SingleFlight()
+
+    def snap(self, lat: float, lon: float) -> tuple[int, int, float, float]:
+        """(fila, columna, lat del centro, lon del centro) de la celda que contiene el punto."""
+        r = self._resolution
+        row, col = math.floor((lat + 90.0) / r), math.floor((lon + 180.0) / r)
+        # El borde superior (90° / 180°) pertenece a la última celda
+        row = min(row, round(180.0 / r) - 1)
+        col = min(col, round(360.0 / r) - 1)
+        return row, col, round(-90.0 + (row + 0.5) * r, 6), round(-180.0 + (col + 0.5) * r, 6)
+
+    def execute(self, lat: float, lon: float) -> AirQualityPrediction:
+        Coordinates(lat, lon).validate()
+        row, col, c_lat, c_lon = self.snap(lat, lon)
+        key = (row, col, self._data_version())
+        return self._flight.do(key, lambda: self._inner.execute(c_lat, c_lon))
+
+    def metrics(self) -> dict:
+        return self._flight.metrics()
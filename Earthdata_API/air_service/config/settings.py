@@ -4,3 +4,17 @@ from pathlib import Path
 class Settings:
     BASE_DIR = Path(__file__).resolve().parents[2]
     MODEL_PATH: str = os.getenv("MODEL_PATH", str(BASE_DIR / "artifacts" / "air_model.joblib"))
+    PIXEL_STORE_PATH: str = os.getenv("PIXEL_STORE_PATH", str(BASE_DIR.parent / "tempo_parquet"))
+    TIMESERIES_INDEX_PATH: str = os.getenv("TIMESERIES_INDEX_PATH", str(BASE_DIR.parent / "tempo_index"))
+    DATA_VERSION: str = os.getenv("DATA_VERSION", "")
+    GRID_RESOLUTION: float = float(os.getenv("GRID_RESOLUTION", "0.02"))
+    RASTER_SNAPSHOT_PATH: str = os.getenv("RASTER_SNAPSHOT_PATH", str(BASE_DIR.parent / "tempo_snapshots"))
+    # Modelo LSTM de prediction_data.py (opcional; requiere tensorflow)
+    FORECAST_MODEL_PATH: str = os.getenv("FORECAST_MODEL_PATH", "")
+    FORECAST_SCALER_X_PATH: str = os.getenv("FORECAST_SCALER_X_PATH", str(BASE_DIR.parent / "scaler_X.joblib"))
+    FORECAST_SCALER_Y_PATH: str = os.getenv("FORECAST_SCALER_Y_PATH", str(BASE_DIR.parent / "scaler_y.joblib"))
+    # Obligatorio con FORECAST_MODEL_PATH: campos de AirQualityPrediction que produce cada
+    # salida del modelo, en orden y separados por comas (sin valor por defecto a propósito)
+    FORECAST_OUTPUT_FIELDS: str = os.getenv("FORECAST_OUTPUT_FIELDS", "")
+    FORECAST_MAX_BATCH_SIZE: int = int(os.getenv("FORECAST_MAX_BATCH_SIZE", "64"))
+    FORECAST_MAX_WAIT_MS: float = float(os.getenv("FORECAST_MAX_WAIT_MS", "5"))
@@ -6,3 +6,44 @@ class AirQualityPrediction:
     formaldehido: float
     indice_aerosol: float
     material_particulado: float
+
+@dataclass
+class TimeSeries:
+    product: str
+    latitude: float
+    longitude: float
+    resample: str
+    times: list[int]                    # segundos epoch (UTC)
+    values: dict[str, list[float]]      # una lista por variable, alineada con times
+
+@dataclass
+class RasterSnapshot:
+    """Malla regular de predicciones: fila 0 = lat0 (sur), columna 0 = lon0 (oeste)."""
+    version: str
+    lat0: float
+    lon0: float
+    resolution: float
+    layers: dict                        # nombre del campo de AirQualityPrediction -> array 2-D (NaN sin dato)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return next(iter(self.layers.values())).shape
+
+@dataclass
+class PollutantStats:
+    parameter: str
+    unit: str
+    mean: float | None
+    percentiles: dict[str, float | None]
+    max: float | None
+    worst_status: str | None
+    status_counts: dict[str, int]
+
+@dataclass
+class RegionAirQuality:
+    version: str
+    cells: int                          # celdas cubiertas por la región
+    cells_with_data: int
+    pollutants: list[PollutantStats]
+    overall_status: str | None
+    aqi: int | None
@@ -1,8 +1,29 @@
 from abc import ABC, abstractmethod
-from .value_objects import Coordinates
-from .entities import AirQualityPrediction
+from typing import Iterator, Sequence
+
+from .value_objects import BoundingBox, Coordinates, TimeWindow
+from .entities import AirQualityPrediction, RasterSnapshot, TimeSeries
 
 class AirQualityModelPort(ABC):
     @abstractmethod
     def predict(self, coords: Coordinates) -> AirQualityPrediction:
         """Devuelve una predicción para las coordenadas."""
+
+class PixelStorePort(ABC):
+    @abstractmethod
+    def schema(self, product: str, columns: Sequence[str] | None = None):
+        """Esquema Arrow de los lotes que devolverá ``scan`` (ValueError si el producto no existe)."""
+
+    @abstractmethod
+    def scan(self, product: str, bbox: BoundingBox, window: TimeWindow, columns: Sequence[str] | None = None) -> Iterator:
+        """Itera lotes Arrow con los píxeles del producto dentro de bbox y ventana de tiempo."""
+
+class TimeSeriesIndexPort(ABC):
+    @abstractmethod
+    def series(self, product: str, coords: Coordinates, window: TimeWindow, resample: str = "raw", columns: Sequence[str] | None = None) -> TimeSeries:
+        """Serie temporal de la celda que contiene las coordenadas (ValueError si el producto no existe)."""
+
+class RasterSnapshotPort(ABC):
+    @abstractmethod
+    def current(self) -> RasterSnapshot:
+        """Snapshot vigente de la malla de predicciones (LookupError si no hay ninguno)."""
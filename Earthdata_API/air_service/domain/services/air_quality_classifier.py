@@ -1,3 +1,5 @@
+import numpy as np
+
 def status_no2(v):
     if v < 20: return "excellent"
     if v < 40: return "good"
@@ -30,8 +32,23 @@ def status_aerosol_index(v):
     if v < 1.5: return "very_unhealthy"
     return "hazardous"
 
+SEVERITY = {"excellent":0,"good":1,"moderate":2,"unhealthy":3,"very_unhealthy":4,"hazardous":5}
+AQI_MAP = {"excellent":25,"good":50,"moderate":100,"unhealthy":150,"very_unhealthy":200,"hazardous":300}
+
 def overall_from_worst(statuses):
-    order = ["excellent","good","moderate","unhealthy","very_unhealthy","hazardous"]
-    worst = max(statuses, key=lambda s: order.index(s))
-    aqi_map = {"excellent":25,"good":50,"moderate":100,"unhealthy":150,"very_unhealthy":200,"hazardous":300}
-    return worst, aqi_map[worst]
+    worst = max(statuses, key=SEVERITY.__getitem__)
+    return worst, AQI_MAP[worst]
+
+
+# Mismos umbrales que las funciones status_* en forma de tabla, para clasificar arrays
+STATUS_ORDER = ("excellent","good","moderate","unhealthy","very_unhealthy","hazardous")
+THRESHOLDS = {
+    "no2": (20, 40, 100, 200, 400),
+    "hcho_ugm3": (10, 30, 60, 100, 200),
+    "pm25": (5, 12, 35, 55, 150),
+    "aerosol_index": (0.1, 0.3, 0.7, 1.0, 1.5),
+}
+
+def severity_array(kind, values):
+    """Índice de severidad (0=excellent … 5=hazardous) de cada valor de un array numpy."""
+    return np.searchsorted(np.asarray(THRESHOLDS[kind], dtype=np.float64), values, side="right")
@@ -0,0 +1,76 @@
+import numpy as np
+
+from air_service.domain.entities import PollutantStats
+from air_service.domain.services.air_quality_classifier import STATUS_ORDER, severity_array
+from air_service.domain.utils.units import mg_m3_to_ug_m3
+from air_service.domain.value_objects import RegionPolygon
+
+# (capa del snapshot, parámetro, unidad, tabla de umbrales, conversión)
+POLLUTANT_LAYERS = (
+    ("dioxido_nitrogeno", "NO2", "µg/m³", "no2", None),
+    ("formaldehido", "Formaldehyde", "µg/m³", "hcho_ugm3", mg_m3_to_ug_m3),
+    ("material_particulado", "PM2.5", "µg/m³", "pm25", None),
+    ("indice_aerosol", "Aerosol_Index", "AOD", "aerosol_index", None),
+)
+
+
+def rasterize_polygon(polygon: RegionPolygon, lat0: float, lon0: float, resolution: float, shape: tuple[int, int]):
+    """
+    Celdas de la malla cuyo centro cae dentro del polígono (regla par-impar).
+
+    Retorna ((fila0, fila1, col0, col1), máscara booleana de la ventana). Por cada fila
+    se calculan de una vez los cruces con todas las aristas y se rellena entre pares,
+    así el coste es filas × aristas + celdas. Una región más pequeña que una celda
+    cubre la celda de su centro.
+    """
+    nrows, ncols = shape
+    b = polygon.bounds()
+    r0 = max(0, int(np.floor((b.min_lat - lat0) / resolution)))
+    r1 = min(nrows, int(np.floor((b.max_lat - lat0) / resolution)) + 1)
+    c0 = max(0, int(np.floor((b.min_lon - lon0) / resolution)))
+    c1 = min(ncols, int(np.floor((b.max_lon - lon0) / resolution)) + 1)
+    if r0 >= r1 or c0 >= c1:
+        return (0, 0, 0, 0), np.zeros((0, 0), dtype=bool)
+
+    lat_c = lat0 + (np.arange(r0, r1) + 0.5) * resolution
+    lon_c = lon0 + (np.arange(c0, c1) + 0.5) * resolution
+
+    starts = np.concatenate([np.asarray(r, dtype=np.float64) for r in polygon.rings])
+    ends = np.concatenate([np.roll(np.asarray(r, dtype=np.float64), -1, axis=0) for r in polygon.rings])
+    x1, y1, x2, y2 = starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]
+
+    py = lat_c[:, None]
+    crosses = (y1 > py) != (y2 > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xint = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+
+    mask = np.zeros((r1 - r0, c1 - c0), dtype=bool)
+    for i in range(r1 - r0):
+        xs = np.sort(xint[i, crosses[i]])
+        if xs.size:
+            mask[i] = np.searchsorted(xs, lon_c, side="right") % 2 == 1
+
+    if not mask.any():
+        row = min(max(int(np.floor(((b.min_lat + b.max_lat) / 2 - lat0) / resolution)), r0), r1 - 1)
+        col = min(max(int(np.floor(((b.min_lon + b.max_lon) / 2 - lon0) / resolution)), c0), c1 - 1)
+        mask[row - r0, col - c0] = True
+    return (r0, r1, c0, c1), mask
+
+
+def pollutant_stats(values: np.ndarray, parameter: str, unit: str, kind: str, percentiles: tuple[float, ...]) -> PollutantStats:
+    """Media, percentiles, máximo y estado peor/distribución de estados de las celdas con dato."""
+    values = values[~np.isnan(values)].astype(np.float64, copy=False)
+    if values.size == 0:
+        return PollutantStats(parameter, unit, None, {f"p{p:g}": None for p in percentiles}, None, None, {s: 0 for s in STATUS_ORDER})
+    severity = severity_array(kind, values)
+    counts = np.bincount(severity, minlength=len(STATUS_ORDER))
+    pct = np.percentile(values, percentiles)
+    return PollutantStats(
+        parameter=parameter,
+        unit=unit,
+        mean=round(float(values.mean()), 3),
+        percentiles={f"p{p:g}": round(float(v), 3) for p, v in zip(percentiles, pct)},
+        max=round(float(values.max()), 3),
+        worst_status=STATUS_ORDER[int(severity.max())],
+        status_counts={s: int(c) for s, c in zip(STATUS_ORDER, counts)},
+    )
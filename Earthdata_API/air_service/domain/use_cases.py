@@ -1,6 +1,12 @@
-from .value_objects import Coordinates
-from .entities import AirQualityPrediction
-from .ports import AirQualityModelPort
+import threading
+from collections import OrderedDict
+from typing import Iterator, Sequence
+
+from .value_objects import BoundingBox, Coordinates, RegionPolygon, TimeWindow
+from .entities import AirQualityPrediction, RegionAirQuality, TimeSeries
+from .ports import AirQualityModelPort, PixelStorePort, RasterSnapshotPort, TimeSeriesIndexPort
+from .services.air_quality_classifier import overall_from_worst
+from .services.region_aggregation import POLLUTANT_LAYERS, pollutant_stats, rasterize_polygon
 
 class PredictAirQualityUseCase:
     def __init__(self, model_port: AirQualityModelPort):
@@ -10,3 +16,83 @@ class PredictAirQualityUseCase:
         coords = Coordinates(lat, lon)
         coords.validate()
         return self._model.predict(coords)
+
+class StreamAreaQueryUseCase:
+    def __init__(self, store_port: PixelStorePort):
+        self._store = store_port
+
+    def execute(self, product: str, bbox: BoundingBox, window: TimeWindow, columns: Sequence[str] | None = None) -> tuple[object, Iterator]:
+        """
+        Valida la consulta y devuelve (esquema, iterador de lotes).
+
+        La validación ocurre antes de empezar a transmitir, así los errores
+        pueden responderse con un 400 en lugar de cortar el stream.
+        """
+        bbox.validate()
+        window.validate()
+        schema = self._store.schema(product, columns)
+        return schema, self._store.scan(product, bbox, window, columns)
+
+class GetTimeSeriesUseCase:
+    RESAMPLE_OPTIONS = ("raw", "hourly", "daily")
+
+    def __init__(self, index_port: TimeSeriesIndexPort):
+        self._index = index_port
+
+    def execute(self, product: str, lat: float, lon: float, window: TimeWindow, resample: str = "raw", columns: Sequence[str] | None = None) -> TimeSeries:
+        coords = Coordinates(lat, lon)
+        coords.validate()
+        window.validate()
+        if resample not in self.RESAMPLE_OPTIONS:
+            raise ValueError(f"resample debe ser uno de {', '.join(self.RESAMPLE_OPTIONS)}")
+        return self._index.series(product, coords, window, resample, columns)
+
+class RegionAirQualityUseCase:
+    def __init__(self, raster_port: RasterSnapshotPort, percentiles: Sequence[float] = (50, 90, 95), mask_cache_size: int = 256):
+        self._raster = raster_port
+        self._percentiles = tuple(percentiles)
+        self._masks: OrderedDict = OrderedDict()
+        self._mask_cache_size = mask_cache_size
+        self._lock = threading.Lock()
+
+    def _mask(self, region: RegionPolygon, snapshot):
+        # La máscara depende solo de la geometría y de la malla, no de los valores:
+        # sobrevive a los snapshots nuevos mientras la malla no cambie.
+        key = (region.rings, snapshot.lat0, snapshot.lon0, snapshot.resolution, snapshot.shape)
+        with self._lock:
+            cached = self._masks.get(key)
+            if cached is not None:
+                self._masks.move_to_end(key)
+                return cached
+        cached = rasterize_polygon(region, snapshot.lat0, snapshot.lon0, snapshot.resolution, snapshot.shape)
+        with self._lock:
+            self._masks[key] = cached
+            if len(self._masks) > self._mask_cache_size:
+                self._masks.popitem(last=False)
+        return cached
+
+    def execute(self, region: RegionPolygon) -> RegionAirQuality:
+        region.validate()
+        snapshot = self._raster.current()
+        (r0, r1, c0, c1), mask = self._mask(region, snapshot)
+
+        pollutants = []
+        with_data = None
+        for layer, parameter, unit, kind, convert in POLLUTANT_LAYERS:
+            values = snapshot.layers[layer][r0:r1, c0:c1][mask]
+            if convert is not None:
+                values = convert(values)
+            valid = int((values == values).sum())
+            with_data = valid if with_data is None else max(with_data, valid)
+            pollutants.append(pollutant_stats(values, parameter, unit, kind, self._percentiles))
+
+        worst = [p.worst_status for p in pollutants if p.worst_status is not None]
+        overall_status, aqi = overall_from_worst(worst) if worst else (None, None)
+        return RegionAirQuality(
+            version=snapshot.version,
+            cells=int(mask.sum()),
+            cells_with_data=with_data or 0,
+            pollutants=pollutants,
+            overall_status=overall_status,
+            aqi=aqi,
+        )
@@ -1,3 +1,4 @@
+from datetime import datetime
 from dataclasses import dataclass
 
 @dataclass(frozen=True)
@@ -8,3 +9,70 @@ class Coordinates:
     def validate(self) -> None:
         if not (-90.0 <= self.lat <= 90.0 and -180.0 <= self.lon <= 180.0):
             raise ValueError("Coordenadas inválidas (Fuera de rango).")
+
+
+@dataclass(frozen=True)
+class BoundingBox:
+    min_lon: float
+    min_lat: float
+    max_lon: float
+    max_lat: float
+
+    def validate(self) -> None:
+        if not (-90.0 <= self.min_lat <= self.max_lat <= 90.0 and -180.0 <= self.min_lon <= self.max_lon <= 180.0):
+            raise ValueError("Bounding box inválido (fuera de rango o límites invertidos).")
+
+
+@dataclass(frozen=True)
+class TimeWindow:
+    start: datetime
+    end: datetime
+
+    def validate(self) -> None:
+        if self.end <= self.start:
+            raise ValueError("Ventana de tiempo inválida (end debe ser posterior a start).")
+
+
+@dataclass(frozen=True)
+class RegionPolygon:
+    """Anillos (lon, lat) de un Polygon/MultiPolygon GeoJSON; los huecos se resuelven con la regla par-impar."""
+    rings: tuple[tuple[tuple[float, float], ...], ...]
+
+    def validate(self) -> None:
+        if not self.rings or any(len(r) < 3 for r in self.rings):
+            raise ValueError("Polígono inválido (cada anillo necesita al menos 3 vértices).")
+        for ring in self.rings:
+            for lon, lat in ring:
+                if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+                    raise ValueError("Polígono inválido (vértices fuera de rango).")
+
+    def bounds(self) -> BoundingBox:
+        lons = [p[0] for r in self.rings for p in r]
+        lats = [p[1] for r in self.rings for p in r]
+        return BoundingBox(min(lons), min(lats), max(lons), max(lats))
+
+    @classmethod
+    def from_bbox(cls, bbox: BoundingBox) -> "RegionPolygon":
+        return cls(((
+            (bbox.min_lon, bbox.min_lat), (bbox.max_lon, bbox.min_lat),
+            (bbox.max_lon, bbox.max_lat), (bbox.min_lon, bbox.max_lat),
+        ),))
+
+    @classmethod
+    def from_geojson(cls, geometry: dict) -> "RegionPolygon":
+        if geometry.get("type") == "Feature":
+            geometry = geometry.get("geometry") or {}
+        kind, coords = geometry.get("type"), geometry.get("coordinates")
+        if kind == "Polygon":
+            polygons = [coords]
+        elif kind == "MultiPolygon":
+            polygons = coords
+        else:
+            raise ValueError("Se esperaba una geometría GeoJSON Polygon o MultiPolygon.")
+        try:
+            return cls(tuple(
+                tuple((float(p[0]), float(p[1])) for p in ring)
+                for polygon in polygons for ring in polygon
+            ))
+        except (TypeError, IndexError, ValueError):
+            raise ValueError("Coordenadas GeoJSON inválidas.")
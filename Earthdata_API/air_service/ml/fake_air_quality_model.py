@@ -16,3 +16,22 @@ class AirQualityModel:
             "Indice_de_aerosol": round(ai, 3),
             "Material_particulado": round(pm, 2),
         }
+
+    def predict_batch(self, lat, lon) -> dict:
+        """Igual que ``predict`` para arrays de coordenadas (ruido independiente por punto)."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        base = np.sin(lat) + np.cos(lon)
+        rng = np.random.default_rng()
+
+        dn = np.abs(base * 25 + rng.uniform(10, 50, base.shape))
+        hcho = np.abs(base * 0.005 + rng.uniform(0.002, 0.02, base.shape))
+        ai = np.abs(base * 0.3 + rng.uniform(0.5, 1.2, base.shape))
+        pm = np.abs(base * 20 + rng.uniform(5, 60, base.shape))
+
+        return {
+            "Dioxido_de_nitrogeno": np.round(dn, 2),
+            "Formaldehido": np.round(hcho, 4),
+            "Indice_de_aerosol": np.round(ai, 3),
+            "Material_particulado": np.round(pm, 2),
+        }
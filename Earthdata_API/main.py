@@ -1,12 +1,17 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from air_service.app.container import Container
 from air_service.adapters.web.api import get_router
 
 container = Container()
 
-app = FastAPI(title="Air Service", version="1.0")
-app.include_router(get_router(container.predict_use_case), prefix="/api")
+app = FastAPI(title="Air Service", version="1.0", default_response_class=ORJSONResponse)
+app.include_router(get_router(container.predict_use_case, container.area_query_use_case, container.timeseries_use_case, container.region_use_case), prefix="/api")
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/metrics")
+def metrics():
+    return container.metrics()
@@ -0,0 +1,136 @@
+"""
+Microbenchmark del renderizado de /api/predict: construcción de la respuesta + serialización.
+
+- antes: mapper original (diccionarios reconstruidos y datetime.now().isoformat() en cada
+  llamada) + jsonable_encoder de FastAPI (si está instalado) + JSONResponse (json estándar)
+- después: plantillas precalculadas + ORJSONResponse (orjson)
+
+    python3 -m scripts.bench_prediction_render --n 100000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+import orjson
+
+from air_service.adapters.web.mappers.prediction_response_mapper import map_prediction_to_response
+from air_service.domain.entities import AirQualityPrediction
+from air_service.domain.services.air_quality_classifier import (
+    status_no2, status_hcho_ugm3, status_pm25, status_aerosol_index
+)
+from air_service.domain.utils.units import mg_m3_to_ug_m3
+
+try:
+    from fastapi.encoders import jsonable_encoder
+except ImportError:
+    jsonable_encoder = None
+
+
+def legacy_map_prediction_to_response(lat, lon, pred):
+    """Copia del mapper anterior, como referencia del "antes"."""
+    hcho_ug = mg_m3_to_ug_m3(pred.formaldehido)
+    s_no2 = status_no2(pred.dioxido_nitrogeno)
+    s_hcho = status_hcho_ugm3(hcho_ug)
+    s_pm = status_pm25(pred.material_particulado)
+    s_ai = status_aerosol_index(pred.indice_aerosol)
+    status_texts = {
+        "excellent": ("Atmospheric aerosol measurement", "Excellent visibility and atmospheric quality", "Ideal conditions for outdoor activities"),
+        "good": ("Air quality generally acceptable", "Low risk", "Maintain adequate ventilation"),
+        "moderate": ("May affect sensitive groups", "Mild respiratory irritation", "Avoid intense outdoor exercise if sensitive"),
+        "unhealthy": ("Unhealthy for sensitive groups", "Respiratory symptoms possible", "Limit outdoor activities"),
+        "very_unhealthy": ("Very unhealthy", "More noticeable symptoms", "Avoid outdoor activities"),
+        "hazardous": ("Hazardous", "Serious health risk", "Stay indoors with good filtration"),
+    }
+    def texts(s): return status_texts.get(s, status_texts["moderate"])
+    _, hi_no2, rec_no2 = texts(s_no2)
+    _, hi_hcho, rec_hcho = texts(s_hcho)
+    _, hi_pm, rec_pm = texts(s_pm)
+    _, hi_ai, rec_ai = texts(s_ai)
+    ts = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    indicators = [
+        {"parameter": "NO2", "value": round(pred.dioxido_nitrogeno, 2), "unit": "µg/m³",
+         "status": s_no2, "description": "Nitrogen Dioxide levels", "health_impact": hi_no2, "recommendation": rec_no2},
+        {"parameter": "Formaldehyde", "value": round(hcho_ug, 2), "unit": "µg/m³",
+         "status": s_hcho, "description": "Formaldehyde concentration", "health_impact": hi_hcho, "recommendation": rec_hcho},
+        {"parameter": "PM2.5", "value": round(pred.material_particulado, 2), "unit": "µg/m³",
+         "status": s_pm, "description": "Fine particulate matter", "health_impact": hi_pm, "recommendation": rec_pm},
+        {"parameter": "Aerosol_Index", "value": round(pred.indice_aerosol, 3), "unit": "AOD",
+         "status": s_ai, "description": "Atmospheric aerosol measurement", "health_impact": hi_ai, "recommendation": rec_ai},
+    ]
+    statuses = [s_no2, s_hcho, s_pm, s_ai]
+    order = ["excellent", "good", "moderate", "unhealthy", "very_unhealthy", "hazardous"]
+    overall_status = max(statuses, key=lambda s: order.index(s))
+    aqi = {"excellent": 25, "good": 50, "moderate": 100, "unhealthy": 150, "very_unhealthy": 200, "hazardous": 300}[overall_status]
+    overall_desc = {
+        "excellent": "Air quality is excellent for everyone",
+        "good": "Air quality is satisfactory for most people",
+        "moderate": "Air quality may be a concern for sensitive groups",
+        "unhealthy": "Unhealthy for sensitive groups",
+        "very_unhealthy": "Very unhealthy for everyone",
+        "hazardous": "Hazardous conditions",
+    }[overall_status]
+    return {
+        "success": True,
+        "data": {
+            "coordinates": {"latitude": lat, "longitude": lon},
+            "timestamp": ts,
+            "air_quality_indicators": indicators,
+            "overall_assessment": {"status": overall_status, "aqi": aqi, "description": overall_desc},
+        },
+    }
+
+
+def render_before(lat, lon, pred) -> bytes:
+    content = legacy_map_prediction_to_response(lat, lon, pred)
+    if jsonable_encoder is not None:
+        content = jsonable_encoder(content)
+    # Igual que starlette.responses.JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def render_after(lat, lon, pred) -> bytes:
+    # Igual que fastapi.responses.ORJSONResponse.render
+    return orjson.dumps(map_prediction_to_response(lat, lon, pred), option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _inputs(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        (rng.uniform(-60, 60), rng.uniform(-170, 170), AirQualityPrediction(
+            dioxido_nitrogeno=rng.uniform(5, 300), formaldehido=rng.uniform(0.001, 0.2),
+            indice_aerosol=rng.uniform(0, 2), material_particulado=rng.uniform(1, 200)))
+        for _ in range(n)
+    ]
+
+
+def bench(fn, inputs, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for lat, lon, pred in inputs:
+            fn(lat, lon, pred)
+        best = min(best, time.perf_counter() - t0)
+    return len(inputs) / best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del renderizado de /api/predict")
+    parser.add_argument("--n", type=int, default=50_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    inputs = _inputs(args.n)
+    before = orjson.loads(render_before(*inputs[0]))
+    after = orjson.loads(render_after(*inputs[0]))
+    for resp in (before, after):
+        resp["data"].pop("timestamp")
+    assert before == after, "La respuesta renderizada cambió"
+
+    rps_before = bench(render_before, inputs, args.repeats)
+    rps_after = bench(render_after, inputs, args.repeats)
+    encoder = "jsonable_encoder + json" if jsonable_encoder is not None else "json"
+    print(f"antes   ({encoder}): {rps_before:>12,.0f} respuestas/s")
+    print(f"después (plantillas + orjson): {rps_after:>12,.0f} respuestas/s")
+    print(f"⚡ x{rps_after / rps_before:.1f}")
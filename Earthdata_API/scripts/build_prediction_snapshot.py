@@ -0,0 +1,20 @@
+import argparse
+
+from air_service.app.grid_inference import TEMPO_BOUNDS, run_grid_inference
+from air_service.config.settings import Settings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predice toda la malla con el modelo y publica un snapshot para /api/region")
+    parser.add_argument("--model", default=Settings.MODEL_PATH)
+    parser.add_argument("--out", default=Settings.RASTER_SNAPSHOT_PATH)
+    parser.add_argument("--bbox", nargs=4, type=float, metavar=("MIN_LAT", "MIN_LON", "MAX_LAT", "MAX_LON"), default=TEMPO_BOUNDS)
+    parser.add_argument("--resolution", type=float, default=Settings.GRID_RESOLUTION)
+    parser.add_argument("--chunk-cells", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--version", default=None, help="nombre de la versión (por defecto la hora UTC)")
+    parser.add_argument("--keep", type=int, default=3)
+    args = parser.parse_args()
+
+    report = run_grid_inference(args.model, args.out, tuple(args.bbox), args.resolution, args.chunk_cells, args.workers, args.version, args.keep)
+    print(f"✅ Snapshot {report['version']}: {report['cells']:,} celdas {tuple(report['shape'])} en {report['seconds']} s "
+          f"({report['cells_per_second']:,} celdas/s, {report['workers']} procesos) → {report['path']}")
@@ -0,0 +1,16 @@
+import argparse
+
+from air_service.adapters.repositories.cell_timeseries_index import DEFAULT_RESOLUTION, build_cell_index
+from air_service.config.settings import Settings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construye el índice por celda para /api/timeseries")
+    parser.add_argument("products", nargs="+", help="productos del almacén particionado (p. ej. no2_l3)")
+    parser.add_argument("--store", default=Settings.PIXEL_STORE_PATH)
+    parser.add_argument("--out", default=Settings.TIMESERIES_INDEX_PATH)
+    parser.add_argument("--resolution", type=float, default=DEFAULT_RESOLUTION)
+    args = parser.parse_args()
+
+    for product in args.products:
+        build_cell_index(f"{args.store}/{product}", f"{args.out}/{product}", resolution=args.resolution)
+    print(f"✅ Índices guardados en {args.out}")
@@ -0,0 +1,93 @@
+"""Endpoints de la API (Earthdata_API) con TestClient sobre datos sintéticos: peticiones/s y MB/s."""
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from conftest import ROOT, run_benchmark
+
+pytest.importorskip("fastapi")
+pytest.importorskip("joblib")
+
+BBOX = (-105.0, 35.0, -100.0, 40.0)  # min_lon, min_lat, max_lon, max_lat, dentro de l3_files
+N_REQUESTS = 200
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory, pixel_parquet):
+    from fastapi.testclient import TestClient
+
+    from air_service.adapters.repositories.cell_timeseries_index import build_cell_index
+    from air_service.app.grid_inference import run_grid_inference
+    from air_service.config.settings import Settings
+
+    api = ROOT / "Earthdata_API"
+    index = tmp_path_factory.mktemp("tempo_index")
+    build_cell_index(pixel_parquet / "no2_l3", index / "no2_l3")
+    snapshots = tmp_path_factory.mktemp("tempo_snapshots")
+    model = str(api / "artifacts" / "air_model.joblib")
+    run_grid_inference(model, snapshots, bounds=(30.0, -111.0, 50.0, -91.0), workers=1)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(Settings, "MODEL_PATH", model)
+        mp.setattr(Settings, "PIXEL_STORE_PATH", str(pixel_parquet))
+        mp.setattr(Settings, "TIMESERIES_INDEX_PATH", str(index))
+        mp.setattr(Settings, "RASTER_SNAPSHOT_PATH", str(snapshots))
+        # Earthdata_API/main.py, cargado con otro nombre para no chocar con main.py de la raíz
+        spec = importlib.util.spec_from_file_location("air_service_main", api / "main.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        with TestClient(module.app) as c:
+            yield c
+
+
+def _points(n: int, seed: int = 0) -> list[tuple[float, float]]:
+    rng = np.random.default_rng(seed)
+    return list(zip(rng.uniform(BBOX[1], BBOX[3], n).tolist(), rng.uniform(BBOX[0], BBOX[2], n).tolist()))
+
+
+def test_predict(benchmark, client):
+    points = _points(N_REQUESTS)
+
+    def requests():
+        for lat, lon in points:
+            client.post("/api/predict", json={"latitude": lat, "longitude": lon}).raise_for_status()
+
+    run_benchmark(benchmark, requests, rows=N_REQUESTS)
+
+
+def test_timeseries(benchmark, client):
+    points = _points(N_REQUESTS, seed=1)
+
+    def requests():
+        for lat, lon in points:
+            client.get("/api/timeseries", params={
+                "lat": lat, "lon": lon, "start": "2025-10-04T00:00:00", "end": "2025-10-05T00:00:00", "product": "no2_l3",
+            }).raise_for_status()
+
+    run_benchmark(benchmark, requests, rows=N_REQUESTS)
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "ndjson"])
+def test_area(benchmark, client, fmt):
+    min_lon, min_lat, max_lon, max_lat = BBOX
+    params = {
+        "product": "no2_l3", "min_lon": min_lon, "min_lat": min_lat, "max_lon": max_lon, "max_lat": max_lat,
+        "start": "2025-10-04T00:00:00", "end": "2025-10-05T00:00:00", "format": fmt,
+    }
+
+    def request():
+        response = client.get("/api/area", params=params)
+        response.raise_for_status()
+        return response.content
+
+    run_benchmark(benchmark, request, nbytes=len, rounds=5)
+
+
+def test_region(benchmark, client):
+    def requests():
+        for _ in range(50):
+            client.post("/api/region", json={"bbox": list(BBOX)}).raise_for_status()
+
+    run_benchmark(benchmark, requests, rows=50)
@@ -0,0 +1,32 @@
+"""Conversión NetCDF → Parquet: process_tempo_data (L3) y procesar_nc_a_parquet (L2)."""
+import pyarrow.parquet as pq
+import pytest
+
+from conftest import nbytes, run_benchmark
+
+
+def _rows(path) -> int:
+    return pq.read_metadata(path).num_rows
+
+
+@pytest.mark.parametrize("method", ["mask", "xarray"])
+def test_process_tempo_data(benchmark, tmp_path, l3_files, method):
+    from convert_nc_to_parquet import process_tempo_data
+
+    run_benchmark(
+        benchmark, process_tempo_data, str(l3_files[0].parent), str(tmp_path), method=method,
+        rows=_rows, nbytes=nbytes(l3_files), rounds=3,
+    )
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_procesar_nc_a_parquet(benchmark, hcho_l2_files, compact):
+    from earthdataHCHO import procesar_nc_a_parquet
+
+    folder = hcho_l2_files[0].parent
+    run_benchmark(
+        benchmark, procesar_nc_a_parquet, str(folder.parent), folder.name,
+        ["geolocation/latitude", "geolocation/longitude", "geolocation/time", "product/vertical_column"],
+        nombre_resultado="HCHO", unidades_resultado="molecules/cm^2", output_name=f"hcho_{compact}.parquet", compact=compact,
+        rows=_rows, nbytes=nbytes(hcho_l2_files), rounds=3,
+    )
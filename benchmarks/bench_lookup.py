@@ -0,0 +1,66 @@
+"""Consultas de serie temporal en un punto: PixelStore, CellTimeSeriesIndex y el cubo Zarr."""
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from conftest import run_benchmark
+
+N_POINTS = 1000
+
+
+@pytest.fixture(scope="module")
+def pixel_store(tmp_path_factory, pixel_parquet):
+    from pixel_store import PixelStore, build_pixel_store
+
+    return PixelStore(build_pixel_store(pixel_parquet / "no2_l3", tmp_path_factory.mktemp("pixel_store")))
+
+
+@pytest.fixture(scope="module")
+def points(pixel_store) -> list[tuple[float, float]]:
+    """Centros de celdas con observaciones, al azar."""
+    rng = np.random.default_rng(0)
+    lat, lon = pixel_store.grid.cell_centers(rng.choice(np.asarray(pixel_store.cells), N_POINTS))
+    return list(zip(lat.tolist(), lon.tolist()))
+
+
+def test_pixel_store_series(benchmark, pixel_store, points):
+    def lookup():
+        found = 0
+        for lat, lon in points:
+            k = pixel_store.locate(lat, lon)
+            if k is not None:
+                times, values = pixel_store.series(k)
+                found += len(times)
+        return found
+
+    assert run_benchmark(benchmark, lookup, rows=len(points)) > 0
+
+
+def test_cell_index_series(benchmark, tmp_path_factory, pixel_parquet, points):
+    from air_service.adapters.repositories.cell_timeseries_index import CellTimeSeriesIndex, build_cell_index
+    from air_service.domain.value_objects import Coordinates, TimeWindow
+
+    root = tmp_path_factory.mktemp("tempo_index")
+    build_cell_index(pixel_parquet / "no2_l3", root / "no2_l3")
+    index = CellTimeSeriesIndex(str(root), cache_size=0)  # sin caché: mide la lectura
+    window = TimeWindow(datetime(2025, 10, 4, tzinfo=timezone.utc), datetime(2025, 10, 5, tzinfo=timezone.utc))
+
+    def lookup():
+        return sum(len(index.series("no2_l3", Coordinates(lat, lon), window).times) for lat, lon in points)
+
+    assert run_benchmark(benchmark, lookup, rows=len(points)) > 0
+
+
+def test_zarr_point_series(benchmark, tmp_path_factory, l3_files, points):
+    from zarr_cube import append_granule, point_series
+
+    store = tmp_path_factory.mktemp("cube") / "tempo_cube.zarr"
+    for path in l3_files:
+        append_granule(store, path)
+    sample = points[:50]
+
+    def lookup():
+        return sum(len(point_series(store, lat, lon)) for lat, lon in sample)
+
+    assert run_benchmark(benchmark, lookup, rows=len(sample), rounds=3) > 0
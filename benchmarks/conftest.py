@@ -0,0 +1,134 @@
+"""
+Benchmarks del pipeline sobre granules TEMPO sintéticos (``synthetic_tempo``).
+
+Requieren ``pytest-benchmark``; los datos se generan una vez por sesión en un
+directorio temporal, así que no hace falta descargar nada:
+
+    pip install pytest-benchmark
+    cd benchmarks && python -m pytest --benchmark-json=resultado.json
+    BENCH_SCALE=4 python -m pytest -k conversion      # granules 4× más grandes
+
+Además de los tiempos de pytest-benchmark, cada benchmark deja en ``extra_info``:
+
+- ``rows`` y ``rows_per_s``: filas (píxeles, puntos o peticiones) por segundo;
+- ``MB_per_s``: bytes de entrada (NetCDF) o de respuesta por segundo, si aplica;
+- ``peak_rss_mib``: pico de memoria residente sobre la de partida durante una
+  ejecución (incluye lo que reservan HDF5 y Arrow fuera de Python).
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT), str(ROOT / "Earthdata_API")]
+
+import synthetic_tempo  # noqa: E402
+
+SCALE = float(os.environ.get("BENCH_SCALE", "1"))
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss() -> int | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except OSError:
+        return None
+
+
+class PeakMemory:
+    """
+    Pico de memoria sobre la de partida durante el bloque ``with``.
+
+    En Linux muestrea el RSS del proceso en un hilo (cada ``interval`` s); en otros
+    sistemas usa tracemalloc, que solo ve las reservas hechas desde Python/numpy.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self, base: int) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss() - base)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        base = _rss()
+        if base is None:
+            tracemalloc.start()
+            self._thread = None
+        else:
+            self._thread = threading.Thread(target=self._sample, args=(base,), daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is None:
+            self.peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            self._stop.set()
+            self._thread.join()
+        return False
+
+
+def nbytes(paths) -> int:
+    return sum(Path(p).stat().st_size for p in paths)
+
+
+def run_benchmark(benchmark, fn: Callable, *args, rows: int | Callable | None = None, nbytes: int | Callable | None = None, rounds: int | None = None, **kwargs):
+    """
+    Ejecuta ``fn`` una vez midiendo el pico de memoria y después la cronometra con
+    ``benchmark``. ``rows`` y ``nbytes`` pueden ser números o funciones del resultado.
+    """
+    with PeakMemory() as mem:
+        result = fn(*args, **kwargs)
+    if rounds:
+        result = benchmark.pedantic(fn, args, kwargs, rounds=rounds, iterations=1)
+    else:
+        result = benchmark(fn, *args, **kwargs)
+
+    mean = benchmark.stats.stats.mean
+    info = benchmark.extra_info
+    info["peak_rss_mib"] = round(mem.peak / 2**20, 1)
+    if rows is not None:
+        info["rows"] = rows(result) if callable(rows) else rows
+        info["rows_per_s"] = round(info["rows"] / mean)
+    if nbytes is not None:
+        size = nbytes(result) if callable(nbytes) else nbytes
+        info["MB_per_s"] = round(size / 1e6 / mean, 1)
+    return result
+
+
+@pytest.fixture(scope="session")
+def l3_files(tmp_path_factory) -> list[Path]:
+    """Granules NO2 L3 horarios (~1M píxeles cada uno con BENCH_SCALE=1)."""
+    n = int(1000 * SCALE ** 0.5)
+    return synthetic_tempo.generate(tmp_path_factory.mktemp("l3"), "L3", "no2", count=3, n_lat=n, n_lon=n)
+
+
+@pytest.fixture(scope="session")
+def hcho_l2_files(tmp_path_factory) -> list[Path]:
+    """Granules HCHO L2 (130 scanlines × 2048·BENCH_SCALE píxeles)."""
+    xtrack = max(16, int(2048 * SCALE))
+    return synthetic_tempo.generate(tmp_path_factory.mktemp("hcho_l2"), "L2", "hcho", count=2, mirror_steps=130, xtrack=xtrack)
+
+
+@pytest.fixture(scope="session")
+def pixel_parquet(tmp_path_factory, l3_files) -> Path:
+    """Almacén particionado ``<raíz>/no2_l3/date=…/`` con los píxeles de ``l3_files``."""
+    from ingestion import ingest
+
+    root = tmp_path_factory.mktemp("tempo_parquet")
+    partition = root / "no2_l3" / "date=2025-10-04"
+    partition.mkdir(parents=True)
+    ingest("no2_l3", l3_files, partition / "part-0.parquet", compact=True)
+    return root
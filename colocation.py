@@ -0,0 +1,237 @@
+"""
+Unión co-localizada de productos por celda de malla y franja de tiempo.
+
+En lugar de hacer ``merge`` de pandas sobre lat/lon float y ``time_hour`` (lento, con
+mucha memoria y con pérdidas por ruido de coma flotante), cada producto se indexa con
+dos claves enteras:
+
+- ``cell_id``: fila * n_columnas + columna en una malla regular (por defecto 0.02°,
+  la resolución de TEMPO L3)
+- ``time_bin``: segundos epoch // ``bin_seconds`` (por defecto 1 hora)
+
+Cada producto se agrega por (cell_id, time_bin) y los productos se unen con el hash
+join de Arrow sobre esas claves. Cada producto se abre y se recorre una sola vez, por
+lotes que se reducen a sumas y conteos por clave, de modo que en memoria solo hay
+agregados, nunca un producto completo ni pandas. El resultado se parte en una tabla
+ancha por hora:
+
+    sources = {
+        "no2": ProductSource("./tempo_parquet", ("vertical_column_troposphere",)),
+        "hcho": ProductSource("./hcho_data/hcho_combinado.parquet", ("HCHO_molecules_per_cm2",),
+                              lat="latitud", lon="longitud", time="tiempo"),
+    }
+    colocate(sources, "./features")
+"""
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pads
+
+from parquet_schema import write_parquet
+
+JOIN_KEYS = ["cell_id", "time_bin"]
+
+
+@dataclass(frozen=True)
+class GridSpec:
+    resolution: float = 0.02
+    lat0: float = -90.0
+    lon0: float = -180.0
+
+    @property
+    def n_cols(self) -> int:
+        return int(round(360.0 / self.resolution))
+
+    def cell_ids(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        row = np.floor((np.asarray(lat, dtype=np.float64) - self.lat0) / self.resolution).astype(np.int64)
+        col = np.floor((np.asarray(lon, dtype=np.float64) - self.lon0) / self.resolution).astype(np.int64)
+        return row * self.n_cols + col
+
+    def cell_centers(self, cell_id: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        row, col = np.divmod(np.asarray(cell_id, dtype=np.int64), self.n_cols)
+        return self.lat0 + (row + 0.5) * self.resolution, self.lon0 + (col + 0.5) * self.resolution
+
+
+DEFAULT_GRID = GridSpec()
+
+
+@dataclass(frozen=True)
+class ProductSource:
+    path: str
+    value_columns: tuple[str, ...]
+    lat: str = "latitude"
+    lon: str = "longitude"
+    time: str = "time"
+
+
+_UNIT_SECONDS = {"s": 1, "ms": 10 ** 3, "us": 10 ** 6, "ns": 10 ** 9}
+
+
+def epoch_seconds(column: pa.ChunkedArray | pa.Array) -> np.ndarray:
+    """Segundos epoch (int64) de una columna timestamp o entera (esquema compacto)."""
+    t = column.type
+    if pa.types.is_timestamp(t):
+        return pc.cast(column, pa.int64()).to_numpy() // _UNIT_SECONDS[t.unit]
+    return np.asarray(column.to_numpy(), dtype=np.int64)
+
+
+def add_keys(table: pa.Table, source: ProductSource, grid: GridSpec = DEFAULT_GRID, bin_seconds: int = 3600) -> pa.Table:
+    """Añade las columnas enteras cell_id y time_bin a ``table``."""
+    lat = table.column(source.lat).to_numpy()
+    lon = table.column(source.lon).to_numpy()
+    cell = grid.cell_ids(lat, lon)
+    tbin = epoch_seconds(table.column(source.time)) // bin_seconds
+    return table.append_column("cell_id", pa.array(cell)).append_column("time_bin", pa.array(tbin))
+
+
+def aggregate(table: pa.Table, source: ProductSource, name: str) -> pa.Table:
+    """Media de cada columna de valores por (cell_id, time_bin), renombrada como <name>_<col>."""
+    agg = table.group_by(JOIN_KEYS, use_threads=True).aggregate([(c, "mean") for c in source.value_columns] + [(source.value_columns[0], "count")])
+    names = [
+        f"{name}_{c[:-5]}" if c.endswith("_mean") else (f"{name}_n" if c.endswith("_count") else c)
+        for c in agg.column_names
+    ]
+    return agg.rename_columns(names)
+
+
+def open_dataset(source: ProductSource) -> pads.Dataset:
+    return pads.dataset(source.path, format="parquet")
+
+
+def _time_filter(dataset: pads.Dataset, column: str, start_s: int, end_s: int):
+    t = dataset.schema.field(column).type
+    field = pads.field(column)
+    if pa.types.is_timestamp(t):
+        factor = _UNIT_SECONDS[t.unit]
+        lo = pa.scalar(start_s * factor, type=pa.int64()).cast(t)
+        hi = pa.scalar(end_s * factor, type=pa.int64()).cast(t)
+        return (field >= lo) & (field < hi)
+    return (field >= start_s) & (field < end_s)
+
+
+def read_window(source: ProductSource, start_s: int, end_s: int, dataset: pads.Dataset | None = None) -> pa.Table:
+    """Lee de Parquet solo las columnas necesarias y las filas con tiempo en [start_s, end_s)."""
+    dataset = dataset or open_dataset(source)
+    columns = [source.lat, source.lon, source.time, *source.value_columns]
+    return dataset.to_table(columns=columns, filter=_time_filter(dataset, source.time, start_s, end_s))
+
+
+def time_range(source: ProductSource, dataset: pads.Dataset | None = None) -> tuple[int, int]:
+    """(min, max) en segundos epoch leyendo solo la columna de tiempo."""
+    dataset = dataset or open_dataset(source)
+    lo, hi = None, None
+    for batch in dataset.to_batches(columns=[source.time]):
+        if batch.num_rows == 0:
+            continue
+        secs = epoch_seconds(batch.column(0))
+        lo = secs.min() if lo is None else min(lo, secs.min())
+        hi = secs.max() if hi is None else max(hi, secs.max())
+    if lo is None:
+        raise ValueError(f"Sin datos en {source.path}")
+    return int(lo), int(hi)
+
+
+def aggregate_scan(source: ProductSource, name: str, dataset: pads.Dataset | None = None, grid: GridSpec = DEFAULT_GRID, bin_seconds: int = 3600, start_s: int | None = None, end_s: int | None = None) -> pa.Table:
+    """
+    Igual que ``aggregate(add_keys(...))`` pero en una sola pasada por lotes sobre el
+    producto (o la ventana [start_s, end_s)): cada lote se reduce a sumas y conteos por
+    (cell_id, time_bin) y al final se combinan, así que en memoria solo hay agregados.
+    """
+    dataset = dataset or open_dataset(source)
+    values = list(source.value_columns)
+    columns = [source.lat, source.lon, source.time, *values]
+    where = None if start_s is None else _time_filter(dataset, source.time, start_s, end_s)
+    partial = []
+    for batch in dataset.to_batches(columns=columns, filter=where):
+        if batch.num_rows == 0:
+            continue
+        keyed = add_keys(pa.Table.from_batches([batch]), source, grid, bin_seconds)
+        partial.append(keyed.group_by(JOIN_KEYS).aggregate([(c, "sum") for c in values] + [(c, "count") for c in values]))
+    if not partial:
+        return aggregate(pa.table({c: pa.array([], dataset.schema.field(c).type) for c in values} | {k: pa.array([], pa.int64()) for k in JOIN_KEYS}), source, name)
+
+    total = pa.concat_tables(partial).group_by(JOIN_KEYS, use_threads=True).aggregate(
+        [(f"{c}_sum", "sum") for c in values] + [(f"{c}_count", "sum") for c in values]
+    )
+    out = {k: total.column(k) for k in JOIN_KEYS}
+    for c in values:
+        count = total.column(f"{c}_count_sum")
+        # Media de los valores no nulos; null si la celda no tiene ninguno (como "mean")
+        out[f"{name}_{c}"] = pc.if_else(pc.greater(count, 0), pc.divide(pc.cast(total.column(f"{c}_sum_sum"), pa.float64()), count), None)
+    out[f"{name}_n"] = total.column(f"{values[0]}_count_sum")
+    return pa.table(out)
+
+
+def _join(aggs: dict[str, pa.Table], sources: dict[str, ProductSource], base: str, how: str, grid: GridSpec) -> pa.Table | None:
+    """Une los agregados (el de ``base`` primero) y añade latitude/longitude del centro de celda."""
+    order = [base] + [n for n in sources if n != base]
+    joined = None
+    missing = []
+    for name in order:
+        agg = aggs[name]
+        if agg.num_rows == 0:
+            if name == base:
+                return None
+            missing.append(name)
+            continue
+        joined = agg if joined is None else joined.join(agg, keys=JOIN_KEYS, join_type=how, use_threads=True)
+
+    if missing and how == "inner":
+        return None
+    # Columnas nulas para los productos sin datos: mismo esquema en todas las horas
+    for name in missing:
+        for c in sources[name].value_columns:
+            joined = joined.append_column(f"{name}_{c}", pa.nulls(joined.num_rows, pa.float64()))
+        joined = joined.append_column(f"{name}_n", pa.nulls(joined.num_rows, pa.int64()))
+
+    joined = joined.sort_by([("time_bin", "ascending"), ("cell_id", "ascending")])
+    lat, lon = grid.cell_centers(joined.column("cell_id").to_numpy())
+    return joined.append_column("latitude", pa.array(lat.astype(np.float32))).append_column("longitude", pa.array(lon.astype(np.float32)))
+
+
+def colocate_window(sources: dict[str, ProductSource], start_s: int, end_s: int, base: str | None = None, how: str = "left outer", grid: GridSpec = DEFAULT_GRID, bin_seconds: int = 3600, datasets: dict[str, pads.Dataset] | None = None) -> pa.Table | None:
+    """Une todos los productos para la ventana [start_s, end_s). Retorna None si el producto base está vacío."""
+    base = base or next(iter(sources))
+    datasets = datasets or {}
+    aggs = {
+        name: aggregate_scan(src, name, datasets.get(name), grid, bin_seconds, start_s, end_s)
+        for name, src in sources.items()
+    }
+    return _join(aggs, sources, base, how, grid)
+
+
+def colocate(sources: dict[str, ProductSource], out_dir: str | Path, base: str | None = None, how: str = "left outer", grid: GridSpec = DEFAULT_GRID, bin_seconds: int = 3600, compression: str = "zstd") -> list[Path]:
+    """
+    Genera una tabla ancha por franja (hora) en ``out_dir``/features_<YYYYMMDDTHH>.parquet.
+
+    Cada producto se abre y se recorre una sola vez (``aggregate_scan``); la unión se
+    hace sobre los agregados y la salida se parte por ``time_bin``.
+
+    - base: producto que define las celdas de salida (por defecto el primero)
+    - how: tipo de join de Arrow ("left outer", "inner", "full outer", …)
+    """
+    from datetime import datetime, timezone
+
+    base = base or next(iter(sources))
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    aggs = {name: aggregate_scan(src, name, open_dataset(src), grid, bin_seconds) for name, src in sources.items()}
+    if aggs[base].num_rows == 0:
+        raise ValueError(f"Sin datos en {sources[base].path}")
+    joined = _join(aggs, sources, base, how, grid)
+    if joined is None:
+        return []
+
+    bins = joined.column("time_bin").to_numpy()
+    present, starts = np.unique(bins, return_index=True)
+    written = []
+    for b, lo, hi in zip(present, starts, [*starts[1:], len(bins)]):
+        table = joined.slice(lo, hi - lo)
+        stamp = datetime.fromtimestamp(int(b) * bin_seconds, tz=timezone.utc).strftime("%Y%m%dT%H")
+        path = write_parquet(table, out_dir / f"features_{stamp}.parquet", compression=compression)
+        print(f"🔗 {stamp}: {table.num_rows:,} celdas, {len(table.column_names)} columnas → {path.name}")
+        written.append(path)
+    return written
@@ -4,6 +4,54 @@ import xarray as xr
 import pandas as pd
 import numpy as np
 from tqdm import tqdm  # barra de progreso opcional
+from parquet_schema import TIME_METADATA, compact_table, write_parquet
+from ingestion import adhoc_spec, read_granule
+
+def extract_valid_pixels(ruta, features, group_data_name="product", quality_flag="main_data_quality_flag", max_quality=None):
+    """
+    Extrae solo los píxeles válidos de un .nc directamente a una tabla Arrow.
+
+    Construye la máscara de validez (finito y distinto de _FillValue en todas las
+    variables, y opcionalmente ``quality_flag <= max_quality``) sobre los arrays NumPy
+    crudos, y solo entonces reúne los valores y las coordenadas de los píxeles válidos
+    (ver ingestion.read_granule). Retorna None si el fichero no tiene ninguna de las
+    variables pedidas.
+    """
+    prefix = f"{group_data_name}/" if group_data_name else ""
+    spec = adhoc_spec(
+        "tempo_l3",
+        {v: prefix + v for v in features},
+        quality_flag=prefix + quality_flag,
+        max_quality=max_quality,
+        time_layout="grid",
+        skip_missing=True,
+    )
+    return read_granule(ruta, spec)
+
+
+def _extract_with_xarray(ruta, features, group_data_name):
+    """Ruta original: to_dataframe() del cubo completo y limpieza con pandas."""
+    import pyarrow as pa
+
+    ds = xr.open_dataset(ruta, engine="h5netcdf", group=group_data_name)
+    try:
+        # Verificar dimensiones válidas
+        if not ds.dims:
+            print(f"⚠️ Archivo sin dimensiones válidas: {ruta}")
+            return None
+        available_vars = [v for v in features if v in ds.variables]
+        if not available_vars:
+            return None
+        df = ds[available_vars].to_dataframe().reset_index()
+    finally:
+        ds.close()
+
+    # Limpiar
+    df.replace([np.inf, -np.inf], np.nan, inplace=True)
+    df.dropna(inplace=True)
+    df["file_source"] = os.path.basename(ruta)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
 
 def process_tempo_data(
         folder_nc="./tempo_data", 
@@ -14,11 +62,27 @@ def process_tempo_data(
                 "vertical_column_stratosphere",
                 "main_data_quality_flag",
         ],
-        group_data_name="product"):
+        group_data_name="product",
+        compact=False,
+        compression="snappy",
+        compression_level=None,
+        row_group_size=None,
+        method="mask",
+        max_quality=None):
     """
     Procesa archivos .nc de TEMPO NO2 y los convierte en Parquet de forma optimizada.
     Ignora archivos vacíos o sin dimensiones válidas.
+
+    method="mask" (por defecto) usa extract_valid_pixels: filtra sobre los arrays crudos
+    y solo materializa los píxeles válidos, con sus coordenadas reales. method="xarray"
+    conserva la conversión anterior vía to_dataframe(). max_quality descarta píxeles con
+    main_data_quality_flag mayor (solo en method="mask").
+
+    compact=True escribe el esquema compacto de parquet_schema.compact_table
+    (float32, flags int8, file_source como diccionario, tiempo en segundos epoch).
+    compression / compression_level / row_group_size se pasan a pyarrow.
     """
+    import pyarrow as pa
 
     folder_parquet = Path(folder_parquet)
     folder_parquet.mkdir(parents=True, exist_ok=True)
@@ -30,54 +94,47 @@ def process_tempo_data(
 
     print(f"📂 Archivos encontrados: {len(rutas_nc)}")
 
-    all_dataframes = []
+    all_tables = []
     total_files = 0
 
     for ruta in tqdm(rutas_nc, desc="Procesando archivos"):
         try:
-            ds = xr.open_dataset(ruta, engine="h5netcdf", group=group_data_name)
-
-            # Verificar dimensiones válidas
-            if not ds.dims:
-                print(f"⚠️ Archivo sin dimensiones válidas: {ruta}")
-                ds.close()
-                continue
+            if method == "mask":
+                table = extract_valid_pixels(ruta, features_to_keep, group_data_name, max_quality=max_quality)
+            else:
+                table = _extract_with_xarray(ruta, features_to_keep, group_data_name)
 
-            vars_to_keep = features_to_keep
-            available_vars = [v for v in vars_to_keep if v in ds.variables]
-
-            if not available_vars:
+            if table is None:
                 print(f"⚠️ Archivo sin variables requeridas: {ruta}")
-                ds.close()
                 continue
 
-            # Convertir a DataFrame
-            df = ds[available_vars].to_dataframe().reset_index()
-            ds.close()
-
-            # Limpiar
-            df.replace([np.inf, -np.inf], np.nan, inplace=True)
-            df.dropna(inplace=True)
-            df["file_source"] = os.path.basename(ruta)
-
-            if len(df) > 0:
-                all_dataframes.append(df)
+            if table.num_rows > 0:
+                all_tables.append(table)
                 total_files += 1
 
         except Exception as e:
             print(f"❌ Error en {ruta}: {e}")
 
-    if not all_dataframes:
+    if not all_tables:
         print("⚠️ No se generaron DataFrames válidos.")
         return None
 
-    # Combinar todos los DataFrames
-    df_final = pd.concat(all_dataframes, ignore_index=True)
-    print(f"✅ Data combinada con {len(df_final):,} registros de {total_files} archivos válidos.")
+    # Combinar todas las tablas (unificando los diccionarios de file_source)
+    table_final = pa.concat_tables(all_tables, promote_options="permissive").unify_dictionaries()
+    print(f"✅ Data combinada con {table_final.num_rows:,} registros de {total_files} archivos válidos.")
 
     # Guardar en parquet
     output_path = folder_parquet / f"tempo_data_{pd.Timestamp.now().date()}.parquet"
-    df_final.to_parquet(output_path, compression="snappy", engine="pyarrow", index=False)
+    if compact:
+        table_final = compact_table(table_final)
+    write_parquet(
+        table_final,
+        output_path,
+        compression=compression,
+        compression_level=compression_level,
+        row_group_size=row_group_size,
+        metadata=TIME_METADATA if compact else None,
+    )
 
     print(f"💾 Archivo Parquet guardado en: {output_path}")
     return output_path
@@ -3,10 +3,12 @@ import requests
 from urllib.parse import unquote
 import datetime as dt
 from datetime import datetime, timezone, timedelta
-import numpy as np
 
 from pathlib import Path
 from logger import setup_logging
+from earthdata_auth import EarthdataAuth, default_auth
+from http_scheduler import RequestScheduler, default_scheduler
+from watermarks import WatermarkStore, default_watermarks
 
 
 logger = setup_logging(debug = False, name = 'get_utils')
@@ -31,20 +33,36 @@ def times_are_close(time1, time2, tolerance):
     return time2 <= time1 or abs(time1 - time2) <= tolerance
 
 
-def get_date_limits():
-    url = "https://raw.githubusercontent.com/johnarban/tempo-data-holdings/main/manifest.json"
-    manifest = requests.get(url).json()
-    ts = manifest["released"]["timestamps"]
-    times = np.array([int(t) for t in ts])
+def granule_time(url: str) -> datetime:
+    """Start time encoded in a TEMPO granule name (``…_20251004T125055Z_S012G03.nc``)."""
+    return to_datetime(url.split("/")[-1].split("_")[-2], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
 
-    last_time = times[-1] / 1000
-    last_time_dt = dt.datetime.fromtimestamp(last_time, tz=timezone.utc)
 
-    logger.debug(f"Last time: {last_time_dt.strftime(CMR_DATE_FMT)}")
+def download_mark_key(concept_id: str) -> str:
+    """
+    Watermark key of the download-only path (``fetch_granule_data``).
+
+    Kept apart from the plain concept id, which ``IngestDaemon`` advances only
+    once a granule is downloaded *and* converted.
+    """
+    return f"{concept_id}:downloaded"
+
+
+def get_date_limits(concept_id: str = TEMPO_CONCEPT_ID, watermarks: WatermarkStore | None = None, lookback: timedelta = timedelta(days=1), key: str | None = None):
+    """
+    Search window for ``concept_id`` from its local ingestion watermark.
 
-    # Define the temporal range for the search
-    start_date = last_time_dt
+    The window starts at the watermark (the latest granule already ingested)
+    or, for a collection never ingested, ``lookback`` before now. ``key``
+    selects the watermark (the concept id by default). Returns
+    ``(start_date, end_date, last_time)`` where ``last_time`` is the
+    watermark or None.
+    """
+    last_time_dt = (watermarks or default_watermarks()).get(key or concept_id)
     end_date = dt.datetime.now(tz=timezone.utc)
+    start_date = last_time_dt or end_date - lookback
+
+    logger.debug(f"Last time: {last_time_dt.strftime(CMR_DATE_FMT) if last_time_dt else None}")
     logger.info(f"Search Start Date: {start_date.strftime(CMR_DATE_FMT)}")
     logger.info(f"Search End Date: {end_date.strftime(CMR_DATE_FMT)}")
 
@@ -78,7 +96,7 @@ def search_for_granules(
     if dry_run:
         return ["https://not.a.real.url"]
 
-    cmr_response = requests.get(cmr_url, params=search_params, headers=headers)
+    cmr_response = default_scheduler().get(None, cmr_url, params=search_params, headers=headers)
     
     if verbose:
         encoded_url = cmr_response.url
@@ -115,10 +133,128 @@ def search_for_granules(
 
     if len(granule_urls) == 0:
         logger.info("No new data found")
-        exit(0)
     return granule_urls
 
 
+def cmr_search_granules(search_params: dict, session: requests.Session | None = None, cmr_url: str = "https://cmr.earthdata.nasa.gov/search/granules.json", scheduler: RequestScheduler | None = None) -> list[dict]:
+    """
+    Search CMR and return every matching granule entry.
+
+    Follows the ``CMR-Search-After`` header so results are not truncated at
+    one page.
+    """
+    scheduler = scheduler or default_scheduler()
+    params = {"page_size": 2000, **search_params}
+    headers = {"Accept": "application/json"}
+    entries = []
+    while True:
+        r = scheduler.get(session, cmr_url, params=params, headers=headers, timeout=60)
+        r.raise_for_status()
+        granules = r.json().get("feed", {}).get("entry", [])
+        entries.extend(granules)
+        search_after = r.headers.get("CMR-Search-After")
+        if not granules or not search_after:
+            break
+        headers["CMR-Search-After"] = search_after
+    return entries
+
+
+def granule_download_url(entry: dict, link_filter: str = "asdc-prod-protected") -> str | None:
+    """Return the ``.nc`` download link of a CMR entry containing ``link_filter``."""
+    return next(
+        (
+            link["href"]
+            for link in entry.get("links", [])
+            if link_filter in link.get("href", "") and link["href"].endswith(".nc")
+        ),
+        None,
+    )
+
+
+def cmr_search_granule_urls(search_params: dict, session: requests.Session | None = None, link_filter: str = "asdc-prod-protected", cmr_url: str = "https://cmr.earthdata.nasa.gov/search/granules.json", scheduler: RequestScheduler | None = None) -> list[str]:
+    """
+    Search CMR and return the download links of every matching granule.
+
+    Only ``.nc`` links containing ``link_filter`` are kept.
+    """
+    urls = []
+    for entry in cmr_search_granules(search_params, session=session, cmr_url=cmr_url, scheduler=scheduler):
+        href = granule_download_url(entry, link_filter)
+        if href is not None and href not in urls:
+            urls.append(href)
+    logger.info(f"Found {len(urls)} granules in CMR")
+    return urls
+
+
+def create_download_session(pool_size: int = 8, auth: EarthdataAuth | None = None) -> requests.Session:
+    """
+    Build a requests.Session with a connection pool sized for parallel downloads.
+
+    The session carries the cached Earthdata bearer token and URS cookies
+    from ``auth`` (the process-wide EarthdataAuth by default), so neither
+    the token request nor the login redirect is repeated per file or per run.
+    """
+    return (auth or default_auth()).session(pool_size=pool_size)
+
+
+def download_file(session: requests.Session, url: str, dest_dir: Path, chunk_size: int = 1 << 20, scheduler: RequestScheduler | None = None, auth: EarthdataAuth | None = None) -> Path | None:
+    """
+    Stream ``url`` into ``dest_dir`` through ``session``.
+
+    The transfer goes through the request scheduler (adaptive concurrency,
+    retries, byte budget). The file is written to a ``.part`` file and
+    renamed when complete, so an interrupted download never leaves a
+    truncated granule behind. If the server answers 401 to a bearer token
+    (revoked or rejected before its expiry), the token is refreshed through
+    ``auth`` (the process-wide EarthdataAuth by default) and the download is
+    retried once. Returns the final path, or None if the request failed.
+    """
+    filename = url.split("/")[-1].split("?")[0]
+    dest = Path(dest_dir) / filename
+    if dest.exists():
+        logger.info(f"Skipping {filename}, already in {dest_dir}")
+        return dest
+    tmp = dest.with_name(dest.name + ".part")
+    try:
+        for attempt in range(2):
+            sent = session.headers.get("Authorization")
+            status = (scheduler or default_scheduler()).download(session, url, tmp, chunk_size=chunk_size, timeout=120)
+            if status == 401 and attempt == 0 and sent and sent.startswith("Bearer ") and (auth or default_auth()).refresh(session, sent):
+                tmp.unlink(missing_ok=True)
+                continue
+            break
+        if status != 200:
+            logger.error(f"Error {status} downloading {filename}")
+            tmp.unlink(missing_ok=True)
+            return None
+        tmp.replace(dest)
+    except Exception as e:
+        logger.error(f"Failed to download {url}: {e}")
+        tmp.unlink(missing_ok=True)
+        return None
+    logger.info(f"Downloaded {filename}")
+    return dest
+
+
+def download_files_parallel(urls: list[str], dest_dir: Path, session: requests.Session | None = None, max_workers: int = 4, auth: EarthdataAuth | None = None) -> list[Path]:
+    """
+    Download ``urls`` into ``dest_dir`` in parallel over one shared session.
+
+    Returns the paths of the files that are present after the run.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    own_session = session is None
+    session = session or create_download_session(pool_size=max_workers, auth=auth)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        results = list(pool.map(lambda url: download_file(session, url, dest_dir, auth=auth), urls))
+    if own_session:
+        (auth or default_auth()).save(session)
+    return [p for p in results if p is not None]
+
+
 def urlTimeNearOrEarlier(urlString, time2):
     time1 = to_datetime(urlString.split("_")[-2], "%Y%m%dT%H%M%SZ")
     # print(time1, time2)
@@ -288,78 +424,39 @@ def create_download_list(granule_urls: list[str], download_list: Path, data_dir:
             f.write(url + "\n")
 
     logger.info(f"Download list created: {download_list} (selected {len(selected)} URLs, {len(best_per_zone)} zones)")
+    return selected
 
 def download_data(download_script_template, download_script, dry_run = False):
-    # check if a .netrc file is on the path
-    netrc = Path("~/.netrc").expanduser()
-    if not netrc.exists():
-        logger.error("No .netrc file found in home directory.")
-        logger.error("Please create a .netrc file with your Earthdata login credentials.")
+    auth = default_auth()
+    if auth.credentials() is None and not auth.token_path.exists():
+        logger.error("No Earthdata credentials found.")
+        logger.error("Set EARTHDATA_USER/EARTHDATA_PASS or create a .netrc file with your Earthdata login credentials.")
         logger.error("See https://urs.earthdata.nasa.gov/documentation/for_users/data_access/curl_and_wget")
         sys.exit(1)
-    # Attempt to download files using Python requests + ~/.netrc credentials
+    # Attempt to download files using Python requests + cached Earthdata token
     download_list_path = Path(download_script.parent) / "download_list.txt"
-    def _load_netrc_credentials(path: Path):
-        # Prefer stdlib netrc parser
-        try:
-            import netrc
-            auth = netrc.netrc(str(path)).authenticators('urs.earthdata.nasa.gov')
-            if auth:
-                login, account, password = auth
-                return login, password
-        except Exception:
-            pass
-        # Fallback to manual parse
-        with open(path, 'r', encoding='utf-8') as f:
-            for line in f:
-                if 'urs.earthdata.nasa.gov' in line:
-                    parts = line.strip().split()
-                    # expect: machine host login USER password PASS
-                    try:
-                        user = parts[2]
-                        pwd = parts[4]
-                        return user, pwd
-                    except Exception:
-                        continue
-        raise ValueError('No credentials found in .netrc')
 
     def download_files_from_list(list_path: Path, dry_run=False):
         if not list_path.exists():
             logger.error(f"Download list not found: {list_path}")
             return False
-        try:
-            user, password = _load_netrc_credentials(netrc)
-        except Exception as e:
-            logger.error(f"Could not read credentials from .netrc: {e}")
-            return False
-
-        session = requests.Session()
-        session.auth = (user, password)
 
         with open(list_path, 'r', encoding='utf-8') as f:
             urls = [l.strip() for l in f.readlines() if l.strip()]
 
         logger.info(f"{len(urls)} archivos a descargar (via requests)")
+        if dry_run:
+            for url in urls:
+                logger.info(f"Descargando {url.split('/')[-1].split('?')[0]} ...")
+            return True
 
-        for url in urls:
-            filename = url.split('/')[-1].split('?')[0]
-            logger.info(f"Descargando {filename} ...")
-            if dry_run:
-                continue
-            try:
-                with session.get(url, allow_redirects=True, stream=True, timeout=120) as r:
-                    if r.status_code == 200:
-                        with open(download_script.parent / filename, 'wb') as fh:
-                            for chunk in r.iter_content(chunk_size=8192):
-                                if chunk:
-                                    fh.write(chunk)
-                        logger.info(f"Archivo descargado: {filename}")
-                    else:
-                        logger.error(f"Error {r.status_code} al descargar {filename}")
-                        return False
-            except Exception as e:
-                logger.error(f"Fallo al descargar {url}: {e}")
-                return False
+        session = create_download_session(auth=auth)
+        try:
+            for url in urls:
+                if download_file(session, url, download_script.parent) is None:
+                    return False
+        finally:
+            auth.save(session)
         return True
 
     # Try python-based downloader first
@@ -415,6 +512,7 @@ def fetch_granule_data(
         dry_run = False, 
         only_one_file = False, 
         check_only = False):
+    from_watermark = not (start_date and end_date)
     if not skip_download:
     # Determine the date range for the data download
         if start_date and end_date:
@@ -431,7 +529,7 @@ def fetch_granule_data(
                 sys.exit(1)
             
         else:
-            start_date, end_date, last_downloaded_time = get_date_limits()
+            start_date, end_date, last_downloaded_time = get_date_limits(concept_id, key=download_mark_key(concept_id))
         granule_urls = search_for_granules(
         concept_id,
         start_date,
@@ -443,12 +541,12 @@ def fetch_granule_data(
     if not check_only:
         if len(granule_urls) == 0:
             logger.info("No new data found")
-            exit(0)
+            return []
 
         if only_one_file:
             granule_urls = granule_urls[:1]
 
-        create_download_list(granule_urls, download_list, folder)
+        selected = set(create_download_list(granule_urls, download_list, folder))
 
         if dry_run and not skip_download:
             logger.info(" ==== Download List  ==== ")
@@ -457,6 +555,21 @@ def fetch_granule_data(
         
         download_data(download_script_template, download_script, dry_run = dry_run)
         # download_data(download_list = download_list, template = download_script_template, download_dir = folder, dry_run=dry_run)
+        if from_watermark and not dry_run:
+            # Only up to the last granule before the first selected download that
+            # failed, so it is searched for again on the next run. Granules that
+            # create_download_list skipped (older ones in a zone) never block the mark.
+            last = None
+            for url in sorted(granule_urls, key=granule_time):
+                filename = url.split("/")[-1]
+                if url in selected and not (
+                    (Path(folder) / filename).exists() or (Path(folder) / "subsetted_netcdf" / filename).exists()
+                ):
+                    break
+                last = granule_time(url)
+            if last is not None:
+                default_watermarks().advance(download_mark_key(concept_id), last)
+        return granule_urls
 
 def wrap_in_quotes(string: str) -> str:
     # if the string is not already wrapped in quotes, wrap it
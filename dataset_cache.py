@@ -0,0 +1,223 @@
+"""
+Caché de datasets ya preparados (características y objetivos finales) en .npy mapeados en memoria.
+
+Cada entrenamiento o evaluación repetía la lectura de Parquet, la limpieza, el
+escalado y las ventanas antes de la primera época. Con esta caché los arrays finales
+se escriben una vez en ``<raíz>/<clave>/`` y las ejecuciones siguientes los abren con
+``np.load(mmap_mode="r")`` en milisegundos.
+
+La clave es un hash de:
+
+- los fragmentos de entrada (ruta, tamaño y mtime de cada fichero);
+- la configuración de características (columnas, objetivo, longitud de ventana, …);
+- la versión del código que transforma los datos (hash del fuente de los módulos
+  indicados y ``CACHE_VERSION``).
+
+Si cambia cualquiera de ellos la clave cambia y la entrada se reconstruye; las
+entradas viejas se eliminan por antigüedad de uso (``max_entries``). Las entradas se
+construyen en un directorio temporal bajo un bloqueo y se publican con un rename, así
+que dos procesos con la misma clave no la construyen dos veces y un lector nunca ve
+una entrada a medias:
+
+    cache = DatasetCache("./.dataset_cache")
+    entry = cache.get_or_build(files, {"features": FEATURES}, build, code=[training_pipeline])
+    X = entry["X_train"]
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+
+CACHE_VERSION = 1
+META_NAME = "meta.json"
+
+
+def default_root() -> Path:
+    return Path(os.environ.get("DATASET_CACHE_DIR", "./.dataset_cache"))
+
+
+def file_fingerprints(files: Iterable[str | Path]) -> list[list]:
+    """[ruta absoluta, tamaño, mtime_ns] de cada fichero, en orden."""
+    out = []
+    for p in files:
+        st = os.stat(p)
+        out.append([str(Path(p).resolve()), st.st_size, st.st_mtime_ns])
+    return out
+
+
+def code_version(code: Sequence[str | Path | ModuleType] = ()) -> str:
+    """Hash del fuente de los módulos (o ficheros) que producen el dataset."""
+    h = hashlib.sha256(str(CACHE_VERSION).encode())
+    for item in code:
+        path = Path(item.__file__) if isinstance(item, ModuleType) else Path(item)
+        h.update(path.name.encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def dataset_key(files: Iterable[str | Path], config: dict, code: Sequence[str | Path | ModuleType] = ()) -> str:
+    payload = json.dumps(
+        {"files": file_fingerprints(files), "config": config, "code": code_version(code)},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+class NpyWriter:
+    """
+    Escribe un .npy por bloques sin conocer de antemano el número de filas.
+
+    Los bloques se añaden a un fichero crudo y ``close`` lo convierte en .npy con la
+    forma final (una copia secuencial por trozos).
+    """
+
+    def __init__(self, path: str | Path, dtype=np.float32, row_shape: tuple = ()):
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.rows = 0
+        self._raw_path = self.path.with_suffix(".raw")
+        self._raw = open(self._raw_path, "wb")
+
+    def append(self, block: np.ndarray) -> None:
+        block = np.ascontiguousarray(block, dtype=self.dtype)
+        if block.shape[1:] != self.row_shape:
+            raise ValueError(f"Bloque con forma {block.shape}, se esperaba (n, {self.row_shape})")
+        block.tofile(self._raw)
+        self.rows += len(block)
+
+    def close(self, chunk_rows: int = 1_048_576) -> Path:
+        self._raw.close()
+        shape = (self.rows, *self.row_shape)
+        out = np.lib.format.open_memmap(self.path, mode="w+", dtype=self.dtype, shape=shape)
+        if self.rows:
+            raw = np.memmap(self._raw_path, dtype=self.dtype, mode="r", shape=shape)
+            for start in range(0, self.rows, chunk_rows):
+                out[start:start + chunk_rows] = raw[start:start + chunk_rows]
+            del raw
+        out.flush()
+        del out
+        self._raw_path.unlink()
+        return self.path
+
+
+class CachedDataset:
+    """Entrada de la caché: ``meta`` y los .npy de la carpeta, abiertos bajo demanda en modo mmap."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.meta = json.loads((path / META_NAME).read_text(encoding="utf-8"))
+        self._arrays: dict[str, np.ndarray] = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            self._arrays[name] = np.load(self.path / f"{name}.npy", mmap_mode="r")
+        return self._arrays[name]
+
+    def __contains__(self, name: str) -> bool:
+        return (self.path / f"{name}.npy").exists()
+
+    def file(self, name: str) -> Path:
+        return self.path / name
+
+
+class DatasetCache:
+    def __init__(self, root: str | Path | None = None, max_entries: int = 8, lock_timeout: float = 3600.0):
+        self.root = Path(root) if root else default_root()
+        self.max_entries = max_entries
+        self.lock_timeout = lock_timeout
+
+    @contextmanager
+    def _lock(self, key: str):
+        """Bloqueo exclusivo portable (O_EXCL) sobre <raíz>/<clave>.lock."""
+        lock = self.root / f"{key}.lock"
+        lock.parent.mkdir(parents=True, exist_ok=True)
+        started = time.monotonic()
+        while True:
+            try:
+                fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if time.monotonic() - started > self.lock_timeout:
+                    raise TimeoutError(f"No se pudo bloquear la entrada {key} (¿{lock} abandonado?)")
+                time.sleep(0.5)
+        try:
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            yield
+        finally:
+            lock.unlink(missing_ok=True)
+
+    def get(self, key: str) -> CachedDataset | None:
+        path = self.root / key
+        if not (path / META_NAME).exists():
+            return None
+        os.utime(path / META_NAME)  # último uso, para la expulsión
+        return CachedDataset(path)
+
+    def build(self, key: str, builder: Callable[[Path], dict | None], meta: dict | None = None, rebuild: bool = False) -> CachedDataset:
+        """
+        Construye la entrada ``key`` con ``builder(carpeta)``, que escribe los .npy (y
+        ficheros auxiliares) en la carpeta y puede devolver metadatos adicionales.
+
+        Con ``rebuild=True`` la reconstruye aunque exista; la entrada anterior sigue en
+        su sitio hasta que la nueva está completa y se sustituye bajo el bloqueo.
+        """
+        with self._lock(key):
+            entry = None if rebuild else self.get(key)
+            if entry is not None:
+                return entry
+            tmp = self.root / f"{key}.building"
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+            t0 = time.perf_counter()
+            try:
+                extra = builder(tmp) or {}
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+            info = {**(meta or {}), **extra, "key": key, "built_at": time.time(), "build_seconds": round(time.perf_counter() - t0, 2)}
+            (tmp / META_NAME).write_text(json.dumps(info, default=str), encoding="utf-8")
+            old = self.root / f"{key}.old"
+            shutil.rmtree(old, ignore_errors=True)
+            if (self.root / key).exists():
+                (self.root / key).rename(old)
+            tmp.rename(self.root / key)
+            shutil.rmtree(old, ignore_errors=True)
+        self.prune(keep=key)
+        return CachedDataset(self.root / key)
+
+    def get_or_build(self, files: Sequence[str | Path], config: dict, builder: Callable[[Path], dict | None], code: Sequence[str | Path | ModuleType] = (), rebuild: bool = False) -> CachedDataset:
+        key = dataset_key(files, config, code)
+        entry = None if rebuild else self.get(key)
+        if entry is not None:
+            print(f"⚡ Dataset en caché {key} ({entry.meta.get('build_seconds', '?')} s ahorrados)")
+            return entry
+        entry = self.build(key, builder, {"config": config, "files": len(files)}, rebuild=rebuild)
+        print(f"🗄️ Dataset {key} construido en {entry.meta['build_seconds']} s → {entry.path}")
+        return entry
+
+    def entries(self) -> list[Path]:
+        """Entradas completas, de la usada más recientemente a la más antigua."""
+        if not self.root.exists():
+            return []
+        entries = [p for p in self.root.iterdir() if (p / META_NAME).exists()]
+        return sorted(entries, key=lambda p: (p / META_NAME).stat().st_mtime, reverse=True)
+
+    def prune(self, keep: str | None = None) -> list[Path]:
+        removed = []
+        for path in self.entries()[self.max_entries:]:
+            if path.name != keep:
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(path)
+        return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -4,6 +4,8 @@ from data_tempo_utils import (
     fetch_granule_data,
     setup_data_folder
 )
+from granule_store import DEFAULT_BUDGET, GranuleStore
+from ingestion import adhoc_spec, ingest
 
 # additional imports for merging
 import xarray as xr
@@ -50,7 +52,7 @@ class EarthDataHCHO:
         """
         print(f"🚀 Descargando datos desde {self.start_date} hasta {self.end_date} ...")
 
-        fetch_granule_data(
+        granule_urls = fetch_granule_data(
             concept_id=self.concept_id,
             start_date=self.start_date,
             end_date=self.end_date,
@@ -65,8 +67,13 @@ class EarthDataHCHO:
         )
 
         print(f"✅ Data de TEMPO (HCHO) descargada en: {self.folder}")
-
         # consolidation removed from class; use module function merge_nc_to_parquet(folder, out_path, variables)
+        return self._local_files(granule_urls)
+
+    def _local_files(self, granule_urls) -> list[Path]:
+        """Rutas locales de los granules de ``granule_urls`` presentes en la carpeta tras la descarga."""
+        paths = [self.folder / url.split("/")[-1] for url in granule_urls or []]
+        return [p for p in paths if p.exists()]
 
     def download_data_by_date(self, start: str, end: str,
                             skip_download=False, verbose=True,
@@ -86,7 +93,7 @@ class EarthDataHCHO:
             date_end = datetime.strptime(end + " 23:59:59", "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
         except ValueError:
             raise ValueError("❌ Formato de fecha inválido. Usa YYYY-MM-DD")
-        fetch_granule_data(
+        granule_urls = fetch_granule_data(
             concept_id=self.concept_id,
             start_date=date_start,
             end_date=date_end,
@@ -102,27 +109,19 @@ class EarthDataHCHO:
 
         print(f"📅 Descargando datos desde {date_start} hasta {date_end}")
         print(f"✅ Data de TEMPO (HCHO) descargada en: {self.folder}")
+        return self._local_files(granule_urls)
 
         # consolidation removed from class; use module function merge_nc_to_parquet(folder, out_path, variables)
 
-    # Wrappers que crean un .netrc temporal si se encuentran variables de entorno
+    # Wrappers mantenidos por compatibilidad: EarthdataAuth ya lee EARTHDATA_USER/EARTHDATA_PASS
+    # y cachea el token, así que no hace falta crear ni borrar ~/.netrc en cada llamada.
     def download_data_today_with_netrc(self):
-        """Wrapper que crea .netrc desde EARTHDATA_USER/EARTHDATA_PASS (si existen) y llama a download_data_today()."""
-        created = create_netrc_from_env()
-        try:
-            return self.download_data_today()
-        finally:
-            if created:
-                remove_netrc_if_created()
+        """Llama a download_data_today() usando las credenciales de EARTHDATA_USER/EARTHDATA_PASS (si existen)."""
+        return self.download_data_today()
 
     def download_data_by_date_with_netrc(self, start: str, end: str, **kwargs):
-        """Wrapper que crea .netrc desde EARTHDATA_USER/EARTHDATA_PASS (si existen) y llama a download_data_by_date()."""
-        created = create_netrc_from_env()
-        try:
-            return self.download_data_by_date(start, end, **kwargs)
-        finally:
-            if created:
-                remove_netrc_if_created()
+        """Llama a download_data_by_date() usando las credenciales de EARTHDATA_USER/EARTHDATA_PASS (si existen)."""
+        return self.download_data_by_date(start, end, **kwargs)
 
     # class no longer performs cleaning/merging; use module functions clean_folder(folder) and
     # merge_nc_to_parquet(folder, out_path, variables)
@@ -134,61 +133,13 @@ class EarthDataHCHO:
 import os
 from pathlib import Path
 
-_NETRC_CREATED_BY_SCRIPT = None
-
-def create_netrc_from_env() -> bool:
-    """Crea ~/.netrc (en Windows $USERPROFILE) usando EARTHDATA_USER/EARTHDATA_PASS si están definidas.
-
-    Retorna True si creó el archivo (y lo marcó para borrado posterior), False si no hizo nada.
-    """
-    global _NETRC_CREATED_BY_SCRIPT
-    user = os.environ.get('EARTHDATA_USER')
-    pwd = os.environ.get('EARTHDATA_PASS')
-    if not user or not pwd:
-        return False
-
-    netrc_path = Path(os.path.expanduser('~')) / '.netrc'
-    if netrc_path.exists():
-        # No sobreescribir si ya existe
-        return False
-
-    content = f"machine urs.earthdata.nasa.gov login {user} password {pwd}\n"
-    netrc_path.write_text(content, encoding='ascii')
-
-    # Ajustar permisos en Windows: quitar herencia y dejar sólo lectura al usuario
-    try:
-        import subprocess
-        subprocess.run(['icacls', str(netrc_path), '/inheritance:r'], check=False)
-        subprocess.run(['icacls', str(netrc_path), '/grant:r', f"{os.environ.get('USERNAME')}:R"], check=False)
-    except Exception:
-        # Si falla, no es crítico; devolveremos True para intentar borrar luego
-        pass
-
-    _NETRC_CREATED_BY_SCRIPT = str(netrc_path)
-    return True
-
-
-def remove_netrc_if_created() -> None:
-    """Borra el .netrc creado por create_netrc_from_env() si existe.
-    No borra .netrcs previos a la ejecución.
-    """
-    global _NETRC_CREATED_BY_SCRIPT
-    if not _NETRC_CREATED_BY_SCRIPT:
-        return
-    try:
-        p = Path(_NETRC_CREATED_BY_SCRIPT)
-        if p.exists():
-            p.unlink()
-    finally:
-        _NETRC_CREATED_BY_SCRIPT = None
-
 def cmr_get_latest_granule_for_bbox(collection_concept_id: str, bbox: tuple, cmr_base: str = "https://cmr.earthdata.nasa.gov/search/granules.json") -> dict | None:
     """Consulta CMR y devuelve el metadato del granule más reciente que intersecta el bbox.
 
     bbox = (min_lon, min_lat, max_lon, max_lat)
     Retorna el diccionario del 'entry' de CMR o None si no hay resultados.
     """
-    import requests
+    from http_scheduler import default_scheduler
 
     bbox_str = ",".join(map(str, bbox))
     params = {
@@ -198,7 +149,7 @@ def cmr_get_latest_granule_for_bbox(collection_concept_id: str, bbox: tuple, cmr
         "sort_key": "-start_date",
     }
 
-    r = requests.get(cmr_base, params=params, timeout=30)
+    r = default_scheduler().get(None, cmr_base, params=params, timeout=30)
     r.raise_for_status()
     results = r.json()
     items = results.get("feed", {}).get("entry", [])
@@ -207,83 +158,198 @@ def cmr_get_latest_granule_for_bbox(collection_concept_id: str, bbox: tuple, cmr
     return items[0]
 
 
-def harmony_download_subset_for_granule(granule_entry: dict, collection_id: str, variables: list[str], bbox: tuple, out_dir: str, username: str | None = None, password: str | None = None) -> list[str] | None:
-    """Usa harmony-py para solicitar un subset del granule dado (si harmony está disponible).
+def _parse_iso(s):
+    from datetime import datetime
 
-    - granule_entry: diccionario devuelto por CMR (entry)
-    - collection_id: concept id de la colección (ej. C3685912035-LARC_CLOUD)
-    - variables: lista de variables a incluir en el subset
-    - bbox: tupla (min_lon, min_lat, max_lon, max_lat)
-    - out_dir: carpeta donde guardar
-    Si harmony no está instalado, retorna None.
-    """
-    # import locales para no tocar cabeceras
+    if s is None:
+        return None
     try:
-        from harmony import Client, Collection, Request
-        from harmony.config import Environment
+        # datetime.fromisoformat acepta offsets en Python 3.11+
+        return datetime.fromisoformat(s)
     except Exception:
-        return None
+        # fallback: try common formats
+        try:
+            return datetime.strptime(s[:19], "%Y-%m-%dT%H:%M:%S")
+        except Exception:
+            return None
 
-    # Extraer temporal del granule
-    time_start = granule_entry.get("time_start") or granule_entry.get("start_time")
-    time_end = granule_entry.get("time_end") or granule_entry.get("end_time")
 
-    from datetime import datetime
+def _granule_id(granule_entry: dict) -> str | None:
+    """Identificador estable de un entry de CMR (concept id o, en su defecto, el título)."""
+    return granule_entry.get("id") or granule_entry.get("producer_granule_id") or granule_entry.get("title")
 
-    def _parse_iso(s):
-        if s is None:
-            return None
-        try:
-            # datetime.fromisoformat acepta offsets en Python 3.11+
-            return datetime.fromisoformat(s)
-        except Exception:
-            # fallback: try common formats
-            try:
-                return datetime.strptime(s[:19], "%Y-%m-%dT%H:%M:%S")
-            except Exception:
-                return None
 
-    start_dt = _parse_iso(time_start)
-    end_dt = _parse_iso(time_end)
+def _union_bbox(bboxes) -> tuple:
+    bboxes = list(bboxes)
+    return (
+        min(b[0] for b in bboxes),
+        min(b[1] for b in bboxes),
+        max(b[2] for b in bboxes),
+        max(b[3] for b in bboxes),
+    )
+
 
-    # Preparar cliente
-    auth = (username, password) if username and password else None
-    client = Client(env=Environment.PROD, auth=auth)
+def _harmony_request(granule_entry: dict, collection_id: str, variables: list[str], bbox: tuple):
+    """Construye la solicitud Harmony para un granule.
+
+    Si harmony-py está instalado devuelve un ``harmony.Request``; si no, devuelve el dict de
+    argumentos (formato que acepta ``harmony_local.LocalHarmonyClient``).
+    """
+    # Extraer temporal del granule
+    start_dt = _parse_iso(granule_entry.get("time_start") or granule_entry.get("start_time"))
+    end_dt = _parse_iso(granule_entry.get("time_end") or granule_entry.get("end_time"))
 
     req_kwargs = {
-        "collection": Collection(id=collection_id),
+        "collection": collection_id,
         "variables": variables,
+        "bbox": bbox,
     }
+    granule_id = _granule_id(granule_entry)
+    if granule_id:
+        req_kwargs["granule_id"] = [granule_id]
     if start_dt and end_dt:
         req_kwargs["temporal"] = {"start": start_dt, "stop": end_dt}
-    # spatial/bbox puede aceptarse por algunas versiones de harmony-py
+
+    try:
+        from harmony import BBox, Collection, Request
+    except Exception:
+        return req_kwargs
+
+    req_kwargs["collection"] = Collection(id=collection_id)
+    req_kwargs["spatial"] = BBox(*req_kwargs.pop("bbox"))
+    return Request(**req_kwargs)
+
+
+def _harmony_client(username: str | None = None, password: str | None = None):
+    """Cliente harmony-py de producción, o None si harmony no está instalado."""
     try:
-        req_kwargs["bbox"] = bbox
+        from harmony import Client
+        from harmony.config import Environment
     except Exception:
-        # no hacer nada si la versión no lo acepta
-        pass
+        return None
+    auth = (username, password) if username and password else None
+    return Client(env=Environment.PROD, auth=auth)
+
+
+HARMONY_TERMINAL_STATUSES = {"successful", "failed", "canceled", "complete_with_errors"}
+
+
+def wait_for_harmony_jobs(client, job_ids: list[str], poll_interval: float = 5.0, timeout: float | None = None) -> dict[str, dict]:
+    """Consulta el estado de varios jobs Harmony en un mismo bucle hasta que todos terminen.
+
+    Retorna un dict job_id -> último estado devuelto por ``client.status``. Los jobs que no
+    terminan antes de ``timeout`` segundos quedan con su último estado (p.ej. 'running').
+    """
+    import time
+
+    pending = set(job_ids)
+    statuses: dict[str, dict] = {}
+    started = time.monotonic()
+    while pending:
+        for job_id in list(pending):
+            statuses[job_id] = client.status(job_id)
+            if statuses[job_id].get("status") in HARMONY_TERMINAL_STATUSES:
+                pending.discard(job_id)
+        if not pending:
+            break
+        if timeout is not None and time.monotonic() - started > timeout:
+            print(f"⚠️ {len(pending)} job(s) Harmony sin terminar tras {timeout}s")
+            break
+        time.sleep(poll_interval)
+    return statuses
+
+
+def harmony_download_subset_for_granule(granule_entry: dict, collection_id: str, variables: list[str], bbox: tuple, out_dir: str, username: str | None = None, password: str | None = None, client=None) -> list[str] | None:
+    """Usa harmony-py para solicitar un subset del granule dado (si harmony está disponible).
+
+    - granule_entry: diccionario devuelto por CMR (entry)
+    - collection_id: concept id de la colección (ej. C3685912035-LARC_CLOUD)
+    - variables: lista de variables a incluir en el subset
+    - bbox: tupla (min_lon, min_lat, max_lon, max_lat)
+    - out_dir: carpeta donde guardar
+    - client: cliente Harmony ya construido (p.ej. ``harmony_local.LocalHarmonyClient``)
+    Si harmony no está instalado y no se pasa client, retorna None.
+    """
+    client = client or _harmony_client(username, password)
+    if client is None:
+        return None
 
-    request = Request(**req_kwargs)
-    job_id = client.submit(request)
+    job_id = client.submit(_harmony_request(granule_entry, collection_id, variables, bbox))
     client.wait_for_processing(job_id, show_progress=True)
     results = client.download_all(job_id, directory=out_dir, overwrite=True)
     all_results = [f.result() for f in results]
     return all_results
 
 
-def process_zones_latest_granule(zones: list[tuple], collection_id: str, variables: list[str], out_dir: str, username: str | None = None, password: str | None = None) -> dict:
+def process_zones_latest_granule(zones: list[tuple], collection_id: str, variables: list[str], out_dir: str, username: str | None = None, password: str | None = None, client=None, cmr_lookup=None, max_workers: int = 8, poll_interval: float = 5.0, timeout: float | None = None) -> dict:
     """Para cada bbox en zones obtiene el último granule (CMR) y (si puede) descarga el subset via Harmony.
 
+    Las consultas a CMR se lanzan en paralelo. Las zonas que resuelven al mismo granule se
+    agrupan en un solo job Harmony con el bbox unión; todos los jobs se envían a la vez y se
+    consultan juntos con ``wait_for_harmony_jobs``.
+
     zones: lista de bbox tuples (min_lon, min_lat, max_lon, max_lat)
-    Retorna un dict mapping zona -> {"granule": entry or None, "files": list[str] or None}
+    client / cmr_lookup: permiten inyectar sustitutos locales (ver harmony_local.py)
+    Retorna un dict mapping zona -> {"granule": entry or None, "files": list[str] or None,
+    "job_id": str or None, "bbox": bbox usado en el subset}
     """
-    results = {}
-    for bbox in zones:
-        granule = cmr_get_latest_granule_for_bbox(collection_id, bbox)
-        files = None
-        if granule is not None:
-            files = harmony_download_subset_for_granule(granule, collection_id, variables, bbox, out_dir, username, password)
-        results[bbox] = {"granule": granule, "files": files}
+    from concurrent.futures import ThreadPoolExecutor
+
+    cmr_lookup = cmr_lookup or cmr_get_latest_granule_for_bbox
+    zones = list(dict.fromkeys(zones))
+    workers = max(1, min(max_workers, len(zones) or 1))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        granules = dict(zip(zones, pool.map(lambda bbox: cmr_lookup(collection_id, bbox), zones)))
+
+    results = {bbox: {"granule": granule, "files": None, "job_id": None, "bbox": bbox} for bbox, granule in granules.items()}
+
+    # Agrupar zonas por granule: un solo subset con el bbox unión
+    groups: dict[str, list[tuple]] = {}
+    entries: dict[str, dict] = {}
+    for bbox, granule in granules.items():
+        if granule is None:
+            continue
+        key = _granule_id(granule) or str(bbox)
+        groups.setdefault(key, []).append(bbox)
+        entries[key] = granule
+
+    if not groups:
+        return results
+
+    client = client or _harmony_client(username, password)
+    if client is None:
+        return results
+
+    n_zones = sum(len(bboxes) for bboxes in groups.values())
+    if len(groups) < n_zones:
+        print(f"🔗 {n_zones} zonas agrupadas en {len(groups)} granule(s)")
+
+    def _submit(key):
+        union = _union_bbox(groups[key])
+        return client.submit(_harmony_request(entries[key], collection_id, variables, union)), union
+
+    keys = list(groups)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as pool:
+        submitted = dict(zip(keys, pool.map(_submit, keys)))
+
+    statuses = wait_for_harmony_jobs(client, [job_id for job_id, _ in submitted.values()], poll_interval=poll_interval, timeout=timeout)
+
+    def _download(key):
+        job_id, _ = submitted[key]
+        status = statuses.get(job_id, {}).get("status")
+        if status not in ("successful", "complete_with_errors"):
+            print(f"❌ Job Harmony {job_id} terminó con estado: {status}")
+            return None
+        return [f.result() for f in client.download_all(job_id, directory=out_dir, overwrite=True)]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as pool:
+        files = dict(zip(keys, pool.map(_download, keys)))
+
+    for key, bboxes in groups.items():
+        job_id, union = submitted[key]
+        for bbox in bboxes:
+            results[bbox].update({"files": files[key], "job_id": job_id, "bbox": union})
     return results
 
 
@@ -355,7 +421,12 @@ def procesar_nc_a_parquet(
     variables, 
     nombre_resultado="resultado", 
     unidades_resultado="", 
-    output_name="datos_resultado.parquet"
+    output_name="datos_resultado.parquet",
+    compact=False,
+    compression="snappy",
+    compression_level=None,
+    row_group_size=None,
+    archivos=None
 ):
     """
     Lee archivos .nc dentro de una carpeta, extrae variables específicas y guarda los datos combinados en un .parquet.
@@ -376,11 +447,19 @@ def procesar_nc_a_parquet(
         Unidades del resultado, se agregan como atributo en el archivo parquet.
     output_name : str
         Nombre del archivo parquet de salida.
+    compact : bool
+        Si es True, guarda el esquema compacto (float32, tiempo como segundos epoch int64).
+    compression, compression_level, row_group_size :
+        Codec (snappy/zstd/lz4/gzip/none), nivel y tamaño de row group del parquet.
+    archivos : list, opcional
+        Rutas .nc a combinar (p. ej. las descargadas en esta ejecución). Por defecto,
+        todos los .nc de la carpeta.
 
     Retorna:
     ---------
-    str
-        Ruta completa del archivo .parquet generado.
+    str | None
+        Ruta completa del archivo .parquet generado, o None si ningún granule tenía
+        píxeles válidos.
     """
 
     carpeta = os.path.join(root_dir, data_dir)
@@ -388,86 +467,47 @@ def procesar_nc_a_parquet(
     if not os.path.exists(carpeta):
         raise FileNotFoundError(f"La carpeta '{carpeta}' no existe.")
 
-    archivos_nc = sorted([os.path.join(carpeta, f) for f in os.listdir(carpeta) if f.endswith(".nc")])
+    if archivos is not None:
+        archivos_nc = sorted(str(p) for p in archivos)
+    else:
+        archivos_nc = sorted([os.path.join(carpeta, f) for f in os.listdir(carpeta) if f.endswith(".nc")])
     if not archivos_nc:
         raise FileNotFoundError(f"No se encontraron archivos .nc en '{carpeta}'.")
 
-    df_total = pd.DataFrame()
-
     # Separar variables base y variable de resultado
     *vars_base, var_resultado = variables
 
-    for archivo in archivos_nc:
-        print(f"📂 Leyendo archivo: {archivo}")
-
-        with h5netcdf.File(archivo, 'r') as f:
-            datos = {}
-            for var in vars_base + [var_resultado]:
-                try:
-                    datos[var] = f[var][:]
-                except KeyError:
-                    raise KeyError(f"La variable '{var}' no se encontró en el archivo {archivo}.")
-
-            # Atributos del tiempo (si existe)
-            time_attrs = f[vars_base[-1]].attrs if "time" in vars_base[-1] else {}
-            time_units = time_attrs.get('units', '')
-            calendar = time_attrs.get('calendar', 'standard')
-
-        # Renombrar variables base
-        lat = datos[vars_base[0]]
-        lon = datos[vars_base[1]]
-        time = datos[vars_base[2]] if len(vars_base) > 2 else None
-        valor = datos[var_resultado]
-
-        # Ajustar formas si difieren
-        if valor.shape != lat.shape:
-            min_shape = tuple(np.minimum(lat.shape, valor.shape))
-            lat = lat[:min_shape[0], :min_shape[1]]
-            lon = lon[:min_shape[0], :min_shape[1]]
-            valor = valor[:min_shape[0], :min_shape[1]]
-
-        # Expandir el tiempo
-        if time is not None:
-            if len(time.shape) == 1:
-                if len(time) == lat.shape[0]:
-                    time_expand = np.repeat(time[:, np.newaxis], lat.shape[1], axis=1)
-                elif len(time) == 1:
-                    time_expand = np.full_like(lat, time[0], dtype=float)
-                else:
-                    time_expand = np.full_like(lat, np.mean(time), dtype=float)
-            else:
-                time_expand = time
-
-            # Convertir tiempo
-            try:
-                if "since" in time_units:
-                    times_dt = xr.coding.times.decode_cf_datetime(time_expand, units=time_units, calendar=calendar)
-                else:
-                    times_dt = pd.to_datetime(time_expand, unit='s', errors='coerce')
-            except Exception as e:
-                print(f"⚠️ Error al convertir tiempo: {e}")
-                times_dt = pd.to_datetime(time_expand, unit='s', errors='coerce')
-        else:
-            times_dt = np.full_like(lat, np.nan)
-
-        # Crear DataFrame
-        df = pd.DataFrame({
-            'latitud': lat.flatten(),
-            'longitud': lon.flatten(),
-            'tiempo': times_dt.flatten(),
-            nombre_resultado: valor.flatten()
-        })
-
-        # Limpiar valores no válidos
-        df = df.replace([np.inf, -np.inf], np.nan).dropna(subset=[nombre_resultado])
-        df_total = pd.concat([df_total, df], ignore_index=True)
+    # Spec ad-hoc a partir de la lista posicional (lat, lon, [time], resultado);
+    # para productos conocidos usa directamente ingestion.PRODUCTS.
+    spec = adhoc_spec(
+        nombre_resultado,
+        {nombre_resultado: var_resultado},
+        latitude=vars_base[0],
+        longitude=vars_base[1],
+        time=vars_base[2] if len(vars_base) > 2 else None,
+        coord_columns=("tiempo", "latitud", "longitud"),
+    )
 
     # Guardar en formato parquet con metadatos
     output_path = os.path.join(root_dir, output_name)
-    df_total.to_parquet(output_path, index=False)
+    metadata = {b"units": unidades_resultado.encode()} if unidades_resultado else None
+    escrito = ingest(
+        spec,
+        archivos_nc,
+        output_path,
+        compact=compact,
+        compression=compression,
+        compression_level=compression_level,
+        row_group_size=row_group_size,
+        metadata=metadata,
+        source_column=None,
+    )
+
+    if escrito is None:
+        print(f"⚠️ Ningún granule tenía píxeles válidos; no se generó {output_path}")
+        return None
 
     print(f"\n✅ Archivo Parquet generado: {output_path}")
-    print(f"📊 Total de registros: {len(df_total)}")
     print(f"⚙️ Campo resultado: {nombre_resultado} ({unidades_resultado})")
 
     return output_path
@@ -476,9 +516,9 @@ def main():
     # CONCEPTS_ID
     # C2930725014-LARC_CLOUD
     # C3685912035-LARC_CLOUD
-    root_dir="./hcho_data"
-    data_dir="data_today"
-    clean_folder(root_dir)
+    # Ya no se borra todo en cada ejecución: el almacén conserva los granules
+    # descargados y solo expulsa (LRU) lo necesario para respetar el presupuesto.
+    store = GranuleStore("./hcho_data", budget=os.environ.get("GRANULE_STORE_BUDGET", DEFAULT_BUDGET))
     # Definición de rutas
     root_dir = Path("./hcho_data").resolve()
     data_dir = root_dir / "data_today"
@@ -500,8 +540,13 @@ def main():
 
     earthdata = EarthDataHCHO(concept_id="C3685912035-LARC_CLOUD",root_dir="./hcho_data",data_dir="data_today")
 
-    # Download into the configured data folder
-    earthdata.download_data_today()
+    # Download into the configured data folder; solo se combinan los granules de esta
+    # ejecución, no los de días anteriores que el almacén conserva en data_today
+    archivos = earthdata.download_data_today()
+    if not archivos:
+        print("⚠️ No hay granules nuevos que combinar.")
+        store.gc()
+        return
 
     # Merge downloaded .nc files into a single parquet file using the
     # module-level function. The class intentionally does not perform
@@ -518,15 +563,21 @@ def main():
         "product/vertical_column"
     ]
 
-    procesar_nc_a_parquet(
+    output_path = procesar_nc_a_parquet(
         root_dir=root,
         data_dir=data_folder,
         variables=variables,
         nombre_resultado="HCHO_molecules_per_cm2",
         unidades_resultado="molec/cm²",
-        output_name="hcho_combinado.parquet"
+        output_name="hcho_combinado.parquet",
+        archivos=archivos,
     )
 
+    # Registrar el uso de los granules para el orden LRU y, ya con lo descargado,
+    # expulsar lo necesario para respetar el presupuesto
+    store.touch(*archivos, *([output_path] if output_path else []))
+    store.gc()
+
 
 if __name__ == "__main__":
     main()
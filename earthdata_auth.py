@@ -0,0 +1,204 @@
+"""
+Earthdata Login credential and session manager.
+
+Obtains an Earthdata Login (URS) bearer token once, caches it on disk with
+its expiry and reuses it for every download and run until it is close to
+expiring. URS cookies are persisted too, so the OAuth redirect dance is
+only paid when the token cannot be used.
+
+Credentials are read from EARTHDATA_USER / EARTHDATA_PASS or, failing
+that, from the ``urs.earthdata.nasa.gov`` entry of ``~/.netrc``; nothing
+is written to ``~/.netrc``.
+
+``urs_local.LocalURS`` provides a mock URS for offline testing:
+
+    with LocalURS("user", "pass") as urs:
+        auth = EarthdataAuth("user", "pass", urs_url=urs.url, cache_dir=tmp)
+        session = auth.session()
+"""
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from http.cookiejar import LWPCookieJar
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+
+from logger import setup_logging
+
+logger = setup_logging(debug=False, name='earthdata_auth')
+
+URS_URL = "https://urs.earthdata.nasa.gov"
+DEFAULT_CACHE_DIR = Path("~/.cache/earthdata").expanduser()
+TOKEN_DATE_FMT = "%m/%d/%Y"
+
+
+def _write_private(path: Path, content: str) -> None:
+    """Write ``content`` to ``path`` readable only by the current user (0600)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(content)
+    os.replace(tmp, path)
+
+
+class EarthdataAuth:
+    def __init__(
+        self,
+        username: str | None = None,
+        password: str | None = None,
+        urs_url: str = URS_URL,
+        cache_dir: str | Path | None = None,
+        refresh_margin: timedelta = timedelta(days=1),
+    ):
+        self.urs_url = urs_url.rstrip("/")
+        self.urs_host = urlparse(self.urs_url).hostname
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else DEFAULT_CACHE_DIR
+        self.token_path = self.cache_dir / "token.json"
+        self.cookie_path = self.cache_dir / "cookies.txt"
+        self.refresh_margin = refresh_margin
+        self._username = username
+        self._password = password
+        self._token: dict | None = None
+        self._lock = threading.Lock()
+
+    def credentials(self) -> tuple[str, str] | None:
+        """Return (user, password) from the constructor, the environment or ~/.netrc."""
+        if self._username and self._password:
+            return self._username, self._password
+        user = os.environ.get("EARTHDATA_USER")
+        pwd = os.environ.get("EARTHDATA_PASS")
+        if user and pwd:
+            return user, pwd
+        try:
+            import netrc
+            auth = netrc.netrc().authenticators(self.urs_host)
+            if auth:
+                login, _, password = auth
+                return login, password
+        except Exception:
+            pass
+        return None
+
+    def _token_is_valid(self, token: dict | None) -> bool:
+        if not token or "access_token" not in token:
+            return False
+        try:
+            expires = datetime.fromisoformat(token["expires_at"])
+        except (KeyError, ValueError):
+            return False
+        return datetime.now(timezone.utc) + self.refresh_margin < expires
+
+    def _load_cached_token(self) -> dict | None:
+        try:
+            token = json.loads(self.token_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        # The token belongs to one account: switching users must not reuse it
+        creds = self.credentials()
+        if token.get("urs_url") != self.urs_url or token.get("username") != (creds[0] if creds else None):
+            return None
+        return token
+
+    def _request_token(self) -> dict:
+        creds = self.credentials()
+        if creds is None:
+            raise ValueError("No Earthdata credentials: set EARTHDATA_USER/EARTHDATA_PASS or add urs.earthdata.nasa.gov to ~/.netrc")
+        r = requests.post(f"{self.urs_url}/api/users/find_or_create_token", auth=creds, timeout=30)
+        r.raise_for_status()
+        payload = r.json()
+        expires = datetime.strptime(payload["expiration_date"], TOKEN_DATE_FMT).replace(tzinfo=timezone.utc)
+        logger.info(f"Obtained Earthdata token (expires {expires.date()})")
+        return {
+            "access_token": payload["access_token"],
+            "expires_at": expires.isoformat(),
+            "urs_url": self.urs_url,
+            "username": creds[0],
+        }
+
+    def token(self, force_refresh: bool = False) -> str:
+        """Return a valid bearer token, reusing the in-memory or on-disk cache when possible."""
+        if not force_refresh:
+            if self._token_is_valid(self._token):
+                return self._token["access_token"]
+            cached = self._load_cached_token()
+            if self._token_is_valid(cached):
+                logger.debug("Reusing cached Earthdata token")
+                self._token = cached
+                return cached["access_token"]
+        self._token = self._request_token()
+        _write_private(self.token_path, json.dumps(self._token))
+        return self._token["access_token"]
+
+    def invalidate(self) -> None:
+        """Forget the cached token (e.g. after the server rejected it with 401)."""
+        self._token = None
+        self.token_path.unlink(missing_ok=True)
+
+    def refresh(self, session: requests.Session, rejected: str | None = None) -> bool:
+        """
+        Replace a bearer header the server rejected with a freshly requested token.
+
+        ``rejected`` is the Authorization header the failed request carried; if the
+        session already holds a different one another thread refreshed it first and
+        the token is not requested again. Returns True if the request is worth retrying.
+        """
+        with self._lock:
+            if rejected is not None and session.headers.get("Authorization") != rejected:
+                return True
+            self.invalidate()
+            try:
+                session.headers["Authorization"] = f"Bearer {self.token(force_refresh=True)}"
+            except Exception as e:
+                logger.warning(f"Could not refresh the Earthdata token: {e}")
+                return False
+        logger.info("Earthdata token rejected, refreshed it")
+        return True
+
+    def apply(self, session: requests.Session) -> requests.Session:
+        """
+        Attach the bearer token and the persisted URS cookies to ``session``.
+
+        If no token can be obtained the session is left to fall back to
+        ~/.netrc and the cookie jar.
+        """
+        jar = LWPCookieJar(str(self.cookie_path))
+        try:
+            jar.load(ignore_discard=True)
+        except OSError:
+            pass
+        session.cookies = jar
+        try:
+            session.headers["Authorization"] = f"Bearer {self.token()}"
+        except Exception as e:
+            logger.warning(f"Earthdata token unavailable, using .netrc/cookies: {e}")
+        return session
+
+    def session(self, pool_size: int = 8) -> requests.Session:
+        """Build a pooled, authenticated requests.Session."""
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return self.apply(session)
+
+    def save(self, session: requests.Session) -> None:
+        """Persist the session cookies (0600) so the next run skips the URS redirect."""
+        jar = session.cookies
+        if isinstance(jar, LWPCookieJar):
+            # Same format as LWPCookieJar.save, but the file is created 0600 from the start
+            _write_private(self.cookie_path, "#LWP-Cookies-2.0\n" + jar.as_lwp_str(ignore_discard=True))
+
+
+_default_auth: EarthdataAuth | None = None
+
+
+def default_auth() -> EarthdataAuth:
+    """Process-wide EarthdataAuth so every downloader shares one token."""
+    global _default_auth
+    if _default_auth is None:
+        _default_auth = EarthdataAuth(urs_url=os.environ.get("EARTHDATA_URS_URL", URS_URL))
+    return _default_auth
@@ -0,0 +1,291 @@
+"""
+Ingeniería de características del modelo XGBoost (``Lectura_XGBRegressor_NASA.ipynb``) en streaming.
+
+El cuaderno construye las características celda a celda sobre DataFrames completos:
+aplana ángulos de geolocalización, arma máscaras de NaN, deriva hour/dayofyear/month/
+weekday con ``.dt``, une la meteorología con ``floor('H')`` y calcula ``NO2_prev`` con
+``sort_values`` + ``groupby(['lat', 'lon']).shift`` sobre claves float. Aquí:
+
+1. cada granule L2 se lee con ``ingestion.read_granule`` (arrays crudos con h5netcdf,
+   máscara de validez en NumPy, tiempo decodificado una vez por scanline), y los
+   granules se leen en paralelo en procesos separados;
+2. ``row_features`` añade a cada tabla/lote Arrow las características por fila
+   (calendario desde segundos epoch, ``cell_id`` entero de ``colocation.GridSpec`` y
+   ``time_bin`` horario para las uniones) sin pasar por pandas;
+3. ``LagState`` calcula ``NO2_prev`` por píxel con un desplazamiento ordenado por
+   (cell_id, time) y guarda la última observación de cada celda, así que el retardo
+   continúa entre granules y lotes, y el mismo estado sirve para inferencia.
+
+Entrenamiento e inferencia usan las mismas funciones y ``feature_matrix`` con el
+mismo orden de columnas:
+
+    python features.py ./tempo_l2 ./features/no2_features.parquet --workers 4 --state ./features/lag_state.npz
+
+    state = LagState.load("./features/lag_state.npz")
+    table = state.apply(row_features(pixels))
+    X = feature_matrix(table)
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from colocation import DEFAULT_GRID, GridSpec, epoch_seconds
+from ingestion import ProductSpec, read_granule
+
+# Mismas variables y nombres que el cuaderno
+NO2_L2_FEATURES = ProductSpec(
+    name="no2_l2_features",
+    short_name="TEMPO_NO2_L2",
+    version="V03",
+    variables={
+        "NO2": "product/vertical_column_troposphere",
+        "solar_zenith": "geolocation/solar_zenith_angle",
+        "solar_azimuth": "geolocation/solar_azimuth_angle",
+        "viewing_zenith": "geolocation/viewing_zenith_angle",
+        "relative_azimuth": "geolocation/relative_azimuth_angle",
+    },
+    latitude="geolocation/latitude",
+    longitude="geolocation/longitude",
+    time="geolocation/time",
+    time_layout="scanline",
+    coord_columns=("time", "lat", "lon"),
+)
+TARGET = "NO2"
+LAG_COLUMN = "NO2_prev"
+CALENDAR_COLUMNS = ("hour", "dayofyear", "month", "weekday")
+METEO_COLUMNS = ("temperature_2m", "pressure_msl", "windspeed_10m", "winddirection_10m")
+FEATURE_COLUMNS = (
+    "lat", "lon",
+    "solar_zenith", "solar_azimuth",
+    "viewing_zenith", "relative_azimuth",
+    "hour", "dayofyear", *METEO_COLUMNS,
+)
+
+
+def calendar_features(seconds: np.ndarray) -> dict[str, np.ndarray]:
+    """hour, dayofyear, month y weekday (lunes=0) desde segundos epoch UTC, sin pandas."""
+    seconds = np.asarray(seconds, dtype=np.int64)
+    days = (seconds // 86400).astype("datetime64[D]")
+    years = days.astype("datetime64[Y]")
+    months = days.astype("datetime64[M]")
+    return {
+        "hour": ((seconds % 86400) // 3600).astype(np.int8),
+        "dayofyear": ((days - years.astype("datetime64[D]")).astype(np.int64) + 1).astype(np.int16),
+        "month": ((months - years.astype("datetime64[M]")).astype(np.int64) + 1).astype(np.int8),
+        # 1970-01-01 fue jueves
+        "weekday": ((seconds // 86400 + 3) % 7).astype(np.int8),
+    }
+
+
+def row_features(table: pa.Table | pa.RecordBatch, grid: GridSpec = DEFAULT_GRID, time_col: str = "time", lat_col: str = "lat", lon_col: str = "lon", bin_seconds: int = 3600) -> pa.Table:
+    """
+    Añade las características que solo dependen de la fila: calendario, ``cell_id``
+    (píxel entero de la malla) y ``time_bin`` (inicio de la hora, el ``floor('H')``
+    del cuaderno, en segundos epoch). No cambia el número ni el orden de filas.
+    """
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+    seconds = epoch_seconds(table.column(time_col))
+    lat = table.column(lat_col).to_numpy()
+    lon = table.column(lon_col).to_numpy()
+    for name, values in calendar_features(seconds).items():
+        table = table.append_column(name, pa.array(values))
+    table = table.append_column("cell_id", pa.array(grid.cell_ids(lat, lon)))
+    return table.append_column("time_bin", pa.array(seconds // bin_seconds * bin_seconds))
+
+
+def hourly_join(table: pa.Table, hourly: pa.Table, keys: Sequence[str] = ("time_bin",)) -> pa.Table:
+    """
+    Unión izquierda con una tabla horaria (p.ej. meteorología) por ``time_bin`` y,
+    si ``hourly`` las tiene, otras claves enteras como ``cell_id``: hash join de Arrow
+    en lugar de ``merge`` de pandas sobre timestamps.
+    """
+    return table.join(hourly, keys=list(keys), join_type="left outer", use_threads=True)
+
+
+class LagState:
+    """
+    Última observación de cada píxel, para retardos que continúan entre lotes.
+
+    ``apply`` ordena el lote por (cell_id, time), toma el valor anterior del mismo
+    píxel dentro del lote y, para la primera fila de cada píxel, el guardado en el
+    estado; después actualiza el estado con la última fila de cada píxel. Los lotes
+    deben llegar en orden de tiempo (un granule detrás de otro).
+    """
+
+    def __init__(self, cells: np.ndarray | None = None, values: np.ndarray | None = None, times: np.ndarray | None = None, max_gap: int | None = None):
+        self.cells = np.empty(0, dtype=np.int64) if cells is None else np.asarray(cells, dtype=np.int64)
+        self.values = np.empty(0, dtype=np.float64) if values is None else np.asarray(values, dtype=np.float64)
+        self.times = np.empty(0, dtype=np.int64) if times is None else np.asarray(times, dtype=np.int64)
+        self.max_gap = max_gap
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def apply(self, table: pa.Table, column: str = TARGET, name: str = LAG_COLUMN, time_col: str = "time", update: bool = True) -> pa.Table:
+        """Tabla ordenada por (cell_id, time) con la columna ``name``; NaN si no hay anterior."""
+        cells = table.column("cell_id").to_numpy()
+        seconds = epoch_seconds(table.column(time_col))
+        order = np.lexsort((seconds, cells))
+        table = table.take(pa.array(order))
+        cells, seconds = cells[order], seconds[order]
+        values = table.column(column).to_numpy(zero_copy_only=False).astype(np.float64)
+
+        n = len(cells)
+        prev = np.full(n, np.nan)
+        prev_time = np.full(n, np.iinfo(np.int64).min // 2)
+        same = cells[1:] == cells[:-1]
+        prev[1:] = np.where(same, values[:-1], np.nan)
+        prev_time[1:] = seconds[:-1]
+
+        first = np.flatnonzero(np.r_[True, ~same]) if n else np.empty(0, dtype=np.int64)
+        if len(self.cells) and len(first):
+            k = np.searchsorted(self.cells, cells[first])
+            k_clip = np.minimum(k, len(self.cells) - 1)
+            found = (k < len(self.cells)) & (self.cells[k_clip] == cells[first])
+            prev[first[found]] = self.values[k_clip[found]]
+            prev_time[first[found]] = self.times[k_clip[found]]
+        if self.max_gap is not None:
+            prev[(seconds - prev_time) > self.max_gap] = np.nan
+
+        if update and n:
+            last = np.flatnonzero(np.r_[~same, True])
+            self._update(cells[last], values[last], seconds[last])
+        return table.append_column(name, pa.array(prev.astype(np.float32)))
+
+    def _update(self, cells: np.ndarray, values: np.ndarray, times: np.ndarray) -> None:
+        keep = ~np.isin(self.cells, cells, assume_unique=True)
+        merged_cells = np.concatenate([self.cells[keep], cells])
+        order = np.argsort(merged_cells, kind="stable")
+        self.cells = merged_cells[order]
+        self.values = np.concatenate([self.values[keep], values])[order]
+        self.times = np.concatenate([self.times[keep], times])[order]
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, cells=self.cells, values=self.values, times=self.times, max_gap=-1 if self.max_gap is None else self.max_gap)
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "LagState":
+        with np.load(path) as data:
+            max_gap = int(data["max_gap"])
+            return cls(data["cells"], data["values"], data["times"], None if max_gap < 0 else max_gap)
+
+
+def feature_matrix(table: pa.Table, columns: Sequence[str] = FEATURE_COLUMNS) -> np.ndarray:
+    """(n, len(columns)) float32 en el orden de ``columns``; las ausentes (p.ej. sin meteorología) son NaN."""
+    out = np.full((table.num_rows, len(columns)), np.nan, dtype=np.float32)
+    names = set(table.column_names)
+    for j, c in enumerate(columns):
+        if c in names:
+            out[:, j] = table.column(c).to_numpy(zero_copy_only=False)
+    return out
+
+
+def granule_features(path: str | Path, spec: ProductSpec = NO2_L2_FEATURES, grid: GridSpec = DEFAULT_GRID) -> pa.Table | None:
+    """Píxeles válidos de un granule con sus características por fila (sin retardos)."""
+    table = read_granule(path, spec, source_column=None)
+    if table is None or table.num_rows == 0:
+        return None
+    t_col, lat_col, lon_col = spec.coord_columns
+    return row_features(table, grid, time_col=t_col, lat_col=lat_col, lon_col=lon_col)
+
+
+def _granule_features_or_none(args):
+    path, spec, grid = args
+    try:
+        return granule_features(path, spec, grid)
+    except Exception as e:
+        print(f"❌ Error en {path}: {e}")
+        return None
+
+
+def iter_granule_features(files: Iterable[str | Path], spec: ProductSpec = NO2_L2_FEATURES, grid: GridSpec = DEFAULT_GRID, max_workers: int = 1, lag_state: LagState | None = None, chunk_rows: int = 262_144, enrich: Callable[[pa.Table], pa.Table] | None = None) -> Iterator[pa.Table]:
+    """
+    Tablas de características de ``files`` en orden (por nombre, que en TEMPO es el
+    orden de tiempo), en trozos de como mucho ``chunk_rows`` filas.
+
+    Las características por fila se calculan en ``max_workers`` procesos; los retardos
+    se aplican en este proceso granule a granule, en orden, con ``lag_state``, y
+    después ``enrich`` (p.ej. ``meteo.MeteoEnricher.enrich``) a cada trozo.
+    """
+    files = sorted(str(p) for p in files)
+    lag_state = lag_state if lag_state is not None else LagState()
+    jobs = [(p, spec, grid) for p in files]
+    if max_workers > 1 and len(files) > 1:
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+        tables = pool.map(_granule_features_or_none, jobs)
+    else:
+        pool = None
+        tables = map(_granule_features_or_none, jobs)
+    try:
+        for table in tables:
+            if table is None:
+                continue
+            table = lag_state.apply(table)
+            for batch in table.to_batches(max_chunksize=chunk_rows):
+                chunk = pa.Table.from_batches([batch])
+                yield enrich(chunk) if enrich is not None else chunk
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def build_features(files: Iterable[str | Path], out_path: str | Path, spec: ProductSpec = NO2_L2_FEATURES, grid: GridSpec = DEFAULT_GRID, max_workers: int = 1, lag_state: LagState | None = None, compression: str = "zstd", chunk_rows: int = 262_144, enrich: Callable[[pa.Table], pa.Table] | None = None) -> Path | None:
+    """Escribe las características de ``files`` en un Parquet, un row group por trozo."""
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    writer = None
+    rows = 0
+    try:
+        for table in iter_granule_features(files, spec, grid, max_workers, lag_state, chunk_rows, enrich):
+            if writer is None:
+                writer = pq.ParquetWriter(str(out_path), table.schema, compression=compression)
+            writer.write_table(table.cast(writer.schema))
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        print("⚠️ Sin píxeles válidos")
+        return None
+    print(f"✅ {rows:,} filas de características → {out_path}")
+    return out_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Características del modelo XGBoost desde granules TEMPO NO2 L2")
+    parser.add_argument("folder_nc")
+    parser.add_argument("output")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--state", help="estado de retardos (.npz): se continúa si existe y se guarda al terminar")
+    parser.add_argument("--max-gap-hours", type=float, default=None, help="NO2_prev es NaN si la observación anterior es más vieja")
+    parser.add_argument("--meteo-cache", help="añade la meteorología de Open-Meteo (meteo.py) con caché en esta carpeta")
+    parser.add_argument("--meteo-url", help="servidor Open-Meteo (por defecto OPEN_METEO_URL o el histórico público)")
+    args = parser.parse_args(argv)
+
+    enricher = None
+    if args.meteo_cache:
+        from meteo import MeteoCache, MeteoEnricher, OpenMeteoClient
+        enricher = MeteoEnricher(MeteoCache(args.meteo_cache), OpenMeteoClient(base_url=args.meteo_url))
+    max_gap = None if args.max_gap_hours is None else int(args.max_gap_hours * 3600)
+    state = LagState.load(args.state) if args.state and Path(args.state).exists() else LagState(max_gap=max_gap)
+    files = sorted(Path(args.folder_nc).rglob("*.nc"))
+    build_features(files, args.output, max_workers=args.workers, lag_state=state, enrich=enricher.enrich if enricher else None)
+    if enricher:
+        print(f"🌦️ Meteorología: {enricher.metrics()}")
+    if args.state:
+        state.save(args.state)
+        print(f"💾 Estado de retardos: {len(state):,} píxeles → {args.state}")
+
+
+if __name__ == "__main__":
+    main()
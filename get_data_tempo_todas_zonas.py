@@ -1,12 +1,23 @@
 from pathlib import Path
-from datetime import datetime
-import subprocess
+from datetime import datetime, timedelta, timezone
+import re
+import sys
+
+from data_tempo_utils import (
+    CMR_DATE_FMT,
+    cmr_search_granule_urls,
+    create_download_session,
+    download_files_parallel,
+)
 
 # Función para generar lista de zonas
 def generate_zone_files(base_pattern: str, date: str, version="V04", product="TEMPO_NO2_L3"):
     """
     Genera los nombres de ficheros desde zona 1 hasta 7
     Ejemplo: TEMPO_NO2_L3_V04_20251004T125055Z_S001.nc
+
+    Nota: el timestamp real de cada scan no se puede adivinar; para descargar usa
+    find_zone_granules(), que obtiene los nombres reales desde CMR.
     """
     zone_files = []
     for zone in range(1, 8):  # Zonas 1 → 7
@@ -16,39 +27,54 @@ def generate_zone_files(base_pattern: str, date: str, version="V04", product="TE
     return zone_files
 
 
-def download_data(date: str, folder: Path):
+def find_zone_granules(date: str, short_name="TEMPO_NO2_L3", version="V04", scans: list[int] | None = None, session=None) -> list[str]:
     """
-    Descarga datos TEMPO para todas las zonas (S001-S007)
+    Busca en CMR los granules reales de un día (YYYY-MM-DD) y devuelve sus URLs.
+
+    - scans: si se indica, solo se devuelven esos números de scan (S001 → 1, ...)
     """
-    nasa_base_url = "https://data.asdc.earthdata.nasa.gov/asdc-prod-protected/TEMPO/TEMPO_NO2_L3_V04"
-    
-    # Generar lista de ficheros para todas las zonas
-    zone_files = generate_zone_files(base_pattern="TEMPO_NO2_L3", date=date)
-    
-    for file_name in zone_files:
-        url = f"{nasa_base_url}/{date[:4]}.{date[4:6]}.{date[6:8]}/{file_name}"
-        output_file = folder / file_name
-        
-        print(f"⬇️ Descargando: {url}")
-        
-        try:
-            subprocess.run(
-                ["curl", "-f", "-n", "-c", "cookies.txt", "-b", "cookies.txt", "-L", url, "-o", str(output_file)],
-                check=True
-            )
-            print(f"✅ Guardado en: {output_file}")
-        except subprocess.CalledProcessError:
-            print(f"❌ No se pudo descargar: {url}")
+    day = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    temporal = f"{day.strftime(CMR_DATE_FMT)},{(day + timedelta(days=1) - timedelta(seconds=1)).strftime(CMR_DATE_FMT)}"
+
+    urls = cmr_search_granule_urls(
+        {"short_name": short_name, "version": version, "provider": "LARC_CLOUD", "temporal": temporal},
+        session=session,
+    )
+
+    if scans is not None:
+        wanted = set(scans)
+        pattern = re.compile(r"_S(?P<scan>\d{3})")
+        urls = [u for u in urls if (m := pattern.search(u.split("/")[-1])) and int(m.group("scan")) in wanted]
+    return urls
+
+
+def download_data(date: str, folder: Path, short_name="TEMPO_NO2_L3", version="V04", scans: list[int] | None = None, max_workers: int = 4):
+    """
+    Descarga datos TEMPO para todas las zonas (scans) de un día (YYYY-MM-DD).
+
+    Los nombres de los ficheros se resuelven en CMR y las descargas se hacen en paralelo
+    sobre una única sesión autenticada (credenciales de ~/.netrc).
+    Retorna la lista de ficheros descargados (o ya presentes en folder).
+    """
+    session = create_download_session(pool_size=max_workers)
+    urls = find_zone_granules(date, short_name=short_name, version=version, scans=scans, session=session)
+    if not urls:
+        print(f"⚠️ No se encontraron granules para {date}")
+        return []
+
+    print(f"⬇️ Descargando {len(urls)} granules de {date} ...")
+    files = download_files_parallel(urls, folder, session=session, max_workers=max_workers)
+    print(f"✅ {len(files)}/{len(urls)} ficheros en: {folder}")
+    return files
 
 
 if __name__ == "__main__":
-    # Fecha de hoy en formato YYYYMMDDTHHMMSSZ (como en los ficheros)
-    today = datetime.utcnow()
-    date_str = today.strftime("%Y%m%dT%H%M%SZ")
-    
+    # Fecha en formato YYYY-MM-DD (por defecto hoy en UTC)
+    date_str = sys.argv[1] if len(sys.argv) > 1 else datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
     # Carpeta destino
     root_dir = Path("./tempo_data").resolve()
     root_dir.mkdir(parents=True, exist_ok=True)
-    
+
     # Descargar datos de todas las zonas
-    download_data(date_str, root_dir)
\ No newline at end of file
+    download_data(date_str, root_dir)
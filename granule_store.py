@@ -0,0 +1,200 @@
+"""
+Almacén local de granules con presupuesto de disco y expulsión LRU.
+
+Sustituye a ``clean_folder`` (que borraba todo en cada ejecución): los .nc y
+.parquet ya descargados se conservan y se reutilizan, y ``gc`` solo libera
+espacio cuando hace falta:
+
+1. borra ficheros ``.part`` abandonados por descargas interrumpidas;
+2. borra los ficheros más antiguos que ``max_age_days`` (si se configura);
+3. borra por orden LRU (último acceso registrado) hasta quedar bajo el presupuesto.
+
+Los ficheros de los ``pin_days`` días más recientes (según la fecha del nombre del
+granule, o su mtime) nunca se expulsan.
+
+Uso desde consola:
+
+    python granule_store.py gc --root ./hcho_data --budget 20GB --pin-days 2
+    python granule_store.py stats --root ./hcho_data
+"""
+import argparse
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+INDEX_NAME = ".granule_store.json"
+DEFAULT_BUDGET = "20GB"
+_GRANULE_DATE = re.compile(r"(\d{8})T\d{6}Z")
+_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+_UNITS.update({unit[0]: factor for unit, factor in list(_UNITS.items()) if len(unit) == 2})  # 20G == 20GB
+
+
+def parse_size(value: str | int) -> int:
+    """Convierte '500MB', '20GB' (o '20G') o un entero de bytes a bytes."""
+    if isinstance(value, int):
+        return value
+    m = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?B?)\s*", value.upper())
+    if not m:
+        raise ValueError(f"Tamaño inválido: {value}")
+    return int(float(m.group(1)) * _UNITS[m.group(2)])
+
+
+def format_size(nbytes: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if nbytes < 1024:
+            return f"{nbytes:.1f}{unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f}TB"
+
+
+def granule_date(path: Path) -> datetime:
+    """Fecha del granule a partir del nombre (…_20251004T125055Z_…) o, si no, su mtime."""
+    m = _GRANULE_DATE.search(path.name)
+    if m:
+        return datetime.strptime(m.group(1), "%Y%m%d").replace(tzinfo=timezone.utc)
+    return datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc)
+
+
+class GranuleStore:
+    def __init__(self, root: str | Path, budget: str | int = DEFAULT_BUDGET, pin_days: int = 2, max_age_days: int | None = None, suffixes: tuple[str, ...] = (".nc", ".parquet")):
+        """
+        - root: carpeta gestionada (se recorre recursivamente)
+        - budget: espacio máximo ocupado por los ficheros gestionados ('20GB', bytes…)
+        - pin_days: días más recientes que nunca se expulsan
+        - max_age_days: si se indica, los ficheros más antiguos se borran aunque haya espacio
+        """
+        self.root = Path(root)
+        self.budget = parse_size(budget)
+        self.pin_days = pin_days
+        self.max_age_days = max_age_days
+        self.suffixes = suffixes
+        self.index_path = self.root / INDEX_NAME
+        self._index = self._load_index()
+
+    # ---------------- índice ----------------
+    def _load_index(self) -> dict[str, float]:
+        try:
+            return json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        tmp.write_text(json.dumps(self._index), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def _key(self, path: Path) -> str:
+        return Path(path).resolve().relative_to(self.root.resolve()).as_posix()
+
+    def files(self) -> list[Path]:
+        if not self.root.exists():
+            return []
+        return sorted(p for p in self.root.rglob("*") if p.is_file() and p.suffix in self.suffixes)
+
+    def touch(self, *paths: str | Path) -> None:
+        """Registra un acceso (para el orden LRU) a los ficheros indicados."""
+        now = time.time()
+        for p in paths:
+            p = Path(p)
+            if p.exists():
+                self._index[self._key(p)] = now
+        self._save_index()
+
+    def last_access(self, path: Path) -> float:
+        return self._index.get(self._key(path), path.stat().st_mtime)
+
+    def is_pinned(self, path: Path, now: datetime | None = None) -> bool:
+        now = now or datetime.now(timezone.utc)
+        cutoff = (now - timedelta(days=self.pin_days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return granule_date(path) >= cutoff
+
+    def usage(self) -> int:
+        return sum(p.stat().st_size for p in self.files())
+
+    # ---------------- limpieza ----------------
+    def gc(self, budget: str | int | None = None, dry_run: bool = False) -> list[Path]:
+        """
+        Libera espacio según la política del almacén. Retorna la lista de ficheros
+        borrados (o que se borrarían, con dry_run).
+        """
+        budget = self.budget if budget is None else parse_size(budget)
+        now = datetime.now(timezone.utc)
+        removed: list[Path] = []
+
+        def _remove(p: Path):
+            removed.append(p)
+            if not dry_run:
+                p.unlink(missing_ok=True)
+                self._index.pop(self._key(p), None)
+
+        # 1. descargas interrumpidas (más de una hora sin tocar)
+        if self.root.exists():
+            for p in self.root.rglob("*.part"):
+                if time.time() - p.stat().st_mtime > 3600:
+                    _remove(p)
+
+        files = self.files()
+        sizes = {p: p.stat().st_size for p in files}
+        candidates = [p for p in files if not self.is_pinned(p, now)]
+
+        # 2. antigüedad máxima
+        if self.max_age_days is not None:
+            age_cutoff = now - timedelta(days=self.max_age_days)
+            for p in list(candidates):
+                if granule_date(p) < age_cutoff:
+                    _remove(p)
+                    candidates.remove(p)
+
+        # 3. LRU hasta quedar bajo el presupuesto
+        used = sum(size for p, size in sizes.items() if p not in removed)
+        for p in sorted(candidates, key=self.last_access):
+            if used <= budget:
+                break
+            _remove(p)
+            used -= sizes[p]
+
+        if used > budget:
+            print(f"⚠️ {format_size(used)} ocupados por ficheros fijados, por encima del presupuesto de {format_size(budget)}")
+
+        if not dry_run:
+            self._save_index()
+            self._remove_empty_dirs()
+
+        freed = sum(sizes.get(p, 0) for p in removed)
+        accion = "Se liberarían" if dry_run else "Liberados"
+        print(f"🧹 {accion} {format_size(freed)} ({len(removed)} ficheros); en uso: {format_size(used)} / {format_size(budget)}")
+        return removed
+
+    def _remove_empty_dirs(self) -> None:
+        for d in sorted((p for p in self.root.rglob("*") if p.is_dir()), key=lambda p: len(p.parts), reverse=True):
+            try:
+                d.rmdir()
+            except OSError:
+                pass
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Gestión del almacén local de granules")
+    parser.add_argument("command", choices=["gc", "stats"])
+    parser.add_argument("--root", default="./hcho_data")
+    parser.add_argument("--budget", default=os.environ.get("GRANULE_STORE_BUDGET", DEFAULT_BUDGET))
+    parser.add_argument("--pin-days", type=int, default=2)
+    parser.add_argument("--max-age-days", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    store = GranuleStore(args.root, budget=args.budget, pin_days=args.pin_days, max_age_days=args.max_age_days)
+    if args.command == "gc":
+        store.gc(dry_run=args.dry_run)
+    else:
+        files = store.files()
+        pinned = [p for p in files if store.is_pinned(p)]
+        print(f"📦 {len(files)} ficheros, {format_size(store.usage())} / {format_size(store.budget)} ({len(pinned)} fijados)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Sustitutos locales de Harmony y CMR para probar el subsetting sin red.
+
+``LocalHarmonyClient`` imita la parte de la interfaz de ``harmony.Client`` que usa
+``earthdataHCHO.process_zones_latest_granule`` (submit / status / download_all) y
+``make_local_cmr_lookup`` construye una función equivalente a
+``cmr_get_latest_granule_for_bbox`` sobre una lista fija de granules.
+
+Ejemplo:
+
+    client = LocalHarmonyClient(polls_until_done=2)
+    lookup = make_local_cmr_lookup(granules)
+    process_zones_latest_granule(zones, "C123-LOCAL", ["product/vertical_column"],
+                                 "./out", client=client, cmr_lookup=lookup)
+"""
+import json
+import threading
+import uuid
+from concurrent.futures import Future
+from pathlib import Path
+
+
+class LocalHarmonyClient:
+    def __init__(self, polls_until_done: int = 1, fail_granules: set[str] | None = None, source_file: str | Path | None = None):
+        """
+        Cliente Harmony en memoria.
+
+        - polls_until_done: número de consultas de estado antes de marcar el job como terminado
+        - fail_granules: ids de granule cuyo job terminará en estado 'failed'
+        - source_file: si se indica, se copia como resultado del job; si no, se escribe un JSON
+          con la descripción de la solicitud.
+        """
+        self.polls_until_done = max(1, polls_until_done)
+        self.fail_granules = set(fail_granules or ())
+        self.source_file = Path(source_file) if source_file else None
+        self.jobs: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, request) -> str:
+        job_id = str(uuid.uuid4())
+        request = dict(request) if isinstance(request, dict) else vars(request)
+        with self._lock:
+            self.jobs[job_id] = {"request": request, "polls": 0}
+        return job_id
+
+    def status(self, job_id: str) -> dict:
+        with self._lock:
+            job = self.jobs[job_id]
+            job["polls"] += 1
+            if job["polls"] < self.polls_until_done:
+                progress = int(100 * job["polls"] / self.polls_until_done)
+                return {"status": "running", "progress": progress}
+            granule_id = _granule_id(job["request"])
+            if granule_id in self.fail_granules:
+                return {"status": "failed", "progress": 100, "message": f"Fallo simulado para {granule_id}"}
+            return {"status": "successful", "progress": 100}
+
+    def wait_for_processing(self, job_id: str, show_progress: bool = False) -> None:
+        while self.status(job_id)["status"] == "running":
+            pass
+
+    def download_all(self, job_id: str, directory: str = ".", overwrite: bool = False) -> list[Future]:
+        job = self.jobs[job_id]
+        out_dir = Path(directory)
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        granule_id = _granule_id(job["request"]) or job_id
+        suffix = self.source_file.suffix if self.source_file else ".json"
+        out_path = out_dir / f"{granule_id}_subset{suffix}"
+        if overwrite or not out_path.exists():
+            if self.source_file:
+                out_path.write_bytes(self.source_file.read_bytes())
+            else:
+                out_path.write_text(json.dumps(job["request"], default=str, indent=2), encoding="utf-8")
+
+        future: Future = Future()
+        future.set_result(str(out_path))
+        return [future]
+
+
+def _granule_id(request: dict) -> str | None:
+    granule_id = request.get("granule_id")
+    if isinstance(granule_id, (list, tuple)):
+        return granule_id[0] if granule_id else None
+    return granule_id
+
+
+def _entry_bbox(entry: dict) -> tuple | None:
+    """Convierte el primer 'boxes' de CMR ("S W N E") a (min_lon, min_lat, max_lon, max_lat)."""
+    boxes = entry.get("boxes")
+    if not boxes:
+        return None
+    s, w, n, e = map(float, boxes[0].split())
+    return (w, s, e, n)
+
+
+def _bbox_intersects(a: tuple, b: tuple) -> bool:
+    return not (a[2] < b[0] or b[2] < a[0] or a[3] < b[1] or b[3] < a[1])
+
+
+def make_local_cmr_lookup(granules: list[dict]):
+    """
+    Devuelve una función (collection_concept_id, bbox) -> entry | None que imita la consulta
+    a CMR ordenada por '-start_date' con page_size=1.
+
+    Cada granule es un dict con el formato de 'entry' de CMR (id, time_start, time_end, boxes).
+    Un granule sin 'boxes' se considera global.
+    """
+    ordered = sorted(granules, key=lambda g: g.get("time_start", ""), reverse=True)
+
+    def lookup(collection_concept_id: str, bbox: tuple) -> dict | None:
+        for entry in ordered:
+            if entry.get("collection_concept_id", collection_concept_id) != collection_concept_id:
+                continue
+            entry_bbox = _entry_bbox(entry)
+            if entry_bbox is None or _bbox_intersects(entry_bbox, tuple(bbox)):
+                return entry
+        return None
+
+    return lookup
@@ -0,0 +1,235 @@
+"""
+Adaptive request scheduler for Earthdata HTTP traffic.
+
+Every CMR query and granule download goes through a RequestScheduler, which
+
+- limits concurrent requests with an AIMD window: +1 slot per window of
+  fast successful responses, halved on 429/503/connection errors and
+  reduced when the time-to-first-byte exceeds ``latency_target``;
+- retries throttled or failed requests with full-jitter exponential
+  backoff, honouring ``Retry-After`` when the server sends it;
+- enforces an optional bytes-per-second budget on response bodies
+  (token bucket shared by all threads).
+
+Use ``default_scheduler()`` so all downloaders in the process share one
+window and one budget.
+"""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import requests
+
+from logger import setup_logging
+
+logger = setup_logging(debug=False, name='http_scheduler')
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+THROTTLE_STATUSES = frozenset({429, 503})
+RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the delay in seconds from a Retry-After header (seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        min_concurrency: int = 1,
+        max_concurrency: int = 8,
+        initial_concurrency: int = 2,
+        latency_target: float = 5.0,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        bytes_per_second: float | None = None,
+        decrease_factor: float = 0.5,
+    ):
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.latency_target = latency_target
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bytes_per_second = bytes_per_second
+        self.decrease_factor = decrease_factor
+
+        self._limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+        self._bucket_lock = threading.Lock()
+        self._bucket = float(bytes_per_second or 0)
+        self._bucket_ts = time.monotonic()
+
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "errors": 0, "bytes": 0}
+
+    @property
+    def concurrency(self) -> int:
+        return int(self._limit)
+
+    # ---------------- AIMD window ----------------
+    @contextmanager
+    def slot(self):
+        """Hold one concurrency slot for the duration of the block."""
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def _on_success(self, latency: float) -> None:
+        with self._cond:
+            self.stats["requests"] += 1
+            if latency > self.latency_target:
+                self._limit = max(self.min_concurrency, self._limit * (1 - (1 - self.decrease_factor) / 2))
+            else:
+                self._limit = min(self.max_concurrency, self._limit + 1.0 / self._limit)
+            self._cond.notify_all()
+
+    def _on_throttle(self, error: bool = False) -> None:
+        with self._cond:
+            self.stats["errors" if error else "throttled"] += 1
+            self._limit = max(self.min_concurrency, self._limit * self.decrease_factor)
+            logger.debug(f"Concurrency reduced to {int(self._limit)}")
+
+    def _backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    # ---------------- byte budget ----------------
+    def _consume(self, nbytes: int) -> None:
+        """Block until ``nbytes`` fit in the bytes-per-second budget."""
+        with self._bucket_lock:
+            self.stats["bytes"] += nbytes
+            if not self.bytes_per_second:
+                return
+            now = time.monotonic()
+            self._bucket = min(self.bytes_per_second, self._bucket + (now - self._bucket_ts) * self.bytes_per_second)
+            self._bucket_ts = now
+            self._bucket -= nbytes
+            wait = -self._bucket / self.bytes_per_second if self._bucket < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+    # ---------------- public API ----------------
+    def request(self, session: requests.Session | None, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a (non-streamed) request with retries.
+
+        Returns the last response once it is not retryable or retries are
+        exhausted; re-raises the last connection error if every attempt failed.
+        """
+        http = session or requests
+        kwargs.setdefault("timeout", 60)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                with self.slot():
+                    t0 = time.monotonic()
+                    r = http.request(method, url, **kwargs)
+                    latency = time.monotonic() - t0
+            except RETRY_EXCEPTIONS as e:
+                self._on_throttle(error=True)
+                if attempt == self.max_retries:
+                    raise
+                logger.debug(f"{type(e).__name__} on {url}, retrying")
+            else:
+                if r.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    self._on_success(latency)
+                    self._consume(len(r.content))
+                    return r
+                self._on_throttle(error=r.status_code not in THROTTLE_STATUSES)
+                retry_after = parse_retry_after(r.headers.get("Retry-After"))
+                r.close()
+            self.stats["retries"] += 1
+            delay = self._backoff(attempt, retry_after)
+            logger.debug(f"Retry {attempt + 1}/{self.max_retries} for {url} in {delay:.1f}s")
+            time.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    def get(self, session: requests.Session | None, url: str, **kwargs) -> requests.Response:
+        return self.request(session, "GET", url, **kwargs)
+
+    def download(self, session: requests.Session, url: str, dest: Path, chunk_size: int = 1 << 20, timeout: float = 120) -> int:
+        """
+        Stream ``url`` into ``dest`` holding a slot for the whole transfer.
+
+        Returns the final HTTP status code (200 on success). A retry
+        restarts the file from scratch.
+        """
+        dest = Path(dest)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                with self.slot():
+                    t0 = time.monotonic()
+                    with session.get(url, allow_redirects=True, stream=True, timeout=timeout) as r:
+                        latency = time.monotonic() - t0
+                        if r.status_code == 200:
+                            with open(dest, "wb") as fh:
+                                for chunk in r.iter_content(chunk_size=chunk_size):
+                                    if chunk:
+                                        self._consume(len(chunk))
+                                        fh.write(chunk)
+                            self._on_success(latency)
+                            return 200
+                        status = r.status_code
+                        retry_after = parse_retry_after(r.headers.get("Retry-After"))
+                if status not in RETRY_STATUSES or attempt == self.max_retries:
+                    return status
+                self._on_throttle(error=status not in THROTTLE_STATUSES)
+            except RETRY_EXCEPTIONS as e:
+                self._on_throttle(error=True)
+                if attempt == self.max_retries:
+                    raise
+                logger.debug(f"{type(e).__name__} on {url}, retrying")
+            self.stats["retries"] += 1
+            delay = self._backoff(attempt, retry_after)
+            logger.debug(f"Retry {attempt + 1}/{self.max_retries} for {url} in {delay:.1f}s")
+            time.sleep(delay)
+        raise RuntimeError("unreachable")
+
+
+_default_scheduler: RequestScheduler | None = None
+
+
+def default_scheduler() -> RequestScheduler:
+    """Process-wide scheduler shared by every downloader."""
+    global _default_scheduler
+    if _default_scheduler is None:
+        bps = os.environ.get("EARTHDATA_BYTES_PER_SECOND")
+        _default_scheduler = RequestScheduler(
+            max_concurrency=int(os.environ.get("EARTHDATA_MAX_CONCURRENCY", 8)),
+            bytes_per_second=float(bps) if bps else None,
+        )
+    return _default_scheduler
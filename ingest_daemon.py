@@ -0,0 +1,242 @@
+"""
+Servicio de ingesta incremental: sondea CMR y procesa cada granule nuevo al llegar.
+
+Para cada colección se guarda una marca de agua (``watermarks.WatermarkStore``) con
+la hora de inicio del último granule descargado y convertido. Cada ``interval``
+segundos el servicio pide a CMR solo los granules posteriores a esa marca y, en
+orden temporal:
+
+1. los descarga (en paralelo, por delante de la conversión) con la sesión
+   autenticada compartida;
+2. los convierte a Parquet con la especificación del producto
+   (``<out_dir>/<producto>/date=YYYY-MM-DD/<granule>.parquet``) y, si se indica
+   ``--cube``, los añade al cubo Zarr de los productos L3;
+3. avanza la marca de agua. Si un granule falla, la marca no lo sobrepasa y se
+   reintenta en el siguiente sondeo.
+
+Los productos que comparten colección (p. ej. o3_l3 y aerosol_l3) se descargan
+una sola vez. ``overlap`` vuelve a consultar un margen antes de la marca para
+recoger granules publicados con retraso; los ya convertidos se saltan.
+
+Uso:
+
+    python ingest_daemon.py --products no2_l3 hcho_l2 --interval 300
+    python ingest_daemon.py --products no2_l3 --once --cube ./tempo_cube
+"""
+import argparse
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from data_tempo_utils import (
+    CMR_DATE_FMT,
+    cmr_search_granules,
+    create_download_session,
+    download_file,
+    granule_download_url,
+)
+from earthdata_auth import default_auth
+from granule_store import GranuleStore
+from ingestion import ProductSpec, get_spec, ingest
+from watermarks import WatermarkStore, default_watermarks, parse_time
+
+
+def collection_key(spec: ProductSpec) -> str:
+    """Clave de la colección en CMR: concept id o short_name/version."""
+    return spec.concept_id or f"{spec.short_name}/{spec.version}"
+
+
+def collection_params(spec: ProductSpec) -> dict:
+    if spec.concept_id:
+        return {"concept_id": spec.concept_id}
+    if not spec.short_name:
+        raise ValueError(f"{spec.name} no tiene concept_id ni short_name para buscar en CMR")
+    params = {"short_name": spec.short_name, "provider": "LARC_CLOUD"}
+    if spec.version:
+        params["version"] = spec.version
+    return params
+
+
+class IngestDaemon:
+    def __init__(self, products: list[str | ProductSpec], data_dir: str | Path = "./tempo_data", out_dir: str | Path = "./tempo_parquet", interval: float = 300.0, watermarks: WatermarkStore | None = None, lookback: timedelta = timedelta(days=1), overlap: timedelta = timedelta(hours=1), cube_dir: str | Path | None = None, max_downloads: int = 4, budget: str | int | None = None, session=None, search=cmr_search_granules):
+        """
+        - products: nombres de ``ingestion.PRODUCTS`` o ProductSpec
+        - interval: segundos entre sondeos
+        - lookback: ventana inicial para colecciones sin marca de agua
+        - overlap: margen re-consultado antes de la marca (granules publicados tarde)
+        - cube_dir: si se indica, los productos L3 se añaden a <cube_dir>/<producto>.zarr
+        - budget: presupuesto de disco de ``data_dir`` (GranuleStore.gc tras cada ciclo)
+        - search: función (params, session) -> entradas CMR; sustituible en pruebas
+        """
+        specs = [get_spec(p) for p in products]
+        self.collections: dict[str, list[ProductSpec]] = {}
+        for spec in specs:
+            self.collections.setdefault(collection_key(spec), []).append(spec)
+        self.data_dir = Path(data_dir)
+        self.out_dir = Path(out_dir)
+        self.interval = interval
+        self.watermarks = watermarks or default_watermarks()
+        self.lookback = lookback
+        self.overlap = overlap
+        self.cube_dir = Path(cube_dir) if cube_dir else None
+        self.max_downloads = max_downloads
+        self.store = GranuleStore(self.data_dir, budget=budget) if budget else None
+        self.session = session
+        self.search = search
+        self._stop = threading.Event()
+
+    # ---------------- búsqueda ----------------
+    def pending(self, key: str, now: datetime | None = None) -> list[tuple[datetime, str]]:
+        """Granules (hora de inicio, url) de la colección ``key`` aún no ingeridos, en orden temporal."""
+        now = now or datetime.now(timezone.utc)
+        mark = self.watermarks.get(key)
+        start = mark - self.overlap if mark else now - self.lookback
+        params = {
+            **collection_params(self.collections[key][0]),
+            "temporal": f"{start.strftime(CMR_DATE_FMT)},{now.strftime(CMR_DATE_FMT)}",
+            "sort_key": "start_date",
+        }
+        found = {}
+        for entry in self.search(params, session=self.session):
+            url = granule_download_url(entry)
+            if url is None or not entry.get("time_start"):
+                continue
+            t = parse_time(entry["time_start"])
+            if (mark is None or t > mark or not self._seen(key, url, t)) and url not in found:
+                found[url] = t
+        return sorted((t, url) for url, t in found.items())
+
+    # ---------------- conversión ----------------
+    def _output(self, spec: ProductSpec, nc_name: str, t: datetime) -> Path:
+        return self.out_dir / spec.name / f"date={t:%Y-%m-%d}" / (Path(nc_name).stem + ".parquet")
+
+    def _seen(self, key: str, url: str, t: datetime) -> bool:
+        """
+        True si el granule ya está convertido para todos los productos. Un .nc descargado
+        no basta: si la conversión falló hay que reintentarla (convert() se salta las
+        salidas que ya existen).
+        """
+        name = url.split("/")[-1].split("?")[0]
+        return all(self._output(spec, name, t).exists() for spec in self.collections[key])
+
+    def convert(self, key: str, nc_path: Path, t: datetime) -> list[Path]:
+        """Convierte un granule para cada producto de la colección."""
+        written = []
+        for spec in self.collections[key]:
+            out = self._output(spec, nc_path.name, t)
+            if not out.exists():
+                out.parent.mkdir(parents=True, exist_ok=True)
+                tmp = out.with_name(out.name + ".tmp")
+                if ingest(spec, [nc_path], tmp, compact=True, compression="zstd") is not None:
+                    tmp.replace(out)
+                    written.append(out)
+            if self.cube_dir and spec.time_layout == "grid":
+                from zarr_cube import append_granule
+
+                append_granule(self.cube_dir / f"{spec.name}.zarr", nc_path, spec)
+        if self.store:
+            self.store.touch(nc_path)
+        return written
+
+    # ---------------- ciclo ----------------
+    def poll_collection(self, key: str) -> int:
+        """Descarga y convierte los granules nuevos de ``key``. Retorna cuántos se ingirieron."""
+        todo = self.pending(key)
+        if not todo:
+            print(f"💤 {key}: sin granules nuevos")
+            return 0
+        print(f"🛰️ {key}: {len(todo)} granules nuevos")
+        dest = self.data_dir / self.collections[key][0].name
+        dest.mkdir(parents=True, exist_ok=True)
+
+        done = 0
+        # Las descargas avanzan por delante; la conversión y la marca siguen el orden temporal
+        with ThreadPoolExecutor(max_workers=self.max_downloads) as pool:
+            futures = [(t, url, pool.submit(download_file, self.session, url, dest)) for t, url in todo]
+            for t, url, future in futures:
+                if self._stop.is_set():
+                    break
+                nc_path = future.result()
+                if nc_path is None:
+                    print(f"⚠️ {key}: falló {url}; se reintentará en el próximo sondeo")
+                    break
+                try:
+                    self.convert(key, nc_path, t)
+                except Exception as e:
+                    print(f"❌ {key}: error convirtiendo {nc_path.name}: {e}")
+                    break
+                self.watermarks.advance(key, t)
+                done += 1
+                lag = (datetime.now(timezone.utc) - t).total_seconds() / 60
+                print(f"✅ {nc_path.name} ingerido ({lag:.0f} min desde la observación)")
+            for *_, future in futures:
+                future.cancel()
+        return done
+
+    def poll_once(self) -> int:
+        if self.session is None:
+            self.session = create_download_session(pool_size=self.max_downloads)
+        total = 0
+        for key in self.collections:
+            try:
+                total += self.poll_collection(key)
+            except Exception as e:
+                print(f"❌ {key}: error en el sondeo: {e}")
+        default_auth().save(self.session)
+        if self.store:
+            self.store.gc()
+        return total
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def run(self, once: bool = False) -> None:
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+        print(f"🚀 Ingesta incremental de {', '.join(self.collections)} cada {self.interval:.0f}s")
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.poll_once()
+            if once:
+                break
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+        print("👋 Ingesta detenida")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Servicio de ingesta incremental de TEMPO")
+    parser.add_argument("--products", nargs="+", default=["no2_l3"])
+    parser.add_argument("--data-dir", default="./tempo_data")
+    parser.add_argument("--out-dir", default="./tempo_parquet")
+    parser.add_argument("--cube", default=None, help="carpeta de cubos Zarr para productos L3")
+    parser.add_argument("--interval", type=float, default=float(os.environ.get("INGEST_INTERVAL", 300)))
+    parser.add_argument("--lookback-hours", type=float, default=24)
+    parser.add_argument("--overlap-minutes", type=float, default=60)
+    parser.add_argument("--max-downloads", type=int, default=4)
+    parser.add_argument("--budget", default=os.environ.get("GRANULE_STORE_BUDGET"))
+    parser.add_argument("--watermarks", default=None, help="fichero JSON de marcas de agua")
+    parser.add_argument("--once", action="store_true", help="un solo sondeo (modo cron)")
+    args = parser.parse_args(argv)
+
+    daemon = IngestDaemon(
+        args.products,
+        data_dir=args.data_dir,
+        out_dir=args.out_dir,
+        interval=args.interval,
+        watermarks=WatermarkStore(args.watermarks) if args.watermarks else None,
+        lookback=timedelta(hours=args.lookback_hours),
+        overlap=timedelta(minutes=args.overlap_minutes),
+        cube_dir=args.cube,
+        max_downloads=args.max_downloads,
+        budget=args.budget,
+    )
+    daemon.run(once=args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Motor de ingesta NetCDF → Parquet dirigido por especificaciones de producto.
+
+Cada producto (NO2, HCHO, O3, aerosol, …) se describe con un ``ProductSpec``:
+colección (concept id o short_name/version), rutas de variables dentro del fichero,
+coordenadas, valores de relleno, filtro de calidad y disposición del tiempo. Añadir
+un producto es añadir una entrada a ``PRODUCTS``.
+
+Todas las lecturas siguen la misma ruta rápida:
+
+1. se leen los arrays crudos con h5netcdf (sin xarray ni pandas);
+2. la máscara de validez (finito, distinto de _FillValue, rango válido y calidad) se
+   construye sobre NumPy;
+3. solo se reúnen los píxeles válidos y sus coordenadas en una tabla Arrow;
+4. el tiempo CF se decodifica una vez por scanline / paso de tiempo y se difunde a
+   los píxeles por índice, nunca con ``np.repeat`` por píxel.
+
+Disposiciones de tiempo (``time_layout``):
+
+- "grid": L3, variables (time, lat, lon) con lat/lon/time 1-D
+- "scanline": L2, variables (mirror_step, xtrack) con lat/lon 2-D y time 1-D por scanline
+- "constant": un único tiempo para todo el granule
+- "auto": se deduce de las formas
+
+Ejemplo:
+
+    python ingestion.py hcho_l2 ./hcho_data/data_today ./hcho_data/hcho.parquet
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from parquet_schema import TIME_METADATA, compact_table, write_parquet
+
+
+@dataclass(frozen=True)
+class ProductSpec:
+    name: str
+    variables: dict[str, str]
+    latitude: str = "latitude"
+    longitude: str = "longitude"
+    time: str | None = "time"
+    concept_id: str | None = None
+    short_name: str | None = None
+    version: str | None = None
+    quality_flag: str | None = None
+    max_quality: int | None = None
+    fill_values: dict[str, float] = field(default_factory=dict)
+    valid_min: dict[str, float] = field(default_factory=dict)
+    valid_max: dict[str, float] = field(default_factory=dict)
+    time_layout: str = "auto"
+    coord_columns: tuple[str, str, str] = ("time", "latitude", "longitude")
+    skip_missing: bool = False
+
+
+PRODUCTS: dict[str, ProductSpec] = {
+    "no2_l3": ProductSpec(
+        name="no2_l3",
+        concept_id="C3685896708-LARC_CLOUD",
+        short_name="TEMPO_NO2_L3",
+        version="V04",
+        variables={
+            "vertical_column_troposphere": "product/vertical_column_troposphere",
+            "vertical_column_troposphere_uncertainty": "product/vertical_column_troposphere_uncertainty",
+            "vertical_column_stratosphere": "product/vertical_column_stratosphere",
+            "main_data_quality_flag": "product/main_data_quality_flag",
+        },
+        quality_flag="product/main_data_quality_flag",
+        time_layout="grid",
+    ),
+    "hcho_l2": ProductSpec(
+        name="hcho_l2",
+        concept_id="C3685912035-LARC_CLOUD",
+        short_name="TEMPO_HCHO_L2",
+        version="V04",
+        variables={"HCHO_molecules_per_cm2": "product/vertical_column"},
+        latitude="geolocation/latitude",
+        longitude="geolocation/longitude",
+        time="geolocation/time",
+        quality_flag="product/main_data_quality_flag",
+        time_layout="scanline",
+        coord_columns=("tiempo", "latitud", "longitud"),
+    ),
+    "o3_l3": ProductSpec(
+        name="o3_l3",
+        short_name="TEMPO_O3TOT_L3",
+        version="V04",
+        variables={"column_amount_o3": "product/column_amount_o3"},
+        quality_flag="product/quality_flag",
+        max_quality=0,
+        time_layout="grid",
+    ),
+    "aerosol_l3": ProductSpec(
+        name="aerosol_l3",
+        short_name="TEMPO_O3TOT_L3",
+        version="V04",
+        variables={"uv_aerosol_index": "product/uv_aerosol_index"},
+        quality_flag="product/quality_flag",
+        max_quality=0,
+        time_layout="grid",
+    ),
+}
+
+
+def get_spec(spec: str | ProductSpec) -> ProductSpec:
+    if isinstance(spec, ProductSpec):
+        return spec
+    try:
+        return PRODUCTS[spec]
+    except KeyError:
+        raise ValueError(f"Producto desconocido: {spec} (disponibles: {', '.join(PRODUCTS)})")
+
+
+def _attr(var, name, default=None):
+    value = var.attrs.get(name, default)
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _has(f, path: str | None) -> bool:
+    if not path:
+        return False
+    try:
+        f[path]
+        return True
+    except KeyError:
+        return False
+
+
+def decode_time(var) -> np.ndarray:
+    """Decodifica una variable de tiempo CF (1-D, una entrada por scanline/paso) a datetime64."""
+    values = np.asarray(var[:])
+    units = _attr(var, "units", "")
+    if "since" in units:
+        import xarray as xr
+        return np.asarray(xr.coding.times.decode_cf_datetime(values, units=units, calendar=_attr(var, "calendar", "standard")))
+    return values
+
+
+def _valid_mask(arr: np.ndarray, fill) -> np.ndarray:
+    mask = np.isfinite(arr) if arr.dtype.kind == "f" else np.ones(arr.shape, dtype=bool)
+    if fill is not None:
+        mask &= arr != np.asarray(fill).astype(arr.dtype)
+    return mask
+
+
+def _layout(spec: ProductSpec, shape: tuple, lat_ndim: int, time_len: int | None) -> str:
+    if spec.time_layout != "auto":
+        return spec.time_layout
+    if lat_ndim == 1:
+        return "grid"
+    # >=: al recortar formas distintas quedan menos scanlines que tiempos
+    if time_len is not None and time_len >= shape[0] and time_len > 1:
+        return "scanline"
+    return "constant"
+
+
+def read_granule(path: str | Path, spec: str | ProductSpec, source_column: str | None = "file_source") -> pa.Table | None:
+    """
+    Lee un granule según ``spec`` y devuelve solo los píxeles válidos como tabla Arrow.
+
+    Retorna None si el fichero no tiene ninguna de las variables del spec (con
+    skip_missing=True) y lanza KeyError si falta alguna (con skip_missing=False).
+    """
+    import h5netcdf
+
+    spec = get_spec(spec)
+    t_col, lat_col, lon_col = spec.coord_columns
+
+    with h5netcdf.File(path, "r") as f:
+        variables = {}
+        for col, var_path in spec.variables.items():
+            if _has(f, var_path):
+                variables[col] = var_path
+            elif not spec.skip_missing:
+                raise KeyError(f"La variable '{var_path}' no se encontró en el archivo {path}.")
+        if not variables:
+            return None
+
+        raw = {col: f[var_path][:] for col, var_path in variables.items()}
+        shape = next(iter(raw.values())).shape
+
+        lat = f[spec.latitude][:] if _has(f, spec.latitude) else None
+        lon = f[spec.longitude][:] if _has(f, spec.longitude) else None
+        time_var = f[spec.time] if _has(f, spec.time) else None
+        times = decode_time(time_var) if time_var is not None else None
+
+        # Compatibilidad con ficheros L2 cuyas variables y geolocalización difieren en
+        # algunas filas/columnas: se recorta a la forma común.
+        if lat is not None and lat.ndim == len(shape) and lat.shape != shape:
+            common = tuple(np.minimum(lat.shape, shape))
+            cut = tuple(slice(0, n) for n in common)
+            print(f"⚠️ Formas distintas en {os.path.basename(path)}: {shape} vs {lat.shape}, se recorta a {common}")
+            raw = {col: arr[cut] for col, arr in raw.items()}
+            lat, lon, shape = lat[cut], lon[cut], common
+
+        valid = None
+        for col, var_path in variables.items():
+            arr = raw[col]
+            if arr.shape != shape:
+                raise ValueError(f"{var_path} tiene forma {arr.shape}, se esperaba {shape}")
+            fill = spec.fill_values.get(var_path, f[var_path].attrs.get("_FillValue"))
+            mask = _valid_mask(arr, fill)
+            if col in spec.valid_min:
+                mask &= arr >= spec.valid_min[col]
+            if col in spec.valid_max:
+                mask &= arr <= spec.valid_max[col]
+            valid = mask if valid is None else (valid & mask)
+
+        # geolocalización 2-D: los píxeles sin lat/lon válidas también se descartan
+        if lat is not None and lat.ndim == len(shape):
+            valid &= _valid_mask(lat, f[spec.latitude].attrs.get("_FillValue"))
+            valid &= _valid_mask(lon, f[spec.longitude].attrs.get("_FillValue"))
+
+        if spec.quality_flag and spec.max_quality is not None and _has(f, spec.quality_flag):
+            q = f[spec.quality_flag][tuple(slice(0, n) for n in shape)]
+            valid &= _valid_mask(q, f[spec.quality_flag].attrs.get("_FillValue")) & (q <= spec.max_quality)
+
+    layout = _layout(spec, shape, lat.ndim if lat is not None else 1, None if times is None else len(times))
+    idx = np.nonzero(valid)
+    n = len(idx[0])
+    columns = {}
+
+    if layout == "grid":
+        # variables (time, lat, lon) o (lat, lon); coordenadas 1-D
+        y_i, x_i = idx[-2], idx[-1]
+        t_i = idx[0] if len(shape) == 3 else np.zeros(n, dtype=np.intp)
+        if times is not None:
+            columns[t_col] = times[t_i]
+        columns[lat_col] = lat[y_i] if lat is not None else y_i
+        columns[lon_col] = lon[x_i] if lon is not None else x_i
+    else:
+        if lat is None or lon is None:
+            raise KeyError(f"Faltan {spec.latitude}/{spec.longitude} en el archivo {path}.")
+        if layout == "scanline" and times is not None:
+            columns[t_col] = times[:shape[0]][idx[0]]
+        elif times is not None:
+            columns[t_col] = np.broadcast_to(times.reshape(-1)[0], (n,))
+        columns[lat_col] = lat[valid]
+        columns[lon_col] = lon[valid]
+
+    for col, arr in raw.items():
+        columns[col] = arr[valid]
+
+    table = pa.table(columns)
+    if source_column:
+        source = pa.DictionaryArray.from_arrays(
+            pa.array(np.zeros(table.num_rows, dtype=np.int32)), pa.array([os.path.basename(str(path))])
+        )
+        table = table.append_column(source_column, source)
+    return table
+
+
+def _read_or_none(args):
+    path, spec, source_column = args
+    try:
+        return read_granule(path, spec, source_column=source_column)
+    except Exception as e:
+        print(f"❌ Error en {path}: {e}")
+        return None
+
+
+def ingest(spec: str | ProductSpec, files: list[str | Path], output_path: str | Path, compact: bool = False, compression: str = "snappy", compression_level: int | None = None, row_group_size: int | None = None, max_workers: int = 1, metadata: dict | None = None, source_column: str | None = "file_source") -> Path | None:
+    """
+    Lee ``files`` con ``spec`` y escribe un único Parquet en ``output_path``.
+
+    Con max_workers > 1 los granules se leen en procesos separados.
+    Retorna la ruta escrita o None si no había píxeles válidos.
+    """
+    spec = get_spec(spec)
+    files = [str(p) for p in files]
+    if max_workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            tables = list(pool.map(_read_or_none, [(p, spec, source_column) for p in files]))
+    else:
+        tables = [_read_or_none((p, spec, source_column)) for p in files]
+    tables = [t for t in tables if t is not None and t.num_rows > 0]
+    if not tables:
+        print(f"⚠️ Sin píxeles válidos para {spec.name}")
+        return None
+
+    table = pa.concat_tables(tables, promote_options="permissive").unify_dictionaries()
+    if compact:
+        table = compact_table(table)
+        metadata = {**TIME_METADATA, **(metadata or {})}
+    write_parquet(table, output_path, compression=compression, compression_level=compression_level, row_group_size=row_group_size, metadata=metadata)
+    print(f"✅ {spec.name}: {table.num_rows:,} registros de {len(tables)} archivos → {output_path}")
+    return Path(output_path)
+
+
+def adhoc_spec(name: str, variables: dict[str, str], **kwargs) -> ProductSpec:
+    """Spec temporal para lecturas puntuales (p.ej. listas de variables heredadas)."""
+    return ProductSpec(name=name, variables=variables, **kwargs)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Ingesta NetCDF → Parquet por producto")
+    parser.add_argument("product", choices=sorted(PRODUCTS))
+    parser.add_argument("folder_nc")
+    parser.add_argument("output")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--compression", default="snappy")
+    parser.add_argument("--max-quality", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    spec = get_spec(args.product)
+    if args.max_quality is not None:
+        spec = replace(spec, max_quality=args.max_quality)
+    files = sorted(Path(args.folder_nc).rglob("*.nc"))
+    ingest(spec, files, args.output, compact=args.compact, compression=args.compression, max_workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
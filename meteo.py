@@ -0,0 +1,234 @@
+"""
+Enriquecimiento meteorológico (Open-Meteo) por teselas, con caché en disco.
+
+El cuaderno pide el tiempo horario de un único punto (la media de lat/lon del día) y
+lo une por ``time_hour``: todos los píxeles reciben el mismo tiempo y cada ejecución
+repite la llamada HTTP. Aquí:
+
+- la malla se divide en teselas gruesas (por defecto 0.25°, la resolución de ERA5);
+- se piden a Open-Meteo solo las (tesela, día) que faltan en la caché, agrupando
+  muchas teselas en cada petición (la API acepta listas de coordenadas);
+- cada (tesela, día) se guarda en ``<cache>/<día>/<fila>_<columna>.npy`` (24 × variables);
+- el valor de cada píxel se interpola de forma vectorizada: bilineal entre los
+  centros de las cuatro teselas vecinas y lineal entre las dos horas que rodean su
+  tiempo (la dirección del viento se interpola como vector unitario).
+
+El servidor se elige con ``base_url`` o la variable ``OPEN_METEO_URL``; para pruebas
+sin red, ``open_meteo_local.LocalOpenMeteo`` sirve datos sintéticos con la misma API:
+
+    enricher = MeteoEnricher(MeteoCache("./meteo_cache"))
+    table = enricher.enrich(table)          # añade temperature_2m, pressure_msl, ...
+"""
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pyarrow as pa
+import requests
+
+from colocation import epoch_seconds
+from features import METEO_COLUMNS
+from http_scheduler import RequestScheduler, default_scheduler
+
+OPEN_METEO_ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+DIRECTION_COLUMNS = ("winddirection_10m",)
+
+
+def default_base_url() -> str:
+    return os.environ.get("OPEN_METEO_URL", OPEN_METEO_ARCHIVE_URL)
+
+
+@dataclass(frozen=True)
+class TileGrid:
+    resolution: float = 0.25
+    lat0: float = -90.0
+    lon0: float = -180.0
+
+    def center(self, row: np.ndarray, col: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return self.lat0 + (np.asarray(row) + 0.5) * self.resolution, self.lon0 + (np.asarray(col) + 0.5) * self.resolution
+
+    def corners(self, lat: np.ndarray, lon: np.ndarray):
+        """Fila/columna de la tesela inferior izquierda de las cuatro vecinas y pesos (0–1)."""
+        fr = (np.asarray(lat, dtype=np.float64) - self.lat0) / self.resolution - 0.5
+        fc = (np.asarray(lon, dtype=np.float64) - self.lon0) / self.resolution - 0.5
+        r0, c0 = np.floor(fr).astype(np.int64), np.floor(fc).astype(np.int64)
+        return r0, c0, fr - r0, fc - c0
+
+
+class MeteoCache:
+    """Serie horaria (24, variables) float32 por (tesela, día UTC) en ficheros .npy."""
+
+    def __init__(self, root: str | Path, variables: Sequence[str] = METEO_COLUMNS):
+        self.root = Path(root)
+        self.variables = tuple(variables)
+
+    def path(self, row: int, col: int, day: int) -> Path:
+        return self.root / str(np.datetime64(day, "D")) / f"{row}_{col}.npy"
+
+    def get(self, row: int, col: int, day: int) -> np.ndarray | None:
+        try:
+            values = np.load(self.path(row, col, day))
+        except (FileNotFoundError, ValueError):
+            return None
+        return values if values.shape == (24, len(self.variables)) else None
+
+    def put(self, row: int, col: int, day: int, values: np.ndarray) -> None:
+        path = self.path(row, col, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.asarray(values, dtype=np.float32))
+        os.replace(tmp, path)
+
+
+class OpenMeteoClient:
+    """
+    Peticiones por lotes al endpoint de histórico de Open-Meteo.
+
+    ``fetch`` pide ``batch_size`` teselas por petición (coordenadas separadas por comas)
+    y devuelve {(fila, columna, día): (24, variables)}; las horas que falten quedan NaN.
+    """
+
+    def __init__(self, base_url: str | None = None, variables: Sequence[str] = METEO_COLUMNS, grid: TileGrid = TileGrid(), batch_size: int = 50, session: requests.Session | None = None, scheduler: RequestScheduler | None = None):
+        self.base_url = base_url or default_base_url()
+        self.variables = tuple(variables)
+        self.grid = grid
+        self.batch_size = batch_size
+        self.session = session or requests.Session()
+        self.scheduler = scheduler or default_scheduler()
+        self.requests = 0
+
+    def fetch(self, tiles: Sequence[tuple[int, int]], first_day: int, last_day: int) -> dict[tuple[int, int, int], np.ndarray]:
+        out = {}
+        n_days = last_day - first_day + 1
+        for i in range(0, len(tiles), self.batch_size):
+            batch = list(tiles[i:i + self.batch_size])
+            lat, lon = self.grid.center(np.array([t[0] for t in batch]), np.array([t[1] for t in batch]))
+            params = {
+                "latitude": ",".join(f"{v:.4f}" for v in lat),
+                "longitude": ",".join(f"{v:.4f}" for v in lon),
+                "start_date": str(np.datetime64(first_day, "D")),
+                "end_date": str(np.datetime64(last_day, "D")),
+                "hourly": ",".join(self.variables),
+                "timeformat": "unixtime",
+                "timezone": "GMT",
+            }
+            r = self.scheduler.get(self.session, self.base_url, params=params, timeout=60)
+            r.raise_for_status()
+            self.requests += 1
+            payload = r.json()
+            locations = payload if isinstance(payload, list) else [payload]
+            if len(locations) != len(batch):
+                raise ValueError(f"Open-Meteo devolvió {len(locations)} ubicaciones para {len(batch)} teselas")
+            for (row, col), loc in zip(batch, locations):
+                hourly = loc.get("hourly", {})
+                hours = (np.asarray(hourly.get("time", []), dtype=np.int64) // 3600) - first_day * 24
+                keep = (hours >= 0) & (hours < n_days * 24)
+                values = np.full((n_days * 24, len(self.variables)), np.nan, dtype=np.float32)
+                for j, v in enumerate(self.variables):
+                    column = np.array([np.nan if x is None else x for x in hourly.get(v, [])], dtype=np.float32)
+                    if len(column) == len(keep):
+                        values[hours[keep], j] = column[keep]
+                for d in range(n_days):
+                    out[(row, col, first_day + d)] = values[d * 24:(d + 1) * 24]
+        return out
+
+
+class MeteoEnricher:
+    """Añade las variables meteorológicas interpoladas a tablas de píxeles."""
+
+    def __init__(self, cache: MeteoCache, client: OpenMeteoClient | None = None):
+        self.cache = cache
+        self.client = client or OpenMeteoClient(variables=cache.variables)
+        self.variables = cache.variables
+        self.grid = self.client.grid
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _load(self, keys: np.ndarray) -> dict[tuple[int, int, int], np.ndarray]:
+        """(tesela, día) -> valores, de la caché o pedidos por lotes (por tesela, rango de días)."""
+        found, missing = {}, {}
+        for row, col, day in map(tuple, keys.tolist()):
+            values = self.cache.get(row, col, day)
+            if values is None:
+                missing.setdefault((row, col), []).append(day)
+            else:
+                found[(row, col, day)] = values
+        self.cache_hits += len(found)
+        self.cache_misses += sum(len(d) for d in missing.values())
+        if missing:
+            # teselas con el mismo rango de días van en las mismas peticiones
+            by_range: dict[tuple[int, int], list[tuple[int, int]]] = {}
+            for tile, days in missing.items():
+                by_range.setdefault((min(days), max(days)), []).append(tile)
+            for (first, last), tiles in by_range.items():
+                for (row, col, day), values in self.client.fetch(sorted(tiles), first, last).items():
+                    # días incompletos (archivo aún sin publicar) no se guardan
+                    if not np.isnan(values).any():
+                        self.cache.put(row, col, day, values)
+                    found[(row, col, day)] = values
+        return found
+
+    def interpolate(self, lat: np.ndarray, lon: np.ndarray, seconds: np.ndarray) -> dict[str, np.ndarray]:
+        """Valores de cada variable en (lat, lon, tiempo), bilineal en el espacio y lineal en el tiempo."""
+        n = len(seconds)
+        if n == 0:
+            return {v: np.empty(0, dtype=np.float32) for v in self.variables}
+        r0, c0, wr, wc = self.grid.corners(lat, lon)
+        seconds = np.asarray(seconds, dtype=np.int64)
+        h0 = seconds // 3600
+        wt = (seconds - h0 * 3600) / 3600.0
+
+        # las 8 esquinas (4 teselas × 2 horas) de cada píxel
+        dr = np.array([0, 0, 1, 1])[:, None]
+        dc = np.array([0, 1, 0, 1])[:, None]
+        rows = np.broadcast_to(r0 + dr, (4, n))
+        cols = np.broadcast_to(c0 + dc, (4, n))
+        # clave entera (fila, columna, día) para un np.unique 1-D
+        day0 = int(h0.min() // 24)
+        n_cols = int(round(360.0 / self.grid.resolution)) + 2
+        tile = ((rows + 1) * n_cols + (cols + 1)).ravel()
+        keys = np.concatenate([tile * 1024 + np.tile((h0 + dh) // 24 - day0, 4) for dh in (0, 1)])
+        unique, inverse = np.unique(keys, return_inverse=True)
+        tile_u, day_u = np.divmod(unique, 1024)
+        row_u, col_u = np.divmod(tile_u, n_cols)
+        triples = np.stack([row_u - 1, col_u - 1, day_u + day0], axis=1)
+        loaded = self._load(triples)
+        block = np.stack([loaded[tuple(k)] for k in triples.tolist()]).astype(np.float64)  # (claves, 24, variables)
+
+        inverse = inverse.reshape(2, 4, n)
+        hour = np.stack([h0 % 24, (h0 + 1) % 24])[:, None, :]
+        corners = block[inverse, np.broadcast_to(hour, (2, 4, n))]  # (2, 4, n, variables)
+        w_space = np.stack([(1 - wr) * (1 - wc), (1 - wr) * wc, wr * (1 - wc), wr * wc])  # (4, n)
+        w_time = np.stack([1 - wt, wt])  # (2, n)
+        weights = (w_time[:, None, :] * w_space[None, :, :])[..., None]
+
+        out = {}
+        for j, v in enumerate(self.variables):
+            x = corners[..., j]
+            if v in DIRECTION_COLUMNS:
+                rad = np.deg2rad(x)
+                s = (np.sin(rad) * weights[..., 0]).sum(axis=(0, 1))
+                c = (np.cos(rad) * weights[..., 0]).sum(axis=(0, 1))
+                out[v] = (np.rad2deg(np.arctan2(s, c)) % 360).astype(np.float32)
+            else:
+                out[v] = (x * weights[..., 0]).sum(axis=(0, 1)).astype(np.float32)
+        return out
+
+    def enrich(self, table: pa.Table, lat_col: str = "lat", lon_col: str = "lon", time_col: str = "time") -> pa.Table:
+        """``table`` con una columna float32 por variable (se reemplaza si ya existía)."""
+        values = self.interpolate(
+            table.column(lat_col).to_numpy(zero_copy_only=False),
+            table.column(lon_col).to_numpy(zero_copy_only=False),
+            epoch_seconds(table.column(time_col)),
+        )
+        for v, arr in values.items():
+            if v in table.column_names:
+                table = table.drop_columns([v])
+            table = table.append_column(v, pa.array(arr))
+        return table
+
+    def metrics(self) -> dict:
+        return {"cache_hits": self.cache_hits, "cache_misses": self.cache_misses, "requests": self.client.requests}
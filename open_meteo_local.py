@@ -0,0 +1,123 @@
+"""
+Sustituto local del histórico de Open-Meteo para probar ``meteo.py`` sin red.
+
+Implementa la parte de ``GET /v1/archive`` que usa ``OpenMeteoClient``: listas de
+coordenadas separadas por comas, ``start_date``/``end_date``, ``hourly`` y
+``timeformat=unixtime``. Con una sola coordenada responde un objeto y con varias una
+lista, como el servicio real. Los valores son funciones suaves y deterministas de
+lat/lon/hora (ver ``synthetic_weather``), así que una prueba puede comprobar la
+interpolación. Los contadores (``requests``, ``locations``) permiten verificar que la
+caché y el agrupado evitan peticiones.
+
+    with LocalOpenMeteo() as server:
+        client = OpenMeteoClient(base_url=server.url)
+"""
+import json
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+
+def synthetic_weather(variable: str, lat: float, lon: float, seconds: np.ndarray) -> np.ndarray:
+    """Valor sintético de ``variable`` en (lat, lon) para cada instante (segundos epoch)."""
+    hour = (seconds % 86400) / 3600.0
+    if variable == "temperature_2m":
+        return 30.0 - 0.4 * abs(lat) + 6.0 * np.sin(2 * np.pi * (hour - 9) / 24)
+    if variable == "pressure_msl":
+        return 1013.0 + 0.05 * lon + 0.1 * lat + 0.0 * hour
+    if variable == "windspeed_10m":
+        return 5.0 + 0.1 * (lat % 10) + 0.5 * np.cos(2 * np.pi * hour / 24)
+    if variable == "winddirection_10m":
+        return (10.0 * lon + 15.0 * hour) % 360
+    return np.zeros_like(hour)
+
+
+class LocalOpenMeteo:
+    def __init__(self, fail_with: int | None = None):
+        """``fail_with``: si se indica, todas las peticiones responden con ese código HTTP."""
+        self.fail_with = fail_with
+        self.requests = 0
+        self.locations = 0
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/archive"
+
+    def _response(self, query: dict) -> list[dict]:
+        lats = [float(v) for v in query["latitude"][0].split(",")]
+        lons = [float(v) for v in query["longitude"][0].split(",")]
+        if len(lats) != len(lons):
+            raise ValueError("latitude y longitude deben tener la misma longitud")
+        start = date.fromisoformat(query["start_date"][0]).toordinal() - date(1970, 1, 1).toordinal()
+        end = date.fromisoformat(query["end_date"][0]).toordinal() - date(1970, 1, 1).toordinal()
+        variables = query.get("hourly", [""])[0].split(",")
+        seconds = np.arange(start * 24, (end + 1) * 24, dtype=np.int64) * 3600
+        unixtime = query.get("timeformat", ["iso8601"])[0] == "unixtime"
+        times = seconds.tolist() if unixtime else [str(np.datetime64(int(s), "s"))[:16] for s in seconds]
+        return [
+            {
+                "latitude": lat,
+                "longitude": lon,
+                "utc_offset_seconds": 0,
+                "hourly": {"time": times, **{v: np.round(synthetic_weather(v, lat, lon, seconds), 2).tolist() for v in variables if v}},
+            }
+            for lat, lon in zip(lats, lons)
+        ]
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code: int, body: bytes = b""):
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path != "/v1/archive":
+                    return self._send(404)
+                with server._lock:
+                    server.requests += 1
+                if server.fail_with:
+                    return self._send(server.fail_with, b'{"error":true,"reason":"simulated"}')
+                try:
+                    locations = server._response(parse_qs(parsed.query))
+                except (KeyError, ValueError) as e:
+                    return self._send(400, json.dumps({"error": True, "reason": str(e)}).encode())
+                with server._lock:
+                    server.locations += len(locations)
+                body = locations if len(locations) > 1 else locations[0]
+                self._send(200, json.dumps(body).encode())
+
+        return Handler
+
+    def start(self) -> "LocalOpenMeteo":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "LocalOpenMeteo":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
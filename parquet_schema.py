@@ -0,0 +1,153 @@
+"""
+Esquema columnar compacto y escritura Parquet configurable.
+
+``compact_dataframe`` reduce los tipos de un DataFrame de TEMPO:
+
+- medidas float64 → float32
+- flags de calidad (columnas que contienen 'quality_flag') → int8
+- columnas de origen (file_source) → diccionario (category)
+- tiempos datetime64 → int64 segundos desde 1970-01-01 (UTC)
+- índices enteros heredados de reset_index() → el entero más pequeño que los contiene
+
+``write_parquet`` permite elegir codec (snappy/zstd/lz4/gzip/none), nivel y tamaño de
+row group. ``benchmark_codecs`` compara tamaño, velocidad de escritura y de lectura:
+
+    python parquet_schema.py bench ./tempo_parquet/tempo_data_2025-10-04.parquet
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+COMPRESSION_OPTIONS = ("snappy", "zstd", "lz4", "gzip", "none")
+TIME_METADATA = {b"time_encoding": b"int64 seconds since 1970-01-01T00:00:00Z"}
+
+
+def _epoch_seconds(s: pd.Series) -> pd.Series:
+    if getattr(s.dt, "tz", None) is not None:
+        s = s.dt.tz_convert("UTC").dt.tz_localize(None)
+    secs = (s - pd.Timestamp("1970-01-01")) // pd.Timedelta(seconds=1)
+    return secs.astype("Int64") if s.isna().any() else secs.astype("int64")
+
+
+def compact_dataframe(df: pd.DataFrame, flag_pattern: str = "quality_flag", source_cols: tuple[str, ...] = ("file_source",)) -> pd.DataFrame:
+    """Devuelve una copia de ``df`` con el esquema compacto (ver docstring del módulo)."""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if col in source_cols:
+            out[col] = s.astype("category")
+        elif pd.api.types.is_datetime64_any_dtype(s):
+            out[col] = _epoch_seconds(s)
+        elif flag_pattern in col and pd.api.types.is_numeric_dtype(s) and not s.isna().any():
+            vals = s.to_numpy()
+            out[col] = s.astype("int8") if vals.size == 0 or (vals.min() >= -128 and vals.max() <= 127) else s.astype("int16")
+        elif pd.api.types.is_float_dtype(s):
+            out[col] = s.astype("float32")
+        elif pd.api.types.is_integer_dtype(s):
+            out[col] = pd.to_numeric(s, downcast="integer")
+        else:
+            out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def compact_table(table: pa.Table, flag_pattern: str = "quality_flag", source_cols: tuple[str, ...] = ("file_source",)) -> pa.Table:
+    """Equivalente de ``compact_dataframe`` sobre una tabla Arrow (sin pasar por pandas)."""
+    import pyarrow.compute as pc
+
+    columns = []
+    for name, col in zip(table.column_names, table.columns):
+        t = col.type
+        if name in source_cols and not pa.types.is_dictionary(t):
+            col = pc.dictionary_encode(col)
+        elif pa.types.is_timestamp(t):
+            col = pc.cast(col, pa.timestamp("s", tz=t.tz), safe=False).cast(pa.int64())
+        elif flag_pattern in name and (pa.types.is_integer(t) or pa.types.is_floating(t)) and col.null_count == 0:
+            mm = pc.min_max(col)
+            lo, hi = mm["min"].as_py(), mm["max"].as_py()
+            fits = lo is None or (lo >= -128 and hi <= 127)
+            col = pc.cast(col, pa.int8() if fits else pa.int16())
+        elif pa.types.is_float64(t):
+            col = pc.cast(col, pa.float32())
+        columns.append(col)
+    return pa.table(columns, names=table.column_names, metadata=table.schema.metadata)
+
+
+def write_parquet(df: pd.DataFrame | pa.Table, path: str | Path, compression: str = "snappy", compression_level: int | None = None, row_group_size: int | None = None, metadata: dict | None = None) -> Path:
+    """Escribe ``df`` en Parquet con el codec, nivel y tamaño de row group indicados."""
+    if compression not in COMPRESSION_OPTIONS:
+        raise ValueError(f"Compresión no soportada: {compression} (opciones: {', '.join(COMPRESSION_OPTIONS)})")
+    table = df if isinstance(df, pa.Table) else pa.Table.from_pandas(df, preserve_index=False)
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    pq.write_table(
+        table,
+        str(path),
+        compression=compression,
+        compression_level=compression_level,
+        row_group_size=row_group_size,
+    )
+    return Path(path)
+
+
+def benchmark_codecs(df: pd.DataFrame, out_dir: str | Path | None = None, codecs: list[tuple[str, int | None]] | None = None, row_group_size: int | None = None, repeats: int = 3) -> pd.DataFrame:
+    """
+    Escribe ``df`` con el esquema original y el compacto para cada (codec, nivel) y mide
+    tamaño, tiempo de escritura y de lectura (mejor de ``repeats``).
+    """
+    codecs = codecs or [("snappy", None), ("lz4", None), ("zstd", 1), ("zstd", 3), ("zstd", 9), ("gzip", None), ("none", None)]
+    out_dir = Path(out_dir or tempfile.mkdtemp(prefix="parquet_bench_"))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    frames = {"original": df, "compact": compact_dataframe(df)}
+    raw_mb = df.memory_usage(deep=True).sum() / 1e6
+
+    rows = []
+    for schema, frame in frames.items():
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        for codec, level in codecs:
+            path = out_dir / f"{schema}_{codec}_{level}.parquet"
+            write_s = read_s = float("inf")
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                write_parquet(table, path, compression=codec, compression_level=level, row_group_size=row_group_size)
+                write_s = min(write_s, time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                pq.read_table(path)
+                read_s = min(read_s, time.perf_counter() - t0)
+            size_mb = os.path.getsize(path) / 1e6
+            rows.append({
+                "schema": schema,
+                "codec": codec,
+                "level": level,
+                "size_mb": round(size_mb, 3),
+                "write_s": round(write_s, 4),
+                "read_s": round(read_s, 4),
+                "write_mb_s": round(raw_mb / write_s, 1) if write_s else np.inf,
+                "read_mb_s": round(raw_mb / read_s, 1) if read_s else np.inf,
+            })
+    return pd.DataFrame(rows)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark de codecs Parquet")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("parquet")
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--row-group-size", type=int, default=None)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = pd.read_parquet(args.parquet)
+    print(f"📊 {len(df):,} filas, {df.memory_usage(deep=True).sum() / 1e6:.1f} MB en memoria")
+    result = benchmark_codecs(df, args.out, row_group_size=args.row_group_size, repeats=args.repeats)
+    print(result.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""
+Almacén por píxel: las observaciones de cada celda de la malla, contiguas y en orden de tiempo.
+
+``create_sequences`` desliza la ventana sobre las filas en el orden del fichero, así
+que una ventana mezcla píxeles y granules distintos; y rehacer el orden en pandas
+(``sort_values`` + ``groupby(['lat', 'lon']).shift``) es muy lento con claves float.
+Aquí las filas se reordenan una vez por (cell_id, time) con cell_id entero de
+``colocation.GridSpec`` y cada columna se guarda como un .npy contiguo:
+
+- ``cells.npy``: ids de celda únicos y ordenados
+- ``offsets.npy``: inicio de cada celda (len(cells) + 1); la celda k ocupa
+  ``offsets[k]:offsets[k + 1]``
+- ``time.npy`` (segundos epoch) y ``<columna>.npy`` (float32, NaN para nulos)
+
+Cada construcción es una versión en ``<almacén>/<versión>/`` y ``<almacén>/CURRENT``
+apunta a la vigente. Es el mismo formato que lee ``CellTimeSeriesIndex`` del API, así
+que un almacén sirve también como índice de series temporales.
+
+La construcción no carga el producto en memoria: una primera pasada reparte las filas
+en ficheros temporales por franjas de latitud y una segunda ordena cada franja y la
+escribe en su sitio. Con los arrays mapeados en memoria, los retardos por píxel
+(``lag``) y las ventanas de entrenamiento (``window_starts``, ``PixelWindowStream``)
+son operaciones vectorizadas sobre slices contiguos que nunca cruzan de una celda a
+otra:
+
+    python pixel_store.py build ./tempo_parquet ./tempo_pixels
+    python pixel_store.py series ./tempo_pixels 40.71 -74.0
+
+    store = PixelStore("./tempo_pixels")
+    no2_prev = store.lag("vertical_column_troposphere", 1)
+    for X, y in PixelWindowStream(store, scaler_X, scaler_y, shuffle=True): ...
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pads
+from numpy.lib.stride_tricks import sliding_window_view
+
+from colocation import DEFAULT_GRID, GridSpec, epoch_seconds
+from training_pipeline import FEATURES, SEQ_LENGTH, TARGET
+
+TIME_COLUMNS = ("time", "tiempo")
+LAT_COLUMNS = ("latitude", "latitud")
+LON_COLUMNS = ("longitude", "longitud")
+META_NAME = "meta.json"
+CURRENT_NAME = "CURRENT"
+
+
+def _pick(names: list[str], candidates: tuple[str, ...]) -> str:
+    for name in candidates:
+        if name in names:
+            return name
+    raise ValueError(f"El producto no tiene columna {candidates[0]}")
+
+
+def _as_float32(column: pa.Array) -> np.ndarray:
+    if column.null_count:
+        column = pc.fill_null(pc.cast(column, pa.float64()), float("nan"))
+    return column.to_numpy(zero_copy_only=False).astype(np.float32, copy=False)
+
+
+def build_pixel_store(source: str | Path, out_dir: str | Path, columns: Sequence[str] | None = None, grid: GridSpec = DEFAULT_GRID, n_buckets: int = 256, read_batch_size: int = 262_144, keep: int = 2) -> Path:
+    """
+    Construye el almacén por píxel de un producto (carpeta Parquet particionada o fichero).
+
+    La memoria depende de ``read_batch_size`` y del tamaño de la franja más poblada
+    (``n_buckets`` franjas de latitud), no del tamaño del producto. La versión se
+    escribe en un directorio temporal y ``CURRENT`` se sustituye con ``os.replace`` al
+    final, así que los lectores ven el anterior o el nuevo, nunca uno a medias. Se
+    conservan las ``keep`` versiones más recientes; retorna la carpeta de la nueva.
+    """
+    source, out_dir = Path(source), Path(out_dir)
+    dataset = pads.dataset(str(source), format="parquet", partitioning="hive")
+    names = dataset.schema.names
+    t_name, lat_name, lon_name = _pick(names, TIME_COLUMNS), _pick(names, LAT_COLUMNS), _pick(names, LON_COLUMNS)
+    if columns is None:
+        columns = [
+            f.name for f in dataset.schema
+            if f.name not in (t_name, lat_name, lon_name) and (pa.types.is_floating(f.type) or pa.types.is_integer(f.type))
+        ]
+    columns = list(columns)
+
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    tmp = out_dir / f".{version}.building"
+    shutil.rmtree(tmp, ignore_errors=True)
+    spill = tmp / "_spill"
+    spill.mkdir(parents=True)
+
+    # 1ª pasada: filas -> ficheros crudos por franja de latitud (cell_id, time, columnas)
+    n_rows_grid = int(round(180.0 / grid.resolution))
+    rows_per_bucket = -(-n_rows_grid // n_buckets)
+    counts = np.zeros(n_buckets, dtype=np.int64)
+    for batch in dataset.to_batches(columns=[t_name, lat_name, lon_name, *columns], batch_size=read_batch_size):
+        if batch.num_rows == 0:
+            continue
+        cells = grid.cell_ids(batch.column(lat_name).to_numpy(zero_copy_only=False), batch.column(lon_name).to_numpy(zero_copy_only=False))
+        inside = (cells >= 0) & (cells < n_rows_grid * grid.n_cols)
+        buckets = (cells // grid.n_cols) // rows_per_bucket
+        order = np.argsort(np.where(inside, buckets, n_buckets), kind="stable")[:int(inside.sum())]
+        arrays = {
+            "cell": cells[order],
+            "time": epoch_seconds(batch.column(t_name))[order],
+            **{c: _as_float32(batch.column(c))[order] for c in columns},
+        }
+        present, starts, sizes = np.unique(buckets[order], return_index=True, return_counts=True)
+        for b, s, n in zip(present, starts, sizes):
+            counts[b] += n
+            for name, values in arrays.items():
+                with open(spill / f"{b}.{name}.bin", "ab") as f:
+                    values[s:s + n].tofile(f)
+
+    # 2ª pasada: cada franja se ordena por (cell_id, time) y se copia a su posición final
+    total = int(counts.sum())
+    out_time = np.lib.format.open_memmap(tmp / "time.npy", mode="w+", dtype=np.int64, shape=(total,))
+    out_cols = {c: np.lib.format.open_memmap(tmp / f"{c}.npy", mode="w+", dtype=np.float32, shape=(total,)) for c in columns}
+    unique_cells, cell_starts = [], []
+    pos = 0
+    for b in np.flatnonzero(counts):
+        cells = np.fromfile(spill / f"{b}.cell.bin", dtype=np.int64)
+        times = np.fromfile(spill / f"{b}.time.bin", dtype=np.int64)
+        order = np.lexsort((times, cells))
+        cells = cells[order]
+        n = len(cells)
+        out_time[pos:pos + n] = times[order]
+        for c in columns:
+            out_cols[c][pos:pos + n] = np.fromfile(spill / f"{b}.{c}.bin", dtype=np.float32)[order]
+        u, s = np.unique(cells, return_index=True)
+        unique_cells.append(u)
+        cell_starts.append(s + pos)
+        pos += n
+    for array in (out_time, *out_cols.values()):
+        array.flush()
+    del out_time, out_cols
+    shutil.rmtree(spill)
+
+    cells = np.concatenate(unique_cells) if unique_cells else np.empty(0, dtype=np.int64)
+    offsets = np.append(np.concatenate(cell_starts) if cell_starts else np.empty(0, dtype=np.int64), total).astype(np.int64)
+    np.save(tmp / "cells.npy", cells)
+    np.save(tmp / "offsets.npy", offsets)
+    meta = {
+        "version": version, "resolution": grid.resolution, "lat0": grid.lat0, "lon0": grid.lon0,
+        "columns": columns, "rows": total, "cells": int(len(cells)), "built_at": time.time(),
+    }
+    (tmp / META_NAME).write_text(json.dumps(meta), encoding="utf-8")
+
+    final = out_dir / version
+    tmp.rename(final)
+    pointer = out_dir / (CURRENT_NAME + ".tmp")
+    pointer.write_text(version, encoding="utf-8")
+    os.replace(pointer, out_dir / CURRENT_NAME)
+
+    # Almacenes del formato anterior (arrays directamente en out_dir) y versiones viejas
+    for legacy in [*out_dir.glob("*.npy"), out_dir / META_NAME]:
+        legacy.unlink(missing_ok=True)
+    versions = sorted(p for p in out_dir.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for old in versions[:-keep] if keep else []:
+        if old.name != version:
+            shutil.rmtree(old, ignore_errors=True)
+    print(f"🗂️ Almacén por píxel {out_dir.name} ({version}): {total:,} filas en {len(cells):,} celdas")
+    return final
+
+
+class PixelStore:
+    """
+    Lector de un almacén por píxel: arrays mapeados en memoria, sin cargar nada al abrir.
+
+    ``path`` es el almacén (se abre la versión de ``CURRENT``) o una versión concreta.
+    """
+
+    def __init__(self, path: str | Path):
+        path = Path(path)
+        if (path / CURRENT_NAME).exists():
+            path = path / (path / CURRENT_NAME).read_text(encoding="utf-8").strip()
+        self.path = path
+        self.meta = json.loads((self.path / META_NAME).read_text(encoding="utf-8"))
+        self.grid = GridSpec(self.meta["resolution"], self.meta.get("lat0", -90.0), self.meta.get("lon0", -180.0))
+        self.cells = np.load(self.path / "cells.npy", mmap_mode="r")
+        self.offsets = np.load(self.path / "offsets.npy", mmap_mode="r")
+        self.time = np.load(self.path / "time.npy", mmap_mode="r")
+        self.columns = {c: np.load(self.path / f"{c}.npy", mmap_mode="r") for c in self.meta["columns"]}
+        self._row_cells: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @property
+    def n_cells(self) -> int:
+        return len(self.cells)
+
+    def locate(self, lat: float, lon: float) -> int | None:
+        """Posición de la celda que contiene (lat, lon), o None si no tiene observaciones."""
+        cid = int(self.grid.cell_ids(np.array([lat]), np.array([lon]))[0])
+        k = int(np.searchsorted(self.cells, cid))
+        return k if k < len(self.cells) and self.cells[k] == cid else None
+
+    def series(self, k: int, columns: Sequence[str] | None = None) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """(time, {columna: valores}) de la celda en la posición k: slices, sin copia."""
+        s = slice(int(self.offsets[k]), int(self.offsets[k + 1]))
+        return self.time[s], {c: self.columns[c][s] for c in (columns or self.columns)}
+
+    def row_cells(self) -> np.ndarray:
+        """Posición de celda de cada fila (int32, se calcula una vez)."""
+        if self._row_cells is None:
+            self._row_cells = np.repeat(np.arange(self.n_cells, dtype=np.int32), np.diff(self.offsets))
+        return self._row_cells
+
+    def lag(self, column: str, k: int = 1, max_gap: int | None = None) -> np.ndarray:
+        """
+        Valor de ``column`` k observaciones antes en el mismo píxel (NaN si no hay).
+
+        Equivale a ``groupby(['lat', 'lon'])[column].shift(k)`` tras ordenar por tiempo,
+        pero es un desplazamiento del array entero con una máscara de frontera de celda.
+        Con ``max_gap`` (segundos) también es NaN si la observación anterior es más vieja.
+        """
+        values = self.columns[column]
+        out = np.full(len(values), np.nan, dtype=np.float32)
+        if k <= 0 or k >= len(values):
+            return out
+        rc = self.row_cells()
+        same = rc[k:] == rc[:-k]
+        if max_gap is not None:
+            same &= (self.time[k:] - self.time[:-k]) <= max_gap
+        out[k:] = np.where(same, values[:-k], np.nan)
+        return out
+
+    def window_starts(self, seq_length: int = SEQ_LENGTH, columns: Sequence[str] = (), max_span: int | None = None, target_range: tuple[int, int] | None = None) -> np.ndarray:
+        """
+        Filas i tales que la ventana [i, i + seq_length) y su objetivo i + seq_length
+        pertenecen a la misma celda.
+
+        Se descartan las ventanas con NaN en ``columns``, las que abarcan más de
+        ``max_span`` segundos y, con ``target_range`` = (inicio, fin) en segundos epoch,
+        las cuyo objetivo cae fuera de [inicio, fin).
+        """
+        n = len(self) - seq_length
+        if n <= 0:
+            return np.empty(0, dtype=np.int64)
+        rc = self.row_cells()
+        valid = rc[:n] == rc[seq_length:]
+        if columns:
+            bad = np.zeros(len(self), dtype=bool)
+            for c in columns:
+                bad |= np.isnan(self.columns[c])
+            cum = np.concatenate([[0], np.cumsum(bad, dtype=np.int64)])
+            valid &= (cum[seq_length + 1:] - cum[:n]) == 0
+        target_time = self.time[seq_length:]
+        if max_span is not None:
+            valid &= (target_time - self.time[:n]) <= max_span
+        if target_range is not None:
+            valid &= (target_time >= target_range[0]) & (target_time < target_range[1])
+        return np.flatnonzero(valid)
+
+    def time_cutoff(self, val_fraction: float = 0.2) -> int:
+        """Instante que deja ``val_fraction`` de las observaciones después (split temporal)."""
+        return int(np.quantile(self.time, 1.0 - val_fraction))
+
+
+def fit_store_scalers(store: PixelStore, features: Sequence[str] = FEATURES, target: str = TARGET, chunk_rows: int = 1_048_576, time_range: tuple[int, int] | None = None):
+    """
+    Ajusta MinMaxScaler de X e y con partial_fit sobre las filas sin NaN del almacén.
+
+    Con ``time_range`` = (inicio, fin) en segundos epoch solo usa las filas de ese
+    intervalo, p. ej. ``(0, cutoff)`` para no ver la validación al escalar.
+    """
+    from sklearn.preprocessing import MinMaxScaler
+
+    scaler_X, scaler_y = MinMaxScaler(), MinMaxScaler()
+    rows = 0
+    for start in range(0, len(store), chunk_rows):
+        data = np.column_stack([store.columns[c][start:start + chunk_rows] for c in (*features, target)]).astype(np.float64)
+        valid = ~np.isnan(data).any(axis=1)
+        if time_range is not None:
+            t = store.time[start:start + chunk_rows]
+            valid &= (t >= time_range[0]) & (t < time_range[1])
+        data = data[valid]
+        if len(data):
+            scaler_X.partial_fit(data[:, :-1])
+            scaler_y.partial_fit(data[:, -1:])
+            rows += len(data)
+    if rows == 0:
+        raise ValueError("No hay filas válidas para ajustar los escaladores")
+    print(f"📏 Escaladores ajustados con {rows:,} filas de {store.n_cells:,} celdas")
+    return scaler_X, scaler_y
+
+
+class PixelWindowStream:
+    """
+    Iterable de mini-lotes (X: (b, seq_length, F) float32, y: (b, 1) float32) por píxel.
+
+    Mismo contrato que ``training_pipeline.WindowStream`` (sirve con ``make_tf_dataset``
+    y ``evaluate``), pero cada ventana son ``seq_length`` observaciones consecutivas de
+    una sola celda y su objetivo es la siguiente observación de esa celda. Cada
+    mini-lote se reúne con un índice sobre vistas ``sliding_window_view`` de las
+    columnas mapeadas en memoria; solo se copia el propio mini-lote.
+    """
+
+    def __init__(self, store: PixelStore, scaler_X, scaler_y, features: Sequence[str] = FEATURES, target: str = TARGET, seq_length: int = SEQ_LENGTH, batch_size: int = 64, shuffle: bool = False, seed: int | None = None, max_span: int | None = None, target_range: tuple[int, int] | None = None):
+        self.store = store
+        self.scaler_X = scaler_X
+        self.scaler_y = scaler_y
+        self.features = list(features)
+        self.target = target
+        self.seq_length = seq_length
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        self.starts = store.window_starts(seq_length, [*self.features, target], max_span, target_range)
+
+    def __iter__(self) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        seq = self.seq_length
+        views = [sliding_window_view(self.store.columns[c], seq) for c in self.features]
+        target = self.store.columns[self.target]
+        starts = self._rng.permutation(self.starts) if self.shuffle else self.starts
+        for i in range(0, len(starts), self.batch_size):
+            idx = starts[i:i + self.batch_size]
+            X = np.stack([v[idx] for v in views], axis=-1).astype(np.float64)
+            b, s, f = X.shape
+            X = self.scaler_X.transform(X.reshape(-1, f)).reshape(b, s, f).astype(np.float32)
+            y = self.scaler_y.transform(target[idx + seq].astype(np.float64).reshape(-1, 1)).astype(np.float32)
+            yield X, y
+
+    def steps(self) -> int:
+        return -(-len(self.starts) // self.batch_size)
+
+
+def _cmd_build(args) -> None:
+    grid = GridSpec(resolution=args.resolution)
+    build_pixel_store(args.source, args.out, columns=args.columns, grid=grid, n_buckets=args.buckets, read_batch_size=args.read_batch_size)
+
+
+def _cmd_info(args) -> None:
+    store = PixelStore(args.store)
+    counts = np.diff(store.offsets)
+    print(f"📦 {store.path}: {len(store):,} filas, {store.n_cells:,} celdas, columnas: {', '.join(store.columns)}")
+    if store.n_cells:
+        print(f"   observaciones por celda: media {counts.mean():.1f}, p50 {int(np.median(counts))}, máx {int(counts.max())}")
+        print(f"   ventanas de {args.seq_length}: {len(store.window_starts(args.seq_length)):,}")
+
+
+def _cmd_series(args) -> None:
+    store = PixelStore(args.store)
+    k = store.locate(args.lat, args.lon)
+    if k is None:
+        print("⚠️ Sin observaciones en esa celda")
+        return
+    times, values = store.series(k, args.columns)
+    for i, t in enumerate(times):
+        stamp = datetime.fromtimestamp(int(t), tz=timezone.utc).isoformat()
+        print(stamp, " ".join(f"{c}={values[c][i]:.6g}" for c in values))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Almacén por píxel de observaciones TEMPO")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="construye el almacén desde Parquet")
+    p.add_argument("source")
+    p.add_argument("out")
+    p.add_argument("--columns", nargs="+")
+    p.add_argument("--resolution", type=float, default=DEFAULT_GRID.resolution)
+    p.add_argument("--buckets", type=int, default=256)
+    p.add_argument("--read-batch-size", type=int, default=262_144)
+    p.set_defaults(func=_cmd_build)
+
+    p = sub.add_parser("info", help="resumen del almacén")
+    p.add_argument("store")
+    p.add_argument("--seq-length", type=int, default=SEQ_LENGTH)
+    p.set_defaults(func=_cmd_info)
+
+    p = sub.add_parser("series", help="serie de la celda de un punto")
+    p.add_argument("store")
+    p.add_argument("lat", type=float)
+    p.add_argument("lon", type=float)
+    p.add_argument("--columns", nargs="+")
+    p.set_defaults(func=_cmd_series)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,85 +1,142 @@
+import argparse
+import sys
 from pathlib import Path
-import pandas as pd
-import numpy as np
-from datetime import datetime
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import r2_score, mean_squared_error
-from joblib import dump
-import tensorflow as tf
+
+import training_pipeline
+from dataset_cache import DatasetCache
+from joblib import dump, load
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 
-root_dir = Path("./tempo_parquet")
-
-today_str = datetime.utcnow().strftime("%Y-%m-%d")
-
-file_path = root_dir / f"tempo_data_{today_str}.parquet"
-df = pd.read_parquet(file_path)
-
-features = [
-    "vertical_column_troposphere",
-    "vertical_column_troposphere_uncertainty",
-    "vertical_column_stratosphere",
-]
-
-X = df[features]
-y = df["main_data_quality_flag"]
-
-scaler_X = MinMaxScaler()
-scaler_y = MinMaxScaler()
-
-X_scaled = scaler_X.fit_transform(X)
-y_scaled = scaler_y.fit_transform(y.values.reshape(-1, 1))
-
-def create_sequences(X, y, seq_length=10):
-    Xs, ys = [], []
-    for i in range(len(X) - seq_length):
-        Xs.append(X[i:i + seq_length])
-        ys.append(y[i + seq_length])
-    return np.array(Xs), np.array(ys)
-
-SEQ_LENGTH = 10
-X_seq, y_seq = create_sequences(X_scaled, y_scaled, SEQ_LENGTH)
-
-split = int(0.8 * len(X_seq))
-X_train, X_test = X_seq[:split], X_seq[split:]
-y_train, y_test = y_seq[:split], y_seq[split:]
-
-print(f"🧩 Datos para entrenamiento: {X_train.shape}, prueba: {X_test.shape}")
-
-model = Sequential([
-    LSTM(64, return_sequences=True, input_shape=(SEQ_LENGTH, len(features))),
-    Dropout(0.2),
-    LSTM(32, return_sequences=False),
-    Dense(16, activation="relu"),
-    Dense(1)
-])
-
-model.compile(optimizer="adam", loss="mse")
-model.summary()
-
-history = model.fit(
-    X_train, y_train,
-    validation_data=(X_test, y_test),
-    epochs=20,
-    batch_size=64,
-    verbose=1
+from pixel_store import PixelStore, PixelWindowStream, fit_store_scalers
+from training_pipeline import (
+    FEATURES,
+    SEQ_LENGTH,
+    TARGET,
+    ArrayWindowStream,
+    WindowStream,
+    evaluate,
+    fit_scalers,
+    list_parquet_files,
+    make_tf_dataset,
+    split_files,
+    split_rows,
+    write_scaled_arrays,
 )
 
-pred_scaled = model.predict(X_test)
-pred = scaler_y.inverse_transform(pred_scaled)
-y_real = scaler_y.inverse_transform(y_test)
-
-rmse = np.sqrt(mean_squared_error(y_real, pred))
-r2 = r2_score(y_real, pred)
-print(f"✅ RMSE: {rmse:.4f}")
-print(f"✅ R²: {r2:.4f}")
-
+root_dir = Path("./tempo_parquet")
 
-model.save("tempo_forecast_model.h5")
-dump(model, "tempo_forecast_model.joblib")
-dump(scaler_X, "scaler_X.joblib")
-dump(scaler_y, "scaler_y.joblib")
 
-print("💾 Modelo y escaladores guardados correctamente.")
\ No newline at end of file
+def build_model(seq_length=SEQ_LENGTH, n_features=len(FEATURES)):
+    model = Sequential([
+        LSTM(64, return_sequences=True, input_shape=(seq_length, n_features)),
+        Dropout(0.2),
+        LSTM(32, return_sequences=False),
+        Dense(16, activation="relu"),
+        Dense(1)
+    ])
+    model.compile(optimizer="adam", loss="mse")
+    return model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Entrenamiento del LSTM de TEMPO en streaming")
+    parser.add_argument("source", nargs="?", default=str(root_dir), help="carpeta, patrón o fichero Parquet")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--read-batch-size", type=int, default=65_536)
+    parser.add_argument("--val-fraction", type=float, default=0.2)
+    parser.add_argument("--cache-dir", help="caché de datasets (por defecto DATASET_CACHE_DIR o ./.dataset_cache)")
+    parser.add_argument("--no-cache", action="store_true", help="lee y escala los Parquet en streaming en cada época")
+    parser.add_argument("--rebuild-cache", action="store_true")
+    parser.add_argument("--pixel-store", help="almacén por píxel (pixel_store.py): ventanas de una sola celda en lugar de orden de fichero")
+    args = parser.parse_args(argv)
+
+    if args.pixel_store:
+        store = PixelStore(args.pixel_store)
+        cutoff = store.time_cutoff(args.val_fraction)
+        print(f"🧩 Almacén por píxel: {len(store):,} filas en {store.n_cells:,} celdas; validación desde {cutoff}")
+        scaler_X, scaler_y = fit_store_scalers(store, time_range=(0, cutoff))
+        train = PixelWindowStream(store, scaler_X, scaler_y, batch_size=args.batch_size, shuffle=True, seed=0, target_range=(0, cutoff))
+        val = PixelWindowStream(store, scaler_X, scaler_y, batch_size=args.batch_size, target_range=(cutoff, 2 ** 62))
+        train_and_save(train, val, args.epochs)
+        return
+
+    files = list_parquet_files(args.source)
+    if not files:
+        raise SystemExit(f"❌ No hay ficheros Parquet en {args.source}")
+
+    if not args.no_cache:
+        train, val = cached_streams(files, args)
+        train_and_save(train, val, args.epochs)
+        return
+
+    (train_files, train_rows), (val_files, val_rows) = split(files, args)
+    scaler_X, scaler_y = fit_scalers(train_files, read_batch_size=args.read_batch_size, rows=train_rows)
+    train = WindowStream(train_files, scaler_X, scaler_y, batch_size=args.batch_size, read_batch_size=args.read_batch_size, shuffle=True, seed=0, rows=train_rows)
+    val = WindowStream(val_files, scaler_X, scaler_y, batch_size=args.batch_size, read_batch_size=args.read_batch_size, rows=val_rows)
+    train_and_save(train, val, args.epochs)
+
+
+def split(files, args):
+    """
+    ((ficheros, filas) de entrenamiento, (ficheros, filas) de validación).
+
+    Con varios ficheros se separan por fichero; con uno solo (el caso de
+    ./tempo_parquet), por filas: el último ``val_fraction`` para validación.
+    """
+    if len(files) > 1:
+        train_files, val_files = split_files(files, args.val_fraction)
+        print(f"🧩 Ficheros para entrenamiento: {len(train_files)}, prueba: {len(val_files)}")
+        return (train_files, None), (val_files, None)
+    train_rows, val_rows = split_rows(files, args.val_fraction, read_batch_size=args.read_batch_size)
+    print(f"🧩 Un solo fichero: filas {train_rows[0]:,}–{train_rows[1]:,} para entrenamiento, {val_rows[0]:,}–{val_rows[1]:,} para prueba")
+    return (files, train_rows), (files, val_rows)
+
+
+def cached_streams(files, args):
+    """Arrays escalados de entrenamiento y validación desde la caché (se construyen si faltan)."""
+    config = {"kind": "lstm_scaled_rows", "features": FEATURES, "target": TARGET, "val_fraction": args.val_fraction, "split": "files" if len(files) > 1 else "rows"}
+
+    def build(out_dir):
+        (train_files, train_rows), (val_files, val_rows) = split(files, args)
+        scaler_X, scaler_y = fit_scalers(train_files, read_batch_size=args.read_batch_size, rows=train_rows)
+        dump(scaler_X, out_dir / "scaler_X.joblib")
+        dump(scaler_y, out_dir / "scaler_y.joblib")
+        n_train = write_scaled_arrays(train_files, scaler_X, scaler_y, out_dir, "train", read_batch_size=args.read_batch_size, rows=train_rows)
+        n_val = write_scaled_arrays(val_files, scaler_X, scaler_y, out_dir, "val", read_batch_size=args.read_batch_size, rows=val_rows)
+        return {"rows_train": n_train, "rows_val": n_val}
+
+    cache = DatasetCache(args.cache_dir)
+    entry = cache.get_or_build(files, config, build, code=[training_pipeline, sys.modules[__name__]], rebuild=args.rebuild_cache)
+    scaler_X, scaler_y = load(entry.file("scaler_X.joblib")), load(entry.file("scaler_y.joblib"))
+    train = ArrayWindowStream(entry["X_train"], entry["y_train"], scaler_y, batch_size=args.batch_size, shuffle=True, seed=0, scaler_X=scaler_X)
+    val = ArrayWindowStream(entry["X_val"], entry["y_val"], scaler_y, batch_size=args.batch_size, scaler_X=scaler_X)
+    return train, val
+
+
+def train_and_save(train, val, epochs):
+    scaler_X, scaler_y = train.scaler_X, train.scaler_y
+    model = build_model()
+    model.summary()
+    model.fit(
+        make_tf_dataset(train),
+        validation_data=make_tf_dataset(val),
+        epochs=epochs,
+        verbose=1
+    )
+
+    scores = evaluate(model, val)
+    print(f"✅ RMSE: {scores['rmse']:.4f}")
+    print(f"✅ R²: {scores['r2']:.4f}")
+
+    model.save("tempo_forecast_model.h5")
+    dump(model, "tempo_forecast_model.joblib")
+    dump(scaler_X, "scaler_X.joblib")
+    dump(scaler_y, "scaler_y.joblib")
+
+    print("💾 Modelo y escaladores guardados correctamente.")
+
+
+if __name__ == "__main__":
+    main()
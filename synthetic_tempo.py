@@ -0,0 +1,190 @@
+"""
+Generador de granules TEMPO sintéticos (NetCDF4) para pruebas y benchmarks sin descargas.
+
+Los ficheros imitan la estructura de los productos reales que leen ``ingestion``,
+``convert_nc_to_parquet``, ``earthdataHCHO`` y ``features``:
+
+- L3 (``TEMPO_<PRODUCTO>_L3_V04_<inicio>_S<scan>.nc``): dimensiones time/latitude/
+  longitude con coordenadas 1-D en la raíz y las variables en ``product/``;
+- L2 (``TEMPO_<PRODUCTO>_L2_V04_<inicio>_S<scan>G<granule>.nc``): dimensiones
+  mirror_step/xtrack, ``geolocation/`` con latitude/longitude 2-D, ángulos y un
+  tiempo por scanline, y las variables en ``product/``.
+
+El tiempo es CF (``seconds since 1980-01-06T00:00:00Z``), los huecos usan
+``_FillValue`` (-1e30 en flotantes) y ``main_data_quality_flag`` toma valores 0–2.
+Los valores siguen órdenes de magnitud realistas y son deterministas para una misma
+``seed``. Los tamaños son configurables:
+
+    python synthetic_tempo.py l3 ./tempo_data --product no2 --count 4 --lat 800 --lon 1500
+    python synthetic_tempo.py l2 ./hcho_data/data_today --product hcho --count 2 --mirror-steps 130
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+TIME_UNITS = "seconds since 1980-01-06T00:00:00Z"
+TIME_ORIGIN = datetime(1980, 1, 6, tzinfo=timezone.utc)
+FILL_FLOAT = -1e30
+FILL_FLAG = np.int16(-999)
+# Dominio de TEMPO L3 (0.02°)
+L3_LAT0, L3_LON0, L3_RESOLUTION = 14.01, -167.99, 0.02
+
+# producto -> {variable de product/: (escala log-normal, sigma)}; None = bandera de calidad
+PRODUCT_VARIABLES = {
+    "no2": {
+        "vertical_column_troposphere": (2e15, 0.8),
+        "vertical_column_troposphere_uncertainty": (6e14, 0.5),
+        "vertical_column_stratosphere": (3e15, 0.2),
+        "main_data_quality_flag": None,
+    },
+    "hcho": {
+        "vertical_column": (8e15, 0.6),
+        "vertical_column_uncertainty": (4e15, 0.4),
+        "main_data_quality_flag": None,
+    },
+    "o3tot": {
+        "column_amount_o3": (300.0, 0.1),
+        "uv_aerosol_index": (0.5, 0.6),
+        "quality_flag": None,
+    },
+}
+PRODUCT_NAMES = {"no2": "NO2", "hcho": "HCHO", "o3tot": "O3TOT"}
+L2_ANGLES = ("solar_zenith_angle", "solar_azimuth_angle", "viewing_zenith_angle", "relative_azimuth_angle")
+
+
+def _utc(t: datetime) -> datetime:
+    return t if t.tzinfo else t.replace(tzinfo=timezone.utc)
+
+
+def _cf_seconds(t: datetime) -> float:
+    return (_utc(t) - TIME_ORIGIN).total_seconds()
+
+
+def granule_name(level: str, product: str, start: datetime, scan: int = 1, granule: int = 1, version: str = "V04") -> str:
+    stamp = _utc(start).strftime("%Y%m%dT%H%M%SZ")
+    suffix = f"S{scan:03d}G{granule:02d}" if level == "L2" else f"S{scan:03d}"
+    return f"TEMPO_{PRODUCT_NAMES[product]}_{level}_{version}_{stamp}_{suffix}.nc"
+
+
+def _fields(rng: np.random.Generator, product: str, shape: tuple, fill_fraction: float) -> dict[str, np.ndarray]:
+    """Variables de ``product/`` con huecos (nubes) en ``fill_fraction`` de los píxeles."""
+    gaps = rng.random(shape) < fill_fraction
+    out = {}
+    for name, params in PRODUCT_VARIABLES[product].items():
+        if params is None:
+            flag = rng.choice(np.array([0, 1, 2], dtype=np.int16), size=shape, p=[0.7, 0.2, 0.1])
+            out[name] = np.where(gaps, FILL_FLAG, flag).astype(np.int16)
+        else:
+            scale, sigma = params
+            values = scale * rng.lognormal(0.0, sigma, shape)
+            out[name] = np.where(gaps, FILL_FLOAT, values)
+    return out
+
+
+def _write_product(f, fields: dict[str, np.ndarray], dims: tuple[str, ...]) -> None:
+    group = f.create_group("product")
+    for name, values in fields.items():
+        fill = FILL_FLAG if values.dtype == np.int16 else FILL_FLOAT
+        var = group.create_variable(name, dims, values.dtype, fillvalue=fill)
+        var[...] = values
+
+
+def write_l3(path: str | Path, start: datetime, product: str = "no2", n_lat: int = 800, n_lon: int = 1500, n_times: int = 1, lat0: float = 30.01, lon0: float = -110.99, resolution: float = L3_RESOLUTION, fill_fraction: float = 0.3, seed: int = 0) -> Path:
+    """Granule L3: variables (time, latitude, longitude) sobre una malla regular."""
+    import h5netcdf
+
+    rng = np.random.default_rng(seed)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with h5netcdf.File(path, "w") as f:
+        f.dimensions = {"time": n_times, "latitude": n_lat, "longitude": n_lon}
+        t = f.create_variable("time", ("time",), "f8")
+        t.attrs["units"] = TIME_UNITS
+        t[:] = _cf_seconds(start) + np.arange(n_times) * 3600.0
+        f.create_variable("latitude", ("latitude",), "f4")[:] = lat0 + np.arange(n_lat) * resolution
+        f.create_variable("longitude", ("longitude",), "f4")[:] = lon0 + np.arange(n_lon) * resolution
+        _write_product(f, _fields(rng, product, (n_times, n_lat, n_lon), fill_fraction), ("time", "latitude", "longitude"))
+    return path
+
+
+def write_l2(path: str | Path, start: datetime, product: str = "no2", mirror_steps: int = 130, xtrack: int = 2048, lat0: float = 25.0, lon0: float = -110.0, scan_seconds: float = 2.86, fill_fraction: float = 0.3, seed: int = 0) -> Path:
+    """Granule L2: barrido (mirror_step, xtrack) con geolocalización 2-D y un tiempo por scanline."""
+    import h5netcdf
+
+    rng = np.random.default_rng(seed)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    shape = (mirror_steps, xtrack)
+    step = np.arange(mirror_steps)[:, None]
+    track = np.arange(xtrack)[None, :]
+    # ~2 km norte-sur por píxel, ~4.75 km este-oeste por scanline, con algo de inclinación
+    lat = (lat0 + track * 0.018 + step * 0.002 + rng.normal(0, 0.001, shape)).astype(np.float32)
+    lon = (lon0 + step * 0.045 + track * 0.001 + rng.normal(0, 0.001, shape)).astype(np.float32)
+    edge = rng.random(shape) < 0.01
+    lat[edge] = np.float32(FILL_FLOAT)
+    lon[edge] = np.float32(FILL_FLOAT)
+
+    with h5netcdf.File(path, "w") as f:
+        f.dimensions = {"mirror_step": mirror_steps, "xtrack": xtrack}
+        geo = f.create_group("geolocation")
+        for name, values in (("latitude", lat), ("longitude", lon)):
+            geo.create_variable(name, ("mirror_step", "xtrack"), "f4", fillvalue=np.float32(FILL_FLOAT))[...] = values
+        for name in L2_ANGLES:
+            upper = 180.0 if "azimuth" in name else 90.0
+            geo.create_variable(name, ("mirror_step", "xtrack"), "f4", fillvalue=np.float32(FILL_FLOAT))[...] = rng.uniform(0, upper, shape).astype(np.float32)
+        t = geo.create_variable("time", ("mirror_step",), "f8")
+        t.attrs["units"] = TIME_UNITS
+        t[:] = _cf_seconds(start) + np.arange(mirror_steps) * scan_seconds
+        _write_product(f, _fields(rng, product, shape, fill_fraction), ("mirror_step", "xtrack"))
+    return path
+
+
+def generate(out_dir: str | Path, level: str = "L3", product: str = "no2", count: int = 1, start: datetime | None = None, interval: timedelta = timedelta(hours=1), seed: int = 0, **size) -> list[Path]:
+    """``count`` granules consecutivos (uno por ``interval``) en ``out_dir``; ``size`` va a write_l3/write_l2."""
+    level = level.upper()
+    if level not in ("L2", "L3"):
+        raise ValueError(f"Nivel desconocido: {level}")
+    if product not in PRODUCT_VARIABLES:
+        raise ValueError(f"Producto desconocido: {product} (disponibles: {', '.join(PRODUCT_VARIABLES)})")
+    start = _utc(start or datetime(2025, 10, 4, 12, tzinfo=timezone.utc))
+    out_dir = Path(out_dir)
+    paths = []
+    for i in range(count):
+        t = start + i * interval
+        if level == "L3":
+            paths.append(write_l3(out_dir / granule_name("L3", product, t, scan=i + 1), t, product, seed=seed + i, **size))
+        else:
+            paths.append(write_l2(out_dir / granule_name("L2", product, t, scan=1, granule=i + 1), t, product, seed=seed + i, **size))
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Granules TEMPO sintéticos")
+    parser.add_argument("level", choices=["l2", "l3"])
+    parser.add_argument("out_dir")
+    parser.add_argument("--product", choices=sorted(PRODUCT_VARIABLES), default="no2")
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--start", default="2025-10-04T12:00:00", help="inicio del primer granule (UTC)")
+    parser.add_argument("--interval-minutes", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fill-fraction", type=float, default=0.3)
+    parser.add_argument("--lat", type=int, default=800, help="L3: filas de latitud")
+    parser.add_argument("--lon", type=int, default=1500, help="L3: columnas de longitud")
+    parser.add_argument("--mirror-steps", type=int, default=130, help="L2: scanlines")
+    parser.add_argument("--xtrack", type=int, default=2048, help="L2: píxeles por scanline")
+    args = parser.parse_args(argv)
+
+    size = {"n_lat": args.lat, "n_lon": args.lon} if args.level == "l3" else {"mirror_steps": args.mirror_steps, "xtrack": args.xtrack}
+    paths = generate(
+        args.out_dir, args.level, args.product, args.count,
+        start=datetime.fromisoformat(args.start), interval=timedelta(minutes=args.interval_minutes),
+        seed=args.seed, fill_fraction=args.fill_fraction, **size,
+    )
+    total = sum(p.stat().st_size for p in paths)
+    print(f"🧪 {len(paths)} granules {args.level.upper()} {args.product} ({total / 1e6:.1f} MB) → {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Pipeline de entrenamiento en streaming para el LSTM de ``prediction_data.py``.
+
+En lugar de cargar un día completo en pandas y construir todas las ventanas en una
+lista (10× el tamaño de la entrada), los datos se leen por lotes de row groups de
+cualquier número de ficheros Parquet y:
+
+1. los escaladores se ajustan con ``partial_fit`` en una primera pasada;
+2. las ventanas de ``seq_length`` filas son vistas ``sliding_window_view`` sin copia
+   sobre cada lote (con las últimas filas del lote anterior como arrastre, así no se
+   pierde ninguna ventana entre lotes); solo se copia cada mini-lote de entrenamiento;
+3. ``make_tf_dataset`` envuelve el generador en un ``tf.data.Dataset`` con prefetch.
+
+La memoria depende de ``read_batch_size`` y ``batch_size``, no de los días de datos.
+
+    files = list_parquet_files("./tempo_parquet")
+    scaler_X, scaler_y = fit_scalers(files)
+    train = WindowStream(files, scaler_X, scaler_y)
+    model.fit(make_tf_dataset(train), epochs=20)
+"""
+from pathlib import Path
+from typing import Iterator, Sequence
+
+import numpy as np
+import pyarrow.parquet as pq
+from numpy.lib.stride_tricks import sliding_window_view
+
+FEATURES = [
+    "vertical_column_troposphere",
+    "vertical_column_troposphere_uncertainty",
+    "vertical_column_stratosphere",
+]
+TARGET = "main_data_quality_flag"
+SEQ_LENGTH = 10
+
+
+def list_parquet_files(source: str | Path | Sequence[str | Path]) -> list[Path]:
+    """Ficheros Parquet de una carpeta (recursivo), un patrón glob, un fichero o una lista."""
+    if isinstance(source, (list, tuple)):
+        return [Path(p) for p in source]
+    source = Path(source)
+    if source.is_dir():
+        return sorted(source.rglob("*.parquet"))
+    if any(ch in source.name for ch in "*?["):
+        return sorted(source.parent.glob(source.name))
+    return [source]
+
+
+def iter_arrays(files: Sequence[str | Path], features: Sequence[str] = FEATURES, target: str = TARGET, read_batch_size: int = 65_536, rows: tuple[int, int] | None = None) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    (X, y) float64 por lote de row groups, fichero a fichero.
+
+    Las filas con NaN en alguna característica o en el objetivo se descartan.
+    ``rows=(inicio, fin)`` limita la salida a ese rango de filas válidas (ver ``split_rows``).
+    """
+    columns = [*features, target]
+    start, stop = rows or (0, None)
+    seen = 0
+    for path in files:
+        pf = pq.ParquetFile(str(path))
+        for batch in pf.iter_batches(batch_size=read_batch_size, columns=columns):
+            if stop is not None and seen >= stop:
+                return
+            data = np.column_stack([
+                batch.column(i).to_numpy(zero_copy_only=False).astype(np.float64, copy=False)
+                for i in range(len(columns))
+            ])
+            data = data[~np.isnan(data).any(axis=1)]
+            lo = max(0, start - seen)
+            hi = len(data) if stop is None else min(len(data), stop - seen)
+            seen += len(data)
+            data = data[lo:hi]
+            if len(data):
+                yield data[:, :-1], data[:, -1:]
+
+
+def count_rows(files: Sequence[str | Path], features: Sequence[str] = FEATURES, target: str = TARGET, read_batch_size: int = 65_536) -> int:
+    """Número de filas válidas (las que entrega ``iter_arrays``)."""
+    return sum(len(y) for _, y in iter_arrays(files, features, target, read_batch_size))
+
+
+def fit_scalers(files: Sequence[str | Path], features: Sequence[str] = FEATURES, target: str = TARGET, read_batch_size: int = 65_536, rows: tuple[int, int] | None = None):
+    """Ajusta MinMaxScaler de X e y con partial_fit, un lote cada vez. ``rows`` se pasa a ``iter_arrays``."""
+    from sklearn.preprocessing import MinMaxScaler
+
+    scaler_X, scaler_y = MinMaxScaler(), MinMaxScaler()
+    fitted = 0
+    for X, y in iter_arrays(files, features, target, read_batch_size, rows):
+        scaler_X.partial_fit(X)
+        scaler_y.partial_fit(y)
+        fitted += len(X)
+    if fitted == 0:
+        raise ValueError("No hay filas válidas para ajustar los escaladores")
+    print(f"📏 Escaladores ajustados con {fitted:,} filas de {len(files)} ficheros")
+    return scaler_X, scaler_y
+
+
+class WindowStream:
+    """
+    Iterable de mini-lotes (X: (b, seq_length, F) float32, y: (b, 1) float32).
+
+    Cada ventana i cubre las filas [i, i + seq_length) y su objetivo es la fila
+    i + seq_length, igual que ``create_sequences``. Con ``shuffle=True`` las
+    ventanas se barajan dentro de cada lote leído. ``rows`` se pasa a ``iter_arrays``.
+    """
+
+    def __init__(self, files: Sequence[str | Path], scaler_X, scaler_y, features: Sequence[str] = FEATURES, target: str = TARGET, seq_length: int = SEQ_LENGTH, batch_size: int = 64, read_batch_size: int = 65_536, shuffle: bool = False, seed: int | None = None, rows: tuple[int, int] | None = None):
+        self.files = list(files)
+        self.rows = rows
+        self.scaler_X = scaler_X
+        self.scaler_y = scaler_y
+        self.features = list(features)
+        self.target = target
+        self.seq_length = seq_length
+        self.batch_size = batch_size
+        self.read_batch_size = read_batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+
+    def __iter__(self) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        seq = self.seq_length
+        n_features = len(self.features)
+        carry_X = np.empty((0, n_features), dtype=np.float32)
+        carry_y = np.empty((0, 1), dtype=np.float32)
+        for X, y in iter_arrays(self.files, self.features, self.target, self.read_batch_size, self.rows):
+            X = np.concatenate([carry_X, self.scaler_X.transform(X).astype(np.float32)])
+            y = np.concatenate([carry_y, self.scaler_y.transform(y).astype(np.float32)])
+            n = len(X) - seq
+            if n > 0:
+                # (n + 1, F, seq) -> (n + 1, seq, F): vista, sin copia
+                windows = sliding_window_view(X, seq, axis=0).transpose(0, 2, 1)[:n]
+                targets = y[seq:]
+                order = self._rng.permutation(n) if self.shuffle else np.arange(n)
+                for start in range(0, n, self.batch_size):
+                    idx = order[start:start + self.batch_size]
+                    yield windows[idx], targets[idx]
+            carry_X, carry_y = X[-seq:].copy(), y[-seq:].copy()
+
+    def steps(self) -> int:
+        """Número de mini-lotes de una pasada (recorre los datos; útil para steps_per_epoch)."""
+        return sum(1 for _ in self)
+
+
+def write_scaled_arrays(files: Sequence[str | Path], scaler_X, scaler_y, out_dir: str | Path, name: str, features: Sequence[str] = FEATURES, target: str = TARGET, read_batch_size: int = 65_536, rows: tuple[int, int] | None = None) -> int:
+    """
+    Escribe ``X_<name>.npy`` (filas, F) e ``y_<name>.npy`` (filas, 1) float32 ya escalados,
+    en el orden de ``iter_arrays``: las mismas filas que recorre ``WindowStream``.
+    """
+    from dataset_cache import NpyWriter
+
+    out_dir = Path(out_dir)
+    wx = NpyWriter(out_dir / f"X_{name}.npy", np.float32, (len(features),))
+    wy = NpyWriter(out_dir / f"y_{name}.npy", np.float32, (1,))
+    for X, y in iter_arrays(files, features, target, read_batch_size, rows):
+        wx.append(scaler_X.transform(X))
+        wy.append(scaler_y.transform(y))
+    wx.close()
+    wy.close()
+    return wx.rows
+
+
+class ArrayWindowStream:
+    """
+    Mismo contrato que ``WindowStream`` sobre arrays ya escalados (p.ej. mapeados desde
+    ``dataset_cache``): las ventanas son una vista ``sliding_window_view`` del array
+    completo y solo se copia cada mini-lote. Con ``shuffle=True`` se barajan todas
+    las ventanas, no solo las de un lote leído.
+    """
+
+    def __init__(self, X: np.ndarray, y: np.ndarray, scaler_y, features: Sequence[str] = FEATURES, seq_length: int = SEQ_LENGTH, batch_size: int = 64, shuffle: bool = False, seed: int | None = None, scaler_X=None):
+        self.X = X
+        self.y = y
+        self.scaler_X = scaler_X
+        self.scaler_y = scaler_y
+        self.features = list(features)
+        self.seq_length = seq_length
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return max(0, len(self.X) - self.seq_length)
+
+    def __iter__(self) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        n = len(self)
+        if n == 0:
+            return
+        windows = sliding_window_view(self.X, self.seq_length, axis=0).transpose(0, 2, 1)[:n]
+        targets = self.y[self.seq_length:]
+        order = self._rng.permutation(n) if self.shuffle else None
+        for start in range(0, n, self.batch_size):
+            if order is None:
+                yield np.asarray(windows[start:start + self.batch_size]), np.asarray(targets[start:start + self.batch_size])
+            else:
+                idx = np.sort(order[start:start + self.batch_size])
+                yield windows[idx], targets[idx]
+
+    def steps(self) -> int:
+        return -(-len(self) // self.batch_size)
+
+
+def make_tf_dataset(stream: WindowStream, prefetch: int | None = None):
+    """Envuelve ``stream`` en un tf.data.Dataset (se re-itera en cada época)."""
+    import tensorflow as tf
+
+    signature = (
+        tf.TensorSpec(shape=(None, stream.seq_length, len(stream.features)), dtype=tf.float32),
+        tf.TensorSpec(shape=(None, 1), dtype=tf.float32),
+    )
+    dataset = tf.data.Dataset.from_generator(lambda: iter(stream), output_signature=signature)
+    return dataset.prefetch(prefetch or tf.data.AUTOTUNE)
+
+
+def split_files(files: Sequence[Path], val_fraction: float = 0.2) -> tuple[list[Path], list[Path]]:
+    """
+    Los ficheros más recientes (orden por nombre) para validación, como el 80/20 temporal original.
+
+    Con un solo fichero no hay reparto posible por ficheros: usar ``split_rows``.
+    """
+    files = list(files)
+    if len(files) < 2:
+        raise ValueError("Hacen falta al menos 2 ficheros para separar validación por ficheros; usa split_rows")
+    n_val = max(1, int(round(len(files) * val_fraction)))
+    return files[:-n_val], files[-n_val:]
+
+
+def split_rows(files: Sequence[Path], val_fraction: float = 0.2, features: Sequence[str] = FEATURES, target: str = TARGET, read_batch_size: int = 65_536) -> tuple[tuple[int, int], tuple[int, int]]:
+    """
+    Rangos de filas válidas (entrenamiento, validación): el último ``val_fraction`` para
+    validación, como el corte 80/20 por orden de filas del script original.
+    """
+    n = count_rows(files, features, target, read_batch_size)
+    n_val = int(n * val_fraction)
+    if n_val <= SEQ_LENGTH or n - n_val <= SEQ_LENGTH:
+        raise ValueError(f"Muy pocas filas válidas ({n:,}) para separar entrenamiento y validación")
+    return (0, n - n_val), (n - n_val, n)
+
+
+def evaluate(model, stream: WindowStream) -> dict:
+    """RMSE y R² en unidades originales, acumulados en streaming."""
+    n = 0
+    sse = sum_y = sum_y2 = 0.0
+    for X, y in stream:
+        pred = stream.scaler_y.inverse_transform(np.asarray(model.predict_on_batch(X)).reshape(-1, 1))
+        real = stream.scaler_y.inverse_transform(y)
+        sse += float(((real - pred) ** 2).sum())
+        sum_y += float(real.sum())
+        sum_y2 += float((real ** 2).sum())
+        n += len(real)
+    if n == 0:
+        return {"rmse": float("nan"), "r2": float("nan"), "n": 0}
+    sst = sum_y2 - sum_y ** 2 / n
+    return {"rmse": (sse / n) ** 0.5, "r2": 1 - sse / sst if sst > 0 else float("nan"), "n": n}
@@ -0,0 +1,290 @@
+"""
+Búsqueda de hiperparámetros del XGBRegressor del cuaderno, en paralelo y sin reconstruir datos.
+
+En ``Lectura_XGBRegressor_NASA.ipynb`` cada trial de optuna vuelve a pasar el
+DataFrame a XGBoost y los trials corren uno detrás de otro. Aquí:
+
+1. ``build_matrix`` escribe una vez X (float32, columnas ``features.FEATURE_COLUMNS``) e
+   y (``NO2``) como .npy desde los Parquet de ``features.py`` en la caché de
+   ``dataset_cache`` (clave: ficheros, columnas y código); las ejecuciones siguientes
+   los abren mapeados en memoria;
+2. cada proceso de trabajo cuantiza esos arrays una sola vez en ``QuantileDMatrix``
+   (leyendo por trozos, sin copia completa en float) y los reutiliza en todos sus trials;
+3. los procesos comparten un estudio optuna en SQLite, con muestreo TPE y poda por
+   mediana sobre el R² de validación cada ``report_every`` rondas;
+4. al terminar se informa de trials/hora, tiempo por trial y trials podados.
+
+    python tune_xgboost.py ./features --trials 50 --workers 4 --storage sqlite:///tuning.db
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import features as features_module
+from dataset_cache import DatasetCache
+from features import FEATURE_COLUMNS, TARGET, feature_matrix
+from training_pipeline import list_parquet_files
+
+DEFAULT_STORAGE = "sqlite:///xgb_tuning.db"
+STUDY_NAME = "tempo_no2_xgb"
+VAL_FRACTION = 0.2
+CHUNK_ROWS = 1_048_576
+
+
+def build_matrix(source, out_dir: str | Path, features: Sequence[str] = FEATURE_COLUMNS, target: str = TARGET, read_batch_size: int = 262_144) -> dict:
+    """
+    X.npy (filas, características) float32 e y.npy float32 desde Parquet de características.
+
+    Se descartan las filas sin objetivo; los NaN en X se mantienen (XGBoost los trata
+    como ausentes). Dos pasadas: la primera solo lee el objetivo para contar filas, la
+    segunda rellena arrays ``open_memmap`` del tamaño exacto. Escribe directamente en
+    ``out_dir`` (la caché se encarga de publicar la carpeta completa).
+    """
+    files = list_parquet_files(source)
+    out_dir = Path(out_dir)
+    if not files:
+        raise ValueError(f"No hay ficheros Parquet en {source}")
+
+    rows = 0
+    for path in files:
+        for batch in pq.ParquetFile(str(path)).iter_batches(batch_size=read_batch_size, columns=[target]):
+            rows += int(np.count_nonzero(~np.isnan(batch.column(0).to_numpy(zero_copy_only=False).astype(np.float64))))
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    X = np.lib.format.open_memmap(out_dir / "X.npy", mode="w+", dtype=np.float32, shape=(rows, len(features)))
+    y = np.lib.format.open_memmap(out_dir / "y.npy", mode="w+", dtype=np.float32, shape=(rows,))
+    pos = 0
+    for path in files:
+        pf = pq.ParquetFile(str(path))
+        columns = [c for c in (*features, target) if c in pf.schema_arrow.names]
+        for batch in pf.iter_batches(batch_size=read_batch_size, columns=columns):
+            table = pa.Table.from_batches([batch])
+            target_values = table.column(target).to_numpy(zero_copy_only=False).astype(np.float64)
+            keep = ~np.isnan(target_values)
+            n = int(keep.sum())
+            X[pos:pos + n] = feature_matrix(table, features)[keep]
+            y[pos:pos + n] = target_values[keep]
+            pos += n
+    X.flush()
+    y.flush()
+    del X, y
+    print(f"🧮 Matriz de entrenamiento: {rows:,} filas × {len(features)} características")
+    return {"rows": rows}
+
+
+def cached_matrix(source, cache: DatasetCache | None = None, features: Sequence[str] = FEATURE_COLUMNS, target: str = TARGET, rebuild: bool = False) -> Path:
+    """Carpeta con X.npy/y.npy de ``source``, construida solo si cambian los datos, las columnas o el código."""
+    files = list_parquet_files(source)
+    if not files:
+        raise ValueError(f"No hay ficheros Parquet en {source}")
+    cache = cache or DatasetCache()
+    config = {"kind": "xgb_matrix", "features": list(features), "target": target}
+    entry = cache.get_or_build(files, config, lambda out_dir: build_matrix(files, out_dir, features, target), code=[features_module, sys.modules[__name__]], rebuild=rebuild)
+    return entry.path
+
+
+def load_matrix(matrix_dir: str | Path) -> tuple[np.ndarray, np.ndarray]:
+    matrix_dir = Path(matrix_dir)
+    return np.load(matrix_dir / "X.npy", mmap_mode="r"), np.load(matrix_dir / "y.npy", mmap_mode="r")
+
+
+def validation_mask(start: int, stop: int, val_fraction: float = VAL_FRACTION) -> np.ndarray:
+    """Filas de validación de [start, stop): hash multiplicativo del índice, sin arrays globales."""
+    idx = np.arange(start, stop, dtype=np.uint64)
+    return ((idx * np.uint64(2654435761)) % np.uint64(2 ** 32)) < np.uint64(int(val_fraction * 2 ** 32))
+
+
+def validation_variance(y: np.ndarray, val_fraction: float = VAL_FRACTION) -> float:
+    """Varianza de las filas de validación de ``y``, recorriéndolo por trozos."""
+    sum_y = sum_y2 = 0.0
+    n = 0
+    for start in range(0, len(y), CHUNK_ROWS):
+        stop = min(start + CHUNK_ROWS, len(y))
+        label = np.asarray(y[start:stop][validation_mask(start, stop, val_fraction)], dtype=np.float64)
+        sum_y += float(label.sum())
+        sum_y2 += float((label ** 2).sum())
+        n += len(label)
+    return sum_y2 / n - (sum_y / n) ** 2 if n else float("nan")
+
+
+def _quantile_matrices(matrix_dir: str | Path, val_fraction: float, max_bin: int):
+    """(dtrain, dval, varianza de y_val): cuantizadas por trozos desde los .npy mapeados."""
+    import xgboost as xgb
+
+    X, y = load_matrix(matrix_dir)
+
+    class ChunkIter(xgb.DataIter):
+        def __init__(self, validation: bool):
+            self.validation = validation
+            self.start = 0
+            super().__init__()
+
+        def next(self, input_data):
+            if self.start >= len(y):
+                return 0
+            stop = min(self.start + CHUNK_ROWS, len(y))
+            mask = validation_mask(self.start, stop, val_fraction)
+            if not self.validation:
+                mask = ~mask
+            input_data(data=np.asarray(X[self.start:stop][mask]), label=np.asarray(y[self.start:stop][mask]))
+            self.start = stop
+            return 1
+
+        def reset(self):
+            self.start = 0
+
+    dtrain = xgb.QuantileDMatrix(ChunkIter(False), max_bin=max_bin)
+    dval = xgb.QuantileDMatrix(ChunkIter(True), ref=dtrain, max_bin=max_bin)
+    # Aparte: QuantileDMatrix recorre el iterador varias veces y llama a reset() al final
+    return dtrain, dval, validation_variance(y, val_fraction)
+
+
+def suggest_params(trial) -> tuple[dict, int]:
+    """Mismo espacio de búsqueda que el cuaderno; n_estimators pasa a num_boost_round."""
+    params = {
+        "max_depth": trial.suggest_int("max_depth", 3, 15),
+        "eta": trial.suggest_float("learning_rate", 0.01, 0.3, log=True),
+        "subsample": trial.suggest_float("subsample", 0.5, 1.0),
+        "colsample_bytree": trial.suggest_float("colsample_bytree", 0.5, 1.0),
+        "min_child_weight": trial.suggest_int("min_child_weight", 1, 10),
+        "gamma": trial.suggest_float("gamma", 0, 5),
+        "alpha": trial.suggest_float("reg_alpha", 0, 1),
+        "lambda": trial.suggest_float("reg_lambda", 0.5, 3),
+    }
+    return params, trial.suggest_int("n_estimators", 100, 600)
+
+
+def _storage(url: str):
+    import optuna
+
+    if url.startswith("sqlite"):
+        # varios procesos escriben en el mismo fichero: esperar al bloqueo en vez de fallar
+        return optuna.storages.RDBStorage(url, engine_kwargs={"connect_args": {"timeout": 60}})
+    return url
+
+
+def _worker(matrix_dir: str, storage: str, study_name: str, n_trials: int, n_jobs: int, seed: int, val_fraction: float, max_bin: int, report_every: int, warmup_rounds: int, startup_trials: int) -> int:
+    import optuna
+    import xgboost as xgb
+    from optuna.trial import TrialState
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    dtrain, dval, var = _quantile_matrices(matrix_dir, val_fraction, max_bin)
+
+    class PruneOnR2(xgb.callback.TrainingCallback):
+        def __init__(self, trial):
+            self.trial = trial
+
+        def after_iteration(self, model, epoch, evals_log):
+            if (epoch + 1) % report_every:
+                return False
+            rmse = evals_log["val"]["rmse"][-1]
+            self.trial.report(1.0 - rmse ** 2 / var, epoch + 1)
+            if self.trial.should_prune():
+                raise optuna.TrialPruned()
+            return False
+
+    def objective(trial):
+        params, rounds = suggest_params(trial)
+        params.update({"objective": "reg:squarederror", "tree_method": "hist", "nthread": n_jobs, "seed": 42, "eval_metric": "rmse"})
+        evals_result = {}
+        xgb.train(params, dtrain, num_boost_round=rounds, evals=[(dval, "val")], evals_result=evals_result, callbacks=[PruneOnR2(trial)], verbose_eval=False)
+        return 1.0 - evals_result["val"]["rmse"][-1] ** 2 / var
+
+    # El pruner no se guarda en el estudio: cada proceso construye el suyo
+    pruner = optuna.pruners.MedianPruner(n_startup_trials=startup_trials, n_warmup_steps=warmup_rounds)
+    study = optuna.load_study(study_name=study_name, storage=_storage(storage), sampler=optuna.samplers.TPESampler(seed=seed), pruner=pruner)
+    stop = optuna.study.MaxTrialsCallback(n_trials, states=(TrialState.COMPLETE, TrialState.PRUNED))
+    study.optimize(objective, callbacks=[stop], gc_after_trial=True)
+    return os.getpid()
+
+
+def tune(matrix_dir: str | Path, n_trials: int = 50, workers: int = 1, storage: str = DEFAULT_STORAGE, study_name: str = STUDY_NAME, seed: int = 42, val_fraction: float = VAL_FRACTION, max_bin: int = 256, report_every: int = 10, warmup_rounds: int = 50) -> dict:
+    """Lanza ``workers`` procesos sobre el mismo estudio hasta sumar ``n_trials`` trials terminados o podados."""
+    import optuna
+    from optuna.trial import TrialState
+
+    startup_trials = max(5, workers)
+    study = optuna.create_study(study_name=study_name, storage=_storage(storage), direction="maximize", load_if_exists=True)
+    already = len(study.get_trials(states=(TrialState.COMPLETE, TrialState.PRUNED)))
+    n_jobs = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🔎 Estudio {study_name}: {already} trials previos, objetivo {n_trials}, {workers} procesos × {n_jobs} hilos")
+
+    t0 = time.perf_counter()
+    args = [(str(matrix_dir), storage, study_name, n_trials, n_jobs, seed + i, val_fraction, max_bin, report_every, warmup_rounds, startup_trials) for i in range(workers)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_worker, *zip(*args)))
+    else:
+        _worker(*args[0])
+    wall = time.perf_counter() - t0
+
+    study = optuna.load_study(study_name=study_name, storage=_storage(storage))
+    finished = [t for t in study.trials if t.state in (TrialState.COMPLETE, TrialState.PRUNED) and t.datetime_complete]
+    new = finished[already:]
+    durations = np.array([(t.datetime_complete - t.datetime_start).total_seconds() for t in new]) if new else np.empty(0)
+    best = study.best_trial if any(t.state == TrialState.COMPLETE for t in study.trials) else None
+    report = {
+        "trials": len(new),
+        "complete": sum(t.state == TrialState.COMPLETE for t in new),
+        "pruned": sum(t.state == TrialState.PRUNED for t in new),
+        "wall_seconds": round(wall, 1),
+        "trials_per_hour": round(len(new) / wall * 3600, 1) if wall > 0 else 0.0,
+        "seconds_per_trial_mean": round(float(durations.mean()), 2) if durations.size else None,
+        "seconds_per_trial_p50": round(float(np.median(durations)), 2) if durations.size else None,
+        "best_value": best.value if best else None,
+        "best_params": best.params if best else {},
+    }
+    print(f"⏱️ {report['trials']} trials ({report['pruned']} podados) en {wall:.0f} s: {report['trials_per_hour']} trials/hora, "
+          f"{report['seconds_per_trial_mean']} s/trial de media")
+    if best:
+        print(f"🏆 Mejor R² de validación: {best.value:.4f}")
+        print("Mejores hiperparámetros:", best.params)
+    return report
+
+
+def fit_best(matrix_dir: str | Path, best_params: dict, out_path: str | Path, max_bin: int = 256):
+    """Entrena el modelo final con todas las filas y los mejores hiperparámetros (como el cuaderno)."""
+    from xgboost import XGBRegressor
+
+    X, y = load_matrix(matrix_dir)
+    model = XGBRegressor(**best_params, tree_method="hist", max_bin=max_bin, n_jobs=-1, random_state=42)
+    model.fit(X, y)
+    model.save_model(str(out_path))
+    print(f"💾 Modelo final → {out_path}")
+    return model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Búsqueda optuna en paralelo del XGBRegressor de NO2")
+    parser.add_argument("source", help="Parquet de características (features.py): carpeta, patrón o fichero")
+    parser.add_argument("--cache-dir", help="caché de datasets (por defecto DATASET_CACHE_DIR o ./.dataset_cache)")
+    parser.add_argument("--rebuild", action="store_true", help="reconstruye la matriz aunque esté en caché")
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--storage", default=DEFAULT_STORAGE)
+    parser.add_argument("--study", default=STUDY_NAME)
+    parser.add_argument("--max-bin", type=int, default=256)
+    parser.add_argument("--save-model", help="entrena y guarda el modelo final con los mejores hiperparámetros")
+    parser.add_argument("--report", help="guarda el informe (JSON)")
+    args = parser.parse_args(argv)
+
+    matrix_dir = cached_matrix(args.source, DatasetCache(args.cache_dir), rebuild=args.rebuild)
+    report = tune(matrix_dir, args.trials, args.workers, args.storage, args.study, max_bin=args.max_bin)
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+    if args.save_model and report["best_params"]:
+        fit_best(matrix_dir, report["best_params"], args.save_model, max_bin=args.max_bin)
+
+
+if __name__ == "__main__":
+    main()
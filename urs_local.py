@@ -0,0 +1,130 @@
+"""
+Mock Earthdata Login (URS) + protected data server for offline testing.
+
+Implements just enough of URS for ``earthdata_auth.EarthdataAuth``:
+
+- POST /api/users/find_or_create_token  (HTTP Basic) -> {"access_token", "expiration_date"}
+- GET  /protected/<name>  -> 200 with ``Authorization: Bearer <token>`` or a valid
+  session cookie, otherwise 302 to /oauth/authorize
+- GET  /oauth/authorize   (HTTP Basic) -> sets the session cookie and redirects back
+
+Counters (``token_requests``, ``oauth_logins``, ``protected_requests``) let a
+test check that tokens and cookies are actually reused.
+
+    with LocalURS("user", "pass") as urs:
+        requests.get(f"{urs.url}/protected/granule.nc", headers=...)
+"""
+import base64
+import json
+import secrets
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+
+class LocalURS:
+    def __init__(self, username: str, password: str, token_days: int = 30, payload: bytes = b"TEMPO-LOCAL-GRANULE"):
+        self.username = username
+        self.password = password
+        self.token_days = token_days
+        self.payload = payload
+        self.tokens: set[str] = set()
+        self.sessions: set[str] = set()
+        self.token_requests = 0
+        self.oauth_logins = 0
+        self.protected_requests = 0
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _check_basic(self, header: str | None) -> bool:
+        if not header or not header.startswith("Basic "):
+            return False
+        try:
+            user, _, pwd = base64.b64decode(header[6:]).decode().partition(":")
+        except Exception:
+            return False
+        return user == self.username and pwd == self.password
+
+    def _make_handler(self):
+        urs = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code: int, body: bytes = b"", headers: dict | None = None):
+                self.send_response(code)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if self.path != "/api/users/find_or_create_token":
+                    return self._send(404)
+                if not urs._check_basic(self.headers.get("Authorization")):
+                    return self._send(401, b'{"error":"invalid_credentials"}')
+                token = secrets.token_hex(16)
+                expires = datetime.now(timezone.utc) + timedelta(days=urs.token_days)
+                with urs._lock:
+                    urs.tokens.add(token)
+                    urs.token_requests += 1
+                body = json.dumps({
+                    "access_token": token,
+                    "token_type": "Bearer",
+                    "expiration_date": expires.strftime("%m/%d/%Y"),
+                }).encode()
+                self._send(200, body, {"Content-Type": "application/json"})
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == "/oauth/authorize":
+                    if not urs._check_basic(self.headers.get("Authorization")):
+                        return self._send(401)
+                    sid = secrets.token_hex(16)
+                    with urs._lock:
+                        urs.sessions.add(sid)
+                        urs.oauth_logins += 1
+                    back = parse_qs(parsed.query).get("redirect_uri", ["/"])[0]
+                    return self._send(302, headers={"Location": back, "Set-Cookie": f"urs_session={sid}; Path=/"})
+
+                if parsed.path.startswith("/protected/"):
+                    with urs._lock:
+                        urs.protected_requests += 1
+                    auth = self.headers.get("Authorization", "")
+                    cookies = dict(
+                        c.strip().split("=", 1) for c in self.headers.get("Cookie", "").split(";") if "=" in c
+                    )
+                    if (auth.startswith("Bearer ") and auth[7:] in urs.tokens) or cookies.get("urs_session") in urs.sessions:
+                        return self._send(200, urs.payload, {"Content-Type": "application/octet-stream"})
+                    return self._send(302, headers={"Location": f"/oauth/authorize?redirect_uri={quote(self.path)}"})
+
+                self._send(404)
+
+        return Handler
+
+    def start(self) -> "LocalURS":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "LocalURS":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,92 @@
+"""
+Persisted ingestion watermarks.
+
+A watermark is the start time of the latest granule of a collection that was
+downloaded *and* converted. Searches only ask CMR for granules newer than the
+watermark, so a restart (or the next poll) resumes exactly where the previous
+run stopped instead of relying on an external manifest.
+
+The store is a small JSON file, ``{collection: "2025-10-04T12:00:00Z"}``,
+rewritten atomically on every update:
+
+    marks = WatermarkStore("./state/watermarks.json")
+    marks.get("C3685896708-LARC_CLOUD")          # None the first time
+    marks.advance("C3685896708-LARC_CLOUD", granule_time)
+"""
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+WATERMARK_DATE_FMT = "%Y-%m-%dT%H:%M:%SZ"
+DEFAULT_WATERMARK_PATH = Path("./state/watermarks.json")
+
+
+def parse_time(value: str | datetime) -> datetime:
+    """Parse an ISO-8601 time (``Z`` suffix allowed) into an aware UTC datetime."""
+    if isinstance(value, datetime):
+        t = value
+    else:
+        t = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return t.replace(tzinfo=timezone.utc) if t.tzinfo is None else t.astimezone(timezone.utc)
+
+
+class WatermarkStore:
+    def __init__(self, path: str | Path = DEFAULT_WATERMARK_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._marks = self._load()
+
+    def _load(self) -> dict[str, str]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self._marks, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def get(self, collection: str) -> datetime | None:
+        """Latest ingested granule time of ``collection``, or None if never ingested."""
+        with self._lock:
+            value = self._marks.get(collection)
+        return parse_time(value) if value else None
+
+    def advance(self, collection: str, time: str | datetime) -> bool:
+        """
+        Move the watermark of ``collection`` forward to ``time``.
+
+        Never moves it backwards; returns True if the stored value changed.
+        """
+        time = parse_time(time)
+        with self._lock:
+            current = self._marks.get(collection)
+            if current and parse_time(current) >= time:
+                return False
+            self._marks[collection] = time.strftime(WATERMARK_DATE_FMT)
+            self._save()
+        return True
+
+    def reset(self, collection: str) -> None:
+        with self._lock:
+            if self._marks.pop(collection, None) is not None:
+                self._save()
+
+    def items(self) -> dict[str, datetime]:
+        with self._lock:
+            return {k: parse_time(v) for k, v in self._marks.items()}
+
+
+_default_watermarks: WatermarkStore | None = None
+
+
+def default_watermarks() -> WatermarkStore:
+    """Process-wide store at INGEST_WATERMARKS (default ./state/watermarks.json)."""
+    global _default_watermarks
+    if _default_watermarks is None:
+        _default_watermarks = WatermarkStore(os.environ.get("INGEST_WATERMARKS", DEFAULT_WATERMARK_PATH))
+    return _default_watermarks
@@ -0,0 +1,301 @@
+"""
+Cubo Zarr (time, lat, lon) de granules L3 para lecturas rápidas de series temporales.
+
+Cada granule L3 se añade al final del eje ``time`` de un almacén Zarr con chunks
+pensados para leer series de un punto o de una caja pequeña: muchos pasos de tiempo
+por chunk y teselas espaciales pequeñas, de modo que un mes de historia en un punto
+toca unos pocos chunks en lugar de abrir cada granule.
+
+Las escrituras son atómicas para los lectores:
+
+- un fichero de bloqueo serializa a los escritores;
+- el número de pasos confirmados se guarda en ``<store>.commit``, que se sustituye
+  de forma atómica al confirmar (también en el atributo ``committed_times``, pero
+  xarray reescribe los atributos del grupo al hacer append), así que un lector
+  (``open_cube``) nunca ve un append a medias;
+- antes de un append se copia aparte la última fila de chunks de tiempo si está a
+  medio llenar (el append la reescribe en su sitio); si el append se interrumpe, el
+  siguiente restaura esa copia y recorta el eje time a lo confirmado antes de escribir.
+
+Uso:
+
+    python zarr_cube.py append ./tempo_cube.zarr ./tempo_data/*.nc
+    python zarr_cube.py point ./tempo_cube.zarr 40.71 -74.0 --start 2025-10-01
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+import zarr
+
+from ingestion import get_spec
+
+DEFAULT_CHUNKS = {"time": 168, "latitude": 64, "longitude": 64}
+COMMITTED_ATTR = "committed_times"
+SOURCES_ATTR = "sources"
+
+
+@contextmanager
+def _store_lock(store: Path, timeout: float = 600.0):
+    """Bloqueo exclusivo portable (O_EXCL) sobre <store>.lock."""
+    lock = store.with_name(store.name + ".lock")
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    started = time.monotonic()
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if time.monotonic() - started > timeout:
+                raise TimeoutError(f"No se pudo bloquear {store} (¿{lock} abandonado?)")
+            time.sleep(0.2)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        lock.unlink(missing_ok=True)
+
+
+def _dims(arr) -> tuple:
+    names = getattr(getattr(arr, "metadata", None), "dimension_names", None)
+    return tuple(names or arr.attrs.get("_ARRAY_DIMENSIONS", ()))
+
+
+def _commit_file(store: Path) -> Path:
+    return store.with_name(store.name + ".commit")
+
+
+def _read_commit(store: Path) -> dict:
+    """Último commit: ``<store>.commit`` o, en cubos anteriores, los atributos del grupo."""
+    commit = _commit_file(store)
+    if commit.exists():
+        return json.loads(commit.read_text())
+    if not store.exists():
+        return {}
+    try:
+        return dict(zarr.open_group(str(store), mode="r").attrs)
+    except Exception:
+        return {}
+
+
+def _write_commit(store: Path, info: dict) -> None:
+    commit = _commit_file(store)
+    tmp = commit.with_name(commit.name + ".tmp")
+    tmp.write_text(json.dumps(info))
+    os.replace(tmp, commit)
+
+
+def _committed(store: Path) -> int:
+    return int(_read_commit(store).get(COMMITTED_ATTR, 0))
+
+
+def _backup_dir(store: Path) -> Path:
+    return store.with_name(store.name + ".rollback")
+
+
+def _partial_chunks(store: Path, committed: int) -> list[Path]:
+    """
+    Ficheros/directorios de la fila de chunks de tiempo que contiene el paso ``committed``
+    si está a medio llenar: el siguiente append la reescribe en su sitio.
+    """
+    group = zarr.open_group(str(store), mode="r", use_consolidated=False)
+    paths = []
+    for _, arr in group.arrays():
+        dims = _dims(arr)
+        if "time" not in dims:
+            continue
+        size = arr.chunks[dims.index("time")]
+        if committed % size == 0:
+            continue  # el append empieza un chunk nuevo
+        # time es el primer eje del cubo: Zarr v3 guarda <array>/c/<k>/…, Zarr v2 <array>/<k>.…
+        k = committed // size
+        base = store / arr.path
+        paths += [p for p in (base / "c" / str(k), base / str(k)) if p.exists()]
+        paths += sorted(base.glob(f"{k}.*"))
+    return paths
+
+
+def _copy(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if src.is_dir():
+        shutil.copytree(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    else:
+        path.unlink(missing_ok=True)
+
+
+def _snapshot(store: Path, committed: int) -> None:
+    """Copia en <store>.rollback los chunks a medio llenar antes de que el append los toque."""
+    backup = _backup_dir(store)
+    tmp = backup.with_name(backup.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for path in _partial_chunks(store, committed):
+        _copy(path, tmp / path.relative_to(store))
+    os.replace(tmp, backup)  # la copia solo cuenta cuando está completa
+
+
+def _rollback(store: Path, committed: int) -> None:
+    """Deshace un append interrumpido: restaura los chunks copiados y recorta el eje time a ``committed``."""
+    backup = _backup_dir(store)
+    shutil.rmtree(backup.with_name(backup.name + ".tmp"), ignore_errors=True)
+    if backup.exists():
+        for path in _partial_chunks(store, committed):
+            _remove(path)
+        for src in backup.rglob("*"):
+            if src.is_file():
+                _copy(src, store / src.relative_to(backup))
+        print(f"↩️ {store.name}: chunks a medio llenar restaurados desde {backup.name}")
+    # use_consolidated=False: los metadatos consolidados reflejan el último commit, no el estado real
+    group = zarr.open_group(str(store), mode="r+", use_consolidated=False)
+    for _, arr in group.arrays():
+        dims = _dims(arr)
+        if "time" in dims:
+            axis = dims.index("time")
+            if arr.shape[axis] > committed:
+                shape = list(arr.shape)
+                shape[axis] = committed
+                arr.resize(tuple(shape))
+                print(f"↩️ {arr.name}: recortado a {committed} pasos de tiempo")
+    shutil.rmtree(backup, ignore_errors=True)
+
+
+def load_granule(nc_path: str | Path, spec="no2_l3") -> xr.Dataset:
+    """Abre un granule L3 como Dataset (time, latitude, longitude) en float32 con NaN para relleno."""
+    spec = get_spec(spec)
+    coords = xr.open_dataset(nc_path, engine="h5netcdf")
+    data = {}
+    opened = {}
+    for col, var_path in spec.variables.items():
+        group, _, name = var_path.rpartition("/")
+        if group not in opened:
+            opened[group] = xr.open_dataset(nc_path, engine="h5netcdf", group=group or None)
+        data[col] = opened[group][name].astype("float32")
+    ds = xr.Dataset(data).assign_coords(
+        time=coords[spec.time].values,
+        latitude=coords[spec.latitude].values,
+        longitude=coords[spec.longitude].values,
+    ).load()
+    for d in opened.values():
+        d.close()
+    coords.close()
+    return ds
+
+
+def append_granule(store: str | Path, nc_path: str | Path, spec="no2_l3", chunks: dict | None = None) -> bool:
+    """
+    Añade un granule L3 al cubo. Retorna False si sus tiempos ya estaban en el cubo.
+    """
+    store = Path(store)
+    chunks = {**DEFAULT_CHUNKS, **(chunks or {})}
+    ds = load_granule(nc_path, spec)
+
+    with _store_lock(store):
+        committed = _committed(store)
+        if committed and store.exists():
+            _rollback(store, committed)
+            existing = xr.open_zarr(str(store), consolidated=False)
+            known = existing["time"].values[:committed]
+            if np.isin(ds["time"].values, known).all():
+                print(f"⏭️ {Path(nc_path).name} ya está en el cubo")
+                return False
+            if existing.sizes["latitude"] != ds.sizes["latitude"] or existing.sizes["longitude"] != ds.sizes["longitude"]:
+                raise ValueError(f"La malla de {nc_path} no coincide con la del cubo")
+            sources = list(_read_commit(store).get(SOURCES_ATTR, []))
+            existing.close()
+            _snapshot(store, committed)
+            ds.to_zarr(str(store), append_dim="time", consolidated=False)
+        else:
+            sources = []
+            encoding = {
+                v: {"chunks": (chunks["time"], chunks["latitude"], chunks["longitude"])}
+                for v in ds.data_vars
+            }
+            # Unidades fijas: xarray elegiría unidades a partir del primer granule y los
+            # appends posteriores se redondearían a ellas.
+            encoding["time"] = {"chunks": (4096,), "units": "seconds since 1970-01-01", "dtype": "int64"}
+            ds.to_zarr(str(store), mode="w", encoding=encoding, consolidated=False)
+
+        # Confirmar: atributos y metadatos consolidados, y por último <store>.commit, que es
+        # lo que cuenta; hasta entonces un fallo se deshace con _rollback
+        info = {COMMITTED_ATTR: committed + ds.sizes["time"], SOURCES_ATTR: sources + [Path(nc_path).name]}
+        group = zarr.open_group(str(store), mode="r+", use_consolidated=False)
+        group.attrs.update(info)
+        zarr.consolidate_metadata(str(store))
+        _write_commit(store, info)
+        shutil.rmtree(_backup_dir(store), ignore_errors=True)
+
+    print(f"🧊 {Path(nc_path).name} añadido ({committed + ds.sizes['time']} pasos de tiempo)")
+    return True
+
+
+def open_cube(store: str | Path) -> xr.Dataset:
+    """Abre el cubo de forma perezosa (Dask) limitado a los pasos confirmados, ordenado por tiempo."""
+    # consolidated=None: durante un append los metadatos consolidados pueden no estar
+    ds = xr.open_zarr(str(store), consolidated=None, chunks={})
+    committed = int(_read_commit(Path(store)).get(COMMITTED_ATTR, ds.sizes["time"]))
+    ds = ds.isel(time=slice(0, committed))
+    if not ds.indexes["time"].is_monotonic_increasing:
+        ds = ds.sortby("time")
+    return ds
+
+
+def point_series(store: str | Path, lat: float, lon: float, variables: list[str] | None = None, start=None, end=None):
+    """Serie temporal (DataFrame) en la celda más cercana a (lat, lon)."""
+    ds = open_cube(store)
+    if variables:
+        ds = ds[variables]
+    ds = ds.sel(latitude=lat, longitude=lon, method="nearest").sel(time=slice(start, end))
+    # to_dataframe() añade latitude/longitude como columnas, que nunca son NaN
+    return ds.load().to_dataframe().dropna(how="all", subset=list(ds.data_vars))
+
+
+def bbox_series(store: str | Path, bbox: tuple, variables: list[str] | None = None, start=None, end=None, reduce: str = "mean"):
+    """Serie temporal agregada (mean/max/min/median) sobre bbox = (min_lon, min_lat, max_lon, max_lat)."""
+    ds = open_cube(store)
+    if variables:
+        ds = ds[variables]
+    min_lon, min_lat, max_lon, max_lat = bbox
+    lat = ds["latitude"].values
+    lat_slice = slice(min_lat, max_lat) if lat[0] <= lat[-1] else slice(max_lat, min_lat)
+    sub = ds.sel(latitude=lat_slice, longitude=slice(min_lon, max_lon), time=slice(start, end))
+    return getattr(sub, reduce)(dim=["latitude", "longitude"], skipna=True).load().to_dataframe()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Cubo Zarr de granules L3")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_append = sub.add_parser("append")
+    p_append.add_argument("store")
+    p_append.add_argument("files", nargs="+")
+    p_append.add_argument("--product", default="no2_l3")
+    p_point = sub.add_parser("point")
+    p_point.add_argument("store")
+    p_point.add_argument("lat", type=float)
+    p_point.add_argument("lon", type=float)
+    p_point.add_argument("--start", default=None)
+    p_point.add_argument("--end", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "append":
+        for f in sorted(args.files):
+            append_granule(args.store, f, spec=args.product)
+    else:
+        print(point_series(args.store, args.lat, args.lon, start=args.start, end=args.end).to_string())
+
+
+if __name__ == "__main__":
+    main()